@@ -0,0 +1,191 @@
+"""
+Нагрузочный тест AJAX-эндпоинтов (детали задачи и смена статуса) на запущенном сервере.
+
+Сравнивает пропускную способность и хвостовые задержки одного воркера при разном
+числе одновременных клиентов, например:
+
+    gunicorn -w 1 task_manager.wsgi:application                                   # WSGI, sync
+    gunicorn -w 1 -k uvicorn.workers.UvicornWorker task_manager.asgi:application  # ASGI
+
+    python -m benchmarks.ajax_load --url http://127.0.0.1:8000 --concurrency 1,8,32,64
+
+Задачи для теста создаются в базе из настроек Django (той же, что у сервера)
+и удаляются после замера, поэтому запускать скрипт нужно на тестовом стенде.
+Клиент написан на asyncio без внешних зависимостей: каждый виртуальный
+пользователь держит своё keep-alive соединение и шлёт запросы подряд.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import django
+
+TASK_PREFIX = 'ajax-load'
+
+
+class Connection:
+    """Минимальный HTTP/1.1 клиент поверх одного keep-alive соединения."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(
+        self, method: str, path: str, headers: Dict[str, str], body: bytes = b'',
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Сервер закрыл соединение')
+        status = int(status_line.split()[1])
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        if 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            content = await self.reader.read()
+            response_headers['connection'] = 'close'
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, response_headers, content
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def get_csrf_token(host: str, port: int, prefix: str) -> str:
+    connection = Connection(host, port)
+    _, headers, _ = await connection.request('GET', f'{prefix}/tasks/create/', {})
+    await connection.close()
+    cookie = headers.get('set-cookie', '')
+    for part in cookie.split(';'):
+        name, _, value = part.strip().partition('=')
+        if name == 'csrftoken':
+            return value
+    raise RuntimeError('Сервер не выдал CSRF-cookie')
+
+
+async def virtual_user(
+    host: str, port: int, prefix: str, scenario: str, task_id: int, csrf_token: str,
+    deadline: float, latencies: List[float], errors: List[int],
+) -> None:
+    connection = Connection(host, port)
+    statuses = ['paused', 'in_progress']
+    step = 0
+    try:
+        while time.perf_counter() < deadline:
+            if scenario == 'details':
+                method, path, body, headers = 'GET', f'{prefix}/tasks/task/{task_id}/details/', b'', {}
+            else:
+                method, path = 'POST', f'{prefix}/tasks/tasks/{task_id}/update_status/'
+                body = urlencode({'status': statuses[step % 2]}).encode()
+                headers = {
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'Cookie': f'csrftoken={csrf_token}',
+                    'X-CSRFToken': csrf_token,
+                    'X-Requested-With': 'XMLHttpRequest',
+                }
+            step += 1
+            started = time.perf_counter()
+            try:
+                status, _, _ = await connection.request(method, path, headers, body)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                errors.append(0)
+                await connection.close()
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        await connection.close()
+
+
+async def run_level(
+    host: str, port: int, prefix: str, scenario: str, task_ids: List[int], concurrency: int, duration: float,
+) -> Tuple[int, float, List[float], List[int]]:
+    csrf_token = await get_csrf_token(host, port, prefix) if scenario == 'status' else ''
+    latencies: List[float] = []
+    errors: List[int] = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        virtual_user(host, port, prefix, scenario, task_ids[i % len(task_ids)], csrf_token,
+                     started + duration, latencies, errors)
+        for i in range(concurrency)
+    ])
+    return len(latencies), time.perf_counter() - started, latencies, errors
+
+
+def prepare_tasks(count: int) -> List[int]:
+    from tasks.models import Task
+
+    return [Task.objects.create(name=f'{TASK_PREFIX} {i}', status='in_progress').pk for i in range(count)]
+
+
+def cleanup_tasks() -> None:
+    from tasks.models import Task
+
+    Task.objects.filter(name__startswith=TASK_PREFIX).delete()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес запущенного сервера.')
+    parser.add_argument('--concurrency', default='1,8,32,64', help='Числа одновременных клиентов через запятую.')
+    parser.add_argument('--duration', type=float, default=10.0, help='Длительность замера на каждый уровень, с.')
+    parser.add_argument('--scenario', choices=['details', 'status'], action='append',
+                        help='Сценарий (по умолчанию оба).')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+    django.setup()
+
+    url = urlsplit(args.url)
+    host, port, prefix = url.hostname, url.port or 80, url.path.rstrip('/')
+    levels = [int(level) for level in args.concurrency.split(',')]
+    # Каждому клиенту своя задача, чтобы смены статусов не конфликтовали друг с другом
+    task_ids = prepare_tasks(max(levels))
+    try:
+        print(f"{'сценарий':>10} {'клиентов':>9} {'запросов/с':>11} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'ошибок':>7}")
+        for scenario in args.scenario or ['details', 'status']:
+            for concurrency in levels:
+                done, elapsed, latencies, errors = asyncio.run(
+                    run_level(host, port, prefix, scenario, task_ids, concurrency, args.duration)
+                )
+                if not latencies:
+                    print(f"{scenario:>10} {concurrency:>9} {'нет ответов':>11} {len(errors):>34}")
+                    continue
+                print(
+                    f"{scenario:>10} {concurrency:>9} {done / elapsed:>11.1f} "
+                    f"{statistics.median(latencies) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                    f"{percentile(latencies, 0.99) * 1000:>8.1f} {len(errors):>7}"
+                )
+    finally:
+        cleanup_tasks()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Сравнение каскадного завершения задачи: поштучный save() каждой подзадачи
+(как было раньше) и проверка всего поддерева за один проход с пакетными UPDATE.
+
+Запуск: python -m benchmarks.cascade_completion
+"""
+from benchmarks.utils import measure, test_database
+
+
+def legacy_complete(task) -> None:
+    """Прежний поштучный каскад из Task.save, сохранён для сравнения."""
+    from django.core.exceptions import ValidationError
+    from django.db import transaction
+    from django.utils import timezone
+
+    from tasks.models import Task
+
+    with transaction.atomic():
+        old_task = Task.objects.get(pk=task.pk)
+        if old_task.status != 'completed' and task.status == 'completed':
+            if task.subtasks.filter(status__in=['in_progress', 'assigned']).exists():
+                raise ValidationError("Есть незавершенные подзадачи.")
+        if not task.can_transition_to(task.status, old_task.status):
+            raise ValidationError("Невозможно выполнить переход в указанный статус.")
+
+        for subtask in task.subtasks.all():
+            if subtask.status != 'completed':
+                subtask.status = 'completed'
+                legacy_complete(subtask)
+        if task.subtasks.filter(status__in=['in_progress', 'assigned', 'paused']).exists():
+            raise ValidationError("Есть незавершенные подзадачи.")
+
+        Task.objects.filter(pk=task.pk).update(status='completed', completed_at=timezone.now())
+
+
+def build_epic(stories: int, subtasks_per_story: int):
+    from tasks.models import Task
+
+    epic = Task.objects.create(name='Epic', status='in_progress')
+    for i in range(stories):
+        story = Task.objects.create(name=f'Story {i}', status='in_progress', parent=epic)
+        for j in range(subtasks_per_story):
+            Task.objects.create(name=f'Subtask {i}-{j}', status='completed', parent=story)
+        Task.objects.filter(pk=story.pk).update(status='completed')
+    return Task.objects.get(pk=epic.pk)
+
+
+def run() -> None:
+    from tasks.models import Task
+
+    print(f"{'подзадач':>10} {'способ':>10} {'запросов':>10} {'мс':>10}")
+    for stories, subtasks_per_story in [(10, 10), (10, 50), (50, 50)]:
+        size = stories * (subtasks_per_story + 1)
+        for label, complete in [('поштучно', legacy_complete), ('пакетно', Task.save)]:
+            epic = build_epic(stories, subtasks_per_story)
+            epic.status = 'completed'
+            elapsed, queries = measure(lambda: complete(epic))
+            print(f"{size:>10} {label:>10} {queries:>10} {elapsed * 1000:>10.2f}")
+            Task.objects.all().delete()
+
+
+if __name__ == '__main__':
+    with test_database():
+        run()
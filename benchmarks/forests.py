@@ -0,0 +1,74 @@
+"""
+Генераторы синтетических лесов задач для замеров.
+
+Формы:
+    wide  — широкие неглубокие деревья (50 подзадач на уровень, глубина 2);
+    deep  — длинные цепочки с редкими ветвлениями (глубина до 40: рекурсивная
+            отрисовка task_tree_item.html упирается в предел рекурсии Python
+            примерно на 45 уровнях);
+    mixed — случайное ветвление от 0 до 8 подзадач на глубине до 12.
+
+Генерация детерминирована (зерно seed), а загрузка идёт через импорт
+(tasks.importer), поэтому лес в 1M задач строится пакетными вставками.
+"""
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+SHAPES = ('wide', 'deep', 'mixed')
+STATUSES = ('assigned', 'in_progress', 'paused', 'completed')
+
+
+def fanout(shape: str, depth: int, rng: random.Random) -> int:
+    """Количество подзадач у задачи на глубине depth."""
+    if shape == 'wide':
+        return 50 if depth < 2 else 0
+    if shape == 'deep':
+        if depth >= 40:
+            return 0
+        return 2 if rng.random() < 0.05 else 1
+    if shape == 'mixed':
+        return rng.randint(0, 8) if depth < 12 else 0
+    raise ValueError(f'Неизвестная форма леса: {shape}')
+
+
+def forest_rows(shape: str, size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Строит строки леса в формате импорта (id, parent_id, ...), родители раньше подзадач.
+
+    Args:
+        shape (str): Форма леса (см. SHAPES).
+        size (int): Количество задач.
+        seed (int): Зерно генератора случайных чисел.
+    """
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    queue: Deque[Tuple[str, int]] = deque()
+
+    def add(parent_id: str, depth: int) -> None:
+        task_id = str(len(rows) + 1)
+        rows.append({
+            'id': task_id,
+            'parent_id': parent_id,
+            'name': f'{shape} {task_id}',
+            'status': rng.choice(STATUSES[:3]),
+            'planned_effort': round(rng.uniform(0.5, 8), 2),
+            'actual_effort': round(rng.uniform(0, 8), 2),
+        })
+        queue.append((task_id, depth))
+
+    while len(rows) < size:
+        if not queue:
+            add('', 0)
+            continue
+        parent_id, depth = queue.popleft()
+        for _ in range(min(fanout(shape, depth, rng), size - len(rows))):
+            add(parent_id, depth + 1)
+    return rows
+
+
+def load_forest(shape: str, size: int, seed: int = 0) -> None:
+    """Загружает лес в текущую базу через импорт задач."""
+    from tasks.importer import import_tasks, prepare_tasks
+
+    import_tasks(prepare_tasks(forest_rows(shape, size, seed)), batch_size=5000)
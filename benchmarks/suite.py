@@ -0,0 +1,352 @@
+"""
+Набор замеров горячих путей на синтетических лесах задач с сравнением с эталоном.
+
+Для каждой формы леса (wide, deep, mixed) и размера строится лес в отдельной
+тестовой базе, затем замеряются: отрисовка TaskListView, calculate_efforts,
+каскадное завершение в Task.save, построение TaskForm и AJAX-эндпоинты смены
+статуса, времени и деталей. Для каждого случая записываются медиана и минимум
+времени, число SQL-запросов и пиковая память (tracemalloc) в JSON-файл.
+
+Запуск:
+    python -m benchmarks.suite                              # леса по 1k задач, сравнение с эталоном
+    python -m benchmarks.suite --sizes 10000,100000 --output /tmp/results.json
+    python -m benchmarks.suite --sizes 1000000 --cases calculate_efforts,cascade_completion
+    python -m benchmarks.suite --save-baseline              # обновить benchmarks/baseline.json
+
+Код возврата 1, если хотя бы один случай хуже эталона: минимальное время больше
+допуска --time-tolerance (и хотя бы на 5 мс), запросов больше, память больше допуска
+--memory-tolerance. Эталон снят на конкретной машине, поэтому после смены
+окружения его нужно пересохранить.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sqlite3
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.forests import SHAPES, load_forest
+from benchmarks.utils import test_database
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, 'results.json')
+MIN_TIME_REGRESSION = 0.005  # Более мелкие расхождения времени считаются шумом
+
+
+@dataclass
+class Forest:
+    """Загруженный лес и задачи, на которых выполняются замеры."""
+    shape: str
+    size: int
+    root_id: int  # Корень самого большого дерева
+    leaf_id: int  # Самая глубокая задача этого дерева
+    client: Any = None
+    state: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Case:
+    name: str
+    # Вызывается перед каждым прогоном и возвращает замеряемую функцию
+    prepare: Callable[[Forest], Callable[[], Any]]
+    max_size: Optional[int] = None  # Для больших лесов случай пропускается
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, max_size: Optional[int] = None):
+    def register(prepare: Callable[[Forest], Callable[[], Any]]):
+        CASES.append(Case(name, prepare, max_size))
+        return prepare
+    return register
+
+
+def get(forest: Forest, url: str, **extra) -> Callable[[], Any]:
+    def request():
+        response = forest.client.get(url, **extra)
+        assert response.status_code in (200, 304), response.status_code
+        return response
+    return request
+
+
+def post(forest: Forest, url: str, data: Dict[str, Any]) -> Callable[[], Any]:
+    def request():
+        response = forest.client.post(url, data)
+        assert response.status_code == 200, response.status_code
+        return response
+    return request
+
+
+@case('task_list_cold', max_size=100_000)
+def task_list_cold(forest: Forest):
+    from django.core.cache import cache
+    from django.urls import reverse
+
+    cache.clear()
+    return get(forest, reverse('task_list'))
+
+
+@case('task_list_warm', max_size=100_000)
+def task_list_warm(forest: Forest):
+    from django.urls import reverse
+
+    if not forest.state.get('list_warmed'):
+        forest.client.get(reverse('task_list'))
+        forest.state['list_warmed'] = True
+    return get(forest, reverse('task_list'))
+
+
+@case('task_list_lazy')
+def task_list_lazy(forest: Forest):
+    from django.urls import reverse
+
+    return get(forest, reverse('task_list'), data={'lazy': '1'})
+
+
+@case('calculate_efforts')
+def calculate_efforts(forest: Forest):
+    from tasks.models import Task
+
+    return lambda: Task.objects.get(pk=forest.root_id).calculate_efforts()
+
+
+@case('task_form_cold')
+def task_form_cold(forest: Forest):
+    from django.core.cache import cache
+
+    from tasks.forms import TaskForm
+    from tasks.models import Task
+
+    cache.clear()
+    task = Task.objects.get(pk=forest.leaf_id)
+    return lambda: list(TaskForm(instance=task).fields['parent'].widget.choices)
+
+
+@case('task_form_warm')
+def task_form_warm(forest: Forest):
+    from tasks.forms import TaskForm
+    from tasks.models import Task
+
+    task = Task.objects.get(pk=forest.leaf_id)
+    TaskForm(instance=task)
+    return lambda: list(TaskForm(instance=task).fields['parent'].widget.choices)
+
+
+@case('ajax_details')
+def ajax_details(forest: Forest):
+    from django.urls import reverse
+
+    return get(forest, reverse('task_details', args=[forest.leaf_id]))
+
+
+@case('ajax_details_not_modified')
+def ajax_details_not_modified(forest: Forest):
+    from django.urls import reverse
+
+    url = reverse('task_details', args=[forest.leaf_id])
+    etag = forest.client.get(url)['ETag']
+    return get(forest, url, HTTP_IF_NONE_MATCH=etag)
+
+
+@case('ajax_status')
+def ajax_status(forest: Forest):
+    from django.urls import reverse
+
+    from tasks.models import Task
+
+    Task.objects.filter(pk=forest.leaf_id).update(status='in_progress')
+    return post(forest, reverse('update_task_status', args=[forest.leaf_id]), {'status': 'paused'})
+
+
+@case('ajax_effort')
+def ajax_effort(forest: Forest):
+    from django.urls import reverse
+
+    return post(forest, reverse('update_actual_effort', args=[forest.leaf_id]), {'actual_effort': 1.5})
+
+
+@case('cascade_completion')
+def cascade_completion(forest: Forest):
+    from tasks.models import Task
+
+    # Подзадачи завершены, корень выполняется: save() проверяет всё поддерево
+    root = Task.objects.get(pk=forest.root_id)
+    Task.objects.subtree(root.path, include_root=False).update(status='completed')
+    Task.objects.filter(pk=root.pk).update(status='in_progress', completed_at=None)
+    root = Task.objects.get(pk=forest.root_id)
+
+    def complete():
+        root.status = 'completed'
+        root.save()
+    return complete
+
+
+def build_forest(shape: str, size: int, seed: int) -> Forest:
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+
+    from tasks.models import PATH_STEP, Task
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {Task._meta.db_table}')
+    cache.clear()
+    load_forest(shape, size, seed)
+
+    # Корень самого большого дерева: первый сегмент пути, по которому больше всего задач
+    sizes: Dict[str, int] = {}
+    for path in Task.objects.values_list('path', flat=True).iterator(chunk_size=10_000):
+        sizes[path[:PATH_STEP]] = sizes.get(path[:PATH_STEP], 0) + 1
+    root_path = max(sizes, key=sizes.get)
+    root = Task.objects.get(path=root_path)
+    leaf = Task.objects.subtree(root.path).order_by('-depth', 'pk').first()
+    return Forest(shape, size, root.pk, leaf.pk, client=Client())
+
+
+def measure_case(forest: Forest, bench: Case, repeat: int) -> Dict[str, Any]:
+    """Прогоняет случай repeat раз для времени и запросов и ещё раз под tracemalloc."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        func = bench.prepare(forest)
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        queries = len(captured)
+
+    # Память замеряется отдельно: под tracemalloc код заметно медленнее
+    func = bench.prepare(forest)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': statistics.median(timings),
+        'min_seconds': min(timings),
+        'queries': queries,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            time_tolerance: float, memory_tolerance: float) -> List[str]:
+    """Печатает сравнение с эталоном и возвращает список регрессий."""
+    regressions = []
+    print(f"\n{'случай':<42} {'мин. мс':>10} {'эталон':>10} {'×':>6} {'запросов':>9} {'КиБ':>10} {'×':>6}")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<42} {result['min_seconds'] * 1000:>10.2f} {'—':>10}")
+            continue
+        # Минимум устойчивее медианы к фоновому шуму машины
+        time_ratio = result['min_seconds'] / base['min_seconds'] if base['min_seconds'] else 1.0
+        memory_ratio = result['peak_kib'] / base['peak_kib'] if base['peak_kib'] else 1.0
+        problems = []
+        if (time_ratio > 1 + time_tolerance
+                and result['min_seconds'] - base['min_seconds'] > MIN_TIME_REGRESSION):
+            problems.append(f"время ×{time_ratio:.2f}")
+        if result['queries'] > base['queries']:
+            problems.append(f"запросов {base['queries']} → {result['queries']}")
+        if memory_ratio > 1 + memory_tolerance and result['peak_kib'] - base['peak_kib'] > 64:
+            problems.append(f"память ×{memory_ratio:.2f}")
+        print(
+            f"{key:<42} {result['min_seconds'] * 1000:>10.2f} {base['min_seconds'] * 1000:>10.2f} {time_ratio:>6.2f} "
+            f"{result['queries']:>9} {result['peak_kib']:>10.1f} {memory_ratio:>6.2f}"
+            + ('  РЕГРЕССИЯ: ' + ', '.join(problems) if problems else '')
+        )
+        regressions.extend(f"{key}: {problem}" for problem in problems)
+    return regressions
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from django.test import override_settings
+
+    selected = set(args.cases.split(',')) if args.cases else None
+    results: Dict[str, Dict[str, Any]] = {}
+    with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+        for size in args.sizes:
+            for shape in args.shapes:
+                started = time.perf_counter()
+                forest = build_forest(shape, size, args.seed)
+                print(f"{shape}-{size}: лес построен за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+                for bench in CASES:
+                    if selected is not None and bench.name not in selected:
+                        continue
+                    if bench.max_size is not None and size > bench.max_size:
+                        continue
+                    key = f"{shape}-{size}/{bench.name}"
+                    results[key] = measure_case(forest, bench, args.repeat)
+                    print(f"  {bench.name}: {results[key]['seconds'] * 1000:.2f} мс, "
+                          f"запросов {results[key]['queries']}", file=sys.stderr)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000', help='Размеры лесов через запятую.')
+    parser.add_argument('--shapes', default=','.join(SHAPES), help='Формы лесов через запятую.')
+    parser.add_argument('--cases', help='Случаи через запятую (по умолчанию все): '
+                        + ', '.join(bench.name for bench in CASES))
+    parser.add_argument('--repeat', type=int, default=5, help='Число прогонов каждого случая.')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генератора лесов.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Файл для результатов (JSON).')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Файл эталона (JSON).')
+    parser.add_argument('--save-baseline', action='store_true', help='Записать результаты как эталон.')
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help='Допустимый рост времени (0.5 = +50%%).')
+    parser.add_argument('--memory-tolerance', type=float, default=0.5, help='Допустимый рост пиковой памяти.')
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(',')]
+    args.shapes = args.shapes.split(',')
+
+    with test_database():
+        import django
+
+        results = run(args)
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'machine': platform.machine(),
+                'repeat': args.repeat,
+                'seed': args.seed,
+            },
+            'results': results,
+        }
+
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Эталон сохранён: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"Эталон {args.baseline} не найден, сравнение пропущено")
+        return
+    with open(args.baseline, encoding='utf-8') as source:
+        baseline = json.load(source)['results']
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\nРегрессий: {len(regressions)}")
+        sys.exit(1)
+    print("\nРегрессий нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Время отрисовки полного дерева задач (TaskListView) с пустым кэшем фрагментов
+и при повторных запросах, когда неизменённые поддеревья берутся из кэша.
+
+Запуск: python -m benchmarks.task_list_render
+"""
+from benchmarks.utils import measure, test_database
+
+
+def build_tree(roots: int, depth: int, width: int) -> None:
+    from tasks.models import Task
+
+    for r in range(roots):
+        level = [Task.objects.create(name=f'Root {r}', status='in_progress')]
+        for d in range(depth):
+            next_level = []
+            for parent in level:
+                for w in range(width):
+                    next_level.append(Task.objects.create(name=f'Task {r}-{d}-{w}', parent=parent))
+            level = next_level
+
+
+def run() -> None:
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from tasks.models import Task
+
+    client = Client()
+    url = reverse('task_list')
+    print(f"{'задач':>8} {'кэш':>14} {'мс':>10}")
+    with override_settings(
+        STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage', ALLOWED_HOSTS=['*'],
+    ):
+        for roots, depth, width in [(10, 2, 5), (20, 3, 5)]:
+            build_tree(roots, depth, width)
+            size = Task.objects.count()
+            cache.clear()
+            cold, _ = measure(lambda: client.get(url))
+            warm, _ = measure(lambda: client.get(url))
+            # Меняется одна задача: перерисовывается только её корневое поддерево
+            leaf = Task.objects.order_by('-depth').first()
+            leaf.status = 'in_progress'
+            leaf.save()
+            partial, _ = measure(lambda: client.get(url))
+            print(f"{size:>8} {'пустой':>14} {cold * 1000:>10.2f}")
+            print(f"{size:>8} {'полный':>14} {warm * 1000:>10.2f}")
+            print(f"{size:>8} {'1 изменение':>14} {partial * 1000:>10.2f}")
+            Task.objects.all().delete()
+
+
+if __name__ == '__main__':
+    with test_database():
+        run()
@@ -0,0 +1,46 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Tuple
+
+import django
+
+
+@contextmanager
+def test_database() -> Iterator[None]:
+    """
+    Настраивает Django и создаёт отдельную тестовую базу, чтобы замеры
+    не трогали рабочий db.sqlite3.
+
+    setup_test_environment не используется: он инструментирует отрисовку
+    шаблонов (копирование контекста на каждый шаблон), что искажает замеры
+    страниц; для тестового клиента достаточно разрешить хост testserver.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings')
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import override_settings
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func: Callable[[], object]) -> Tuple[float, int]:
+    """
+    Выполняет func и возвращает время выполнения в секундах и число SQL-запросов.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    connection.queries_log.clear()  # Журнал ограничен 9000 запросов, иначе счёт собьётся
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    return elapsed, len(queries)
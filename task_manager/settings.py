@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,8 +42,12 @@ INSTALLED_APPS = [
     'tasks',
 ]
 
+# Все middleware поддерживают асинхронный режим: под ASGI запрос к асинхронному
+# представлению не проходит через пул потоков (статику отдаёт
+# AsyncWhiteNoiseMiddleware вместо синхронного WhiteNoiseMiddleware)
 MIDDLEWARE = [
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'task_manager.static.AsyncWhiteNoiseMiddleware',
+    'tasks.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,10 +81,49 @@ WSGI_APPLICATION = 'task_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite в рабочем режиме (task_manager.sqlite_backend): журнал WAL, чтобы чтение
+# не ждало запись, и немедленные транзакции, чтобы конкурирующие записи ждали
+# друг друга до busy_timeout, а не падали с "database is locked"
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'task_manager.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения дают выигрыш только под WSGI (gunicorn с
+        # синхронными воркерами): там поток воркера обслуживает запросы подряд и
+        # переиспользует соединение. Развёртывание по умолчанию — ASGI (Dockerfile),
+        # где синхронный код каждого запроса выполняется в потоке из пула и
+        # соединение всё равно открывается заново, а Django рекомендует отключать
+        # постоянные соединения. Для WSGI задайте DJANGO_CONN_MAX_AGE, например 600
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'wal',
+                # В режиме WAL NORMAL не теряет целостность при сбое, а fsync
+                # выполняется только при контрольной точке
+                'synchronous': 'normal',
+                'busy_timeout': 5000,  # мс
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -20000,  # в КиБ, около 20 МБ на соединение
+                'temp_store': 'memory',
+            },
+        },
+        # Тестовая база в файле: в памяти SQLite не поддерживает WAL
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-manager',
+        # Отрисованные задачи списка кэшируются по одной записи на задачу
+        'OPTIONS': {'MAX_ENTRIES': 20000},
     }
 }
 
@@ -127,3 +171,47 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Дерево задач: в ленивом режиме страница содержит только корневые задачи
+# (постранично), а подзадачи подгружаются по клику через JSON
+TASK_LIST_LAZY = False
+TASK_LIST_PAGE_SIZE = 50
+TASK_CHILDREN_PAGE_SIZE = 50
+# Полнотекстовый поиск задач: размер страницы и сколько первых совпадений
+# ранжируется (ограничивает время запроса по очень частым словам)
+TASK_SEARCH_PAGE_SIZE = 20
+TASK_SEARCH_MAX_CANDIDATES = 10000
+
+# Выбор родительской задачи в форме: список (id, название) кэшируется на
+# TASK_PARENT_CHOICES_TIMEOUT секунд; для больших баз вместо выпадающего
+# списка используется поле с автодополнением
+TASK_PARENT_CHOICES_TIMEOUT = 300
+TASK_PARENT_AUTOCOMPLETE = False
+
+# Поток изменений задач (Server-Sent Events, нужен ASGI-сервер): комментарий
+# keepalive раз в TASK_EVENTS_KEEPALIVE секунд, соединение переоткрывается
+# через TASK_EVENTS_MAX_AGE секунд, браузер переподключается через
+# TASK_EVENTS_RETRY_MS миллисекунд
+TASK_EVENTS_KEEPALIVE = 15
+TASK_EVENTS_MAX_AGE = 300
+TASK_EVENTS_RETRY_MS = 3000
+
+# Метрики запросов (tasks.middleware.RequestMetricsMiddleware): заголовок
+# Server-Timing и, если задан путь, журнал JSONL с ротацией для команды perf_report
+TASK_METRICS_SERVER_TIMING = True
+TASK_METRICS_LOG = None  # например, BASE_DIR / 'request_metrics.jsonl'
+TASK_METRICS_LOG_MAX_BYTES = 10 * 1024 * 1024
+TASK_METRICS_LOG_BACKUP_COUNT = 5
+
+# Сводный отчёт (tasks.reports): кэшируется по номеру изменения таблицы задач
+# на TASK_REPORT_CACHE_TIMEOUT секунд. На больших таблицах можно периодически
+# запускать refresh_task_report и задать TASK_REPORT_SNAPSHOT_MAX_AGE: тогда
+# отчёт отдаётся из сохранённой сводки не старше этого числа секунд
+TASK_REPORT_CACHE_TIMEOUT = 3600
+TASK_REPORT_SNAPSHOT_MAX_AGE = None
+
+# Архив (tasks.archive): команда archive_tasks убирает в архив корневые задачи,
+# поддерево которых полностью завершено раньше TASK_ARCHIVE_AFTER_DAYS дней
+# назад; страница архива выводит по TASK_ARCHIVE_PAGE_SIZE строк
+TASK_ARCHIVE_AFTER_DAYS = 90
+TASK_ARCHIVE_PAGE_SIZE = 50
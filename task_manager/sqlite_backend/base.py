@@ -0,0 +1,56 @@
+"""
+Бэкенд SQLite с настройками для рабочего режима.
+
+Отличается от django.db.backends.sqlite3 двумя параметрами OPTIONS:
+
+    pragmas          — PRAGMA, выполняемые на каждом новом соединении
+                       (journal_mode, synchronous, busy_timeout, mmap_size, ...);
+    transaction_mode — режим BEGIN для transaction.atomic: DEFERRED (как в
+                       Django), IMMEDIATE или EXCLUSIVE.
+
+В режиме IMMEDIATE транзакция берёт блокировку записи сразу. В отложенной
+транзакции, которая сначала читает, а потом пишет, SQLite не может дождаться
+блокировки (снимок чтения уже устарел) и сразу отвечает "database is locked";
+немедленная транзакция ждёт освобождения базы не дольше busy_timeout.
+"""
+from typing import Any, Dict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self) -> Dict[str, Any]:
+        params = super().get_connection_params()
+        # Собственные параметры не передаются в sqlite3.connect
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    @property
+    def pragmas(self) -> Dict[str, Any]:
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name in pragmas:
+            if not name.isidentifier():
+                raise ImproperlyConfigured(f'Некорректное имя PRAGMA: {name!r}')
+        return pragmas
+
+    @property
+    def transaction_mode(self) -> str:
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode должен быть одним из {', '.join(TRANSACTION_MODES)}, получено {mode!r}"
+            )
+        return mode
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self) -> None:
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,57 @@
+from typing import AsyncIterator, BinaryIO
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+STATIC_READ_SIZE = 64 * 1024
+
+
+async def aiter_file(file: BinaryIO, read_size: int = STATIC_READ_SIZE) -> AsyncIterator[bytes]:
+    """Читает файл порциями в пуле потоков, не занимая цикл событий."""
+    read = sync_to_async(file.read, thread_sensitive=False)
+    while True:
+        chunk = await read(read_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware, который работает и в асинхронной цепочке middleware.
+
+    Исходный WhiteNoiseMiddleware только синхронный: под ASGI Django оборачивает
+    его в sync_to_async, и каждый запрос, в том числе к асинхронным AJAX-
+    представлениям, проходит через пул потоков. Здесь поиск файла — словарь в
+    памяти, поэтому запросы не к статике сразу уходят дальше по цепочке, а
+    файлы статики отдаются асинхронным итератором (см. aiter_file).
+    Настройки те же (STATIC_ROOT, WHITENOISE_*).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings) -> None:
+        super().__init__(get_response, settings)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Только при DEBUG: поиск по диску, как в WhiteNoiseMiddleware
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        response = self.serve(static_file, request)
+        if response.file_to_stream is not None:
+            # Файл закрывается вместе с ответом (FileResponse уже зарегистрировал close)
+            response.streaming_content = aiter_file(response.file_to_stream)
+        return response
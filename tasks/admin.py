@@ -1,3 +1,76 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from .forms import TaskForm
+from .models import Performer, Task, TaskStatusEvent
+from .transitions import DELETED, NO_SUBTASKS, check_transition
+
+
+def status_action(status: str, label: str):
+    """Действие списка задач: перевести выбранные задачи в статус status одной пачкой."""
+    def action(modeladmin, request, queryset) -> None:
+        task_ids = list(queryset.values_list('pk', flat=True))
+        errors = Task.objects.apply_status_changes([(task_id, status) for task_id in task_ids])
+        failed = {}
+        for error in errors:
+            if error is not None:
+                failed[error] = failed.get(error, 0) + 1
+        changed = errors.count(None)
+        if changed:
+            modeladmin.message_user(request, f'Статус «{label}» установлен у задач: {changed}.', messages.SUCCESS)
+        for error, count in failed.items():
+            modeladmin.message_user(request, f'Не изменено задач: {count}. {error}', messages.WARNING)
+
+    action.__name__ = f'set_status_{status}'
+    return admin.action(description=f'Перевести в статус «{label}»')(action)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """
+    Задачи в админке. Смена статуса проверяется той же таблицей переходов, что
+    и на сайте: в форме (TaskForm.clean_status), в пакетных действиях
+    (apply_status_changes) и при удалении (переход в DELETED).
+    """
+    form = TaskForm
+    list_display = ('name', 'status', 'parent', 'created_at', 'completed_at')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    list_select_related = ('parent',)
+    show_full_result_count = False
+    actions = [status_action(status, label) for status, label in Task.STATUS_CHOICES]
+
+    def get_actions(self, request):
+        # Массовое удаление обходит проверку подзадач у каждой задачи
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def has_delete_permission(self, request, obj=None) -> bool:
+        if not super().has_delete_permission(request, obj):
+            return False
+        if obj is None:
+            return True
+        context = Task.objects.transition_contexts([obj.pk]).get(obj.pk, NO_SUBTASKS)
+        return check_transition(obj.status, DELETED, context) is None
+
+
+@admin.register(Performer)
+class PerformerAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+
+
+@admin.register(TaskStatusEvent)
+class TaskStatusEventAdmin(admin.ModelAdmin):
+    """Журнал статусов только для чтения: записи в нём не меняются."""
+    list_display = ('task_id', 'from_status', 'to_status', 'created_at')
+    list_filter = ('to_status',)
+    show_full_result_count = False
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_delete_permission(self, request, obj=None) -> bool:
+        return False
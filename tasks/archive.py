@@ -0,0 +1,108 @@
+from datetime import timedelta
+from typing import List, Optional
+
+from django.db import models, transaction
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from .cache import invalidate_parent_choices
+from .events import EVENT_RESET, publish_on_commit
+from .models import PATH_STEP, Task, path_to_ids
+
+
+def subtrees_condition(paths: List[str]) -> models.Q:
+    """Условие "задача лежит в одном из поддеревьев" диапазонами по индексу пути."""
+    condition = models.Q()
+    for path in paths:
+        condition |= models.Q(path__gte=path, path__lt=path[:-1] + '0')
+    return condition
+
+
+def archive_candidates(older_than_days: int, limit: int = 0) -> List[int]:
+    """
+    Корневые задачи, которые можно убрать в архив: всё поддерево завершено и
+    последняя задача в нём завершена раньше, чем older_than_days дней назад.
+
+    Кандидаты отбираются по индексу (status, completed_at) среди завершённых
+    корней, затем их поддеревья проверяются группировкой по корню пачками.
+
+    Args:
+        older_than_days (int): Сколько дней поддерево должно быть завершено.
+        limit (int): Не больше стольких корней (0 — без ограничения).
+
+    Returns:
+        list: id корневых задач по возрастанию.
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    roots = list(
+        Task.objects.live()
+        .filter(parent__isnull=True, status='completed', completed_at__lt=cutoff)
+        .order_by('pk')
+        .values_list('pk', 'path')
+    )
+    result: List[int] = []
+    for start in range(0, len(roots), Task.BULK_BATCH_SIZE):
+        batch = dict(roots[start:start + Task.BULK_BATCH_SIZE])
+        rows = (
+            Task.objects.filter(subtrees_condition(list(batch.values())))
+            .annotate(root_path=Substr('path', 1, PATH_STEP))
+            .values('root_path')
+            .annotate(
+                open_tasks=models.Count('pk', filter=~models.Q(status='completed')),
+                last_completed=models.Max('completed_at'),
+            )
+            .values_list('root_path', 'open_tasks', 'last_completed')
+        )
+        ready = {
+            path_to_ids(root_path)[0] for root_path, open_tasks, last_completed in rows
+            if not open_tasks and last_completed is not None and last_completed < cutoff
+        }
+        result.extend(task_id for task_id in batch if task_id in ready)
+        if limit and len(result) >= limit:
+            return result[:limit]
+    return result
+
+
+def archive_trees(root_ids: List[int]) -> int:
+    """
+    Убирает поддеревья корней root_ids в архив: помечает все их задачи
+    временем архивации пачками UPDATE по индексу пути.
+
+    Returns:
+        int: Количество задач, убранных в архив.
+    """
+    return _set_archived_at(root_ids, timezone.now())
+
+
+def restore_tree(root_id: int) -> int:
+    """
+    Возвращает архивное поддерево в работу.
+
+    Returns:
+        int: Количество восстановленных задач.
+    """
+    return _set_archived_at([root_id], None)
+
+
+def _set_archived_at(root_ids: List[int], archived_at: Optional[timezone.datetime]) -> int:
+    """Помечает поддеревья корней root_ids (только корни в другом состоянии архивации)."""
+    changed = 0
+    with transaction.atomic():
+        paths: List[str] = []
+        for start in range(0, len(root_ids), Task.BULK_BATCH_SIZE):
+            paths.extend(
+                Task.objects.filter(pk__in=root_ids[start:start + Task.BULK_BATCH_SIZE], parent__isnull=True)
+                .filter(archived_at__isnull=archived_at is not None)
+                .values_list('path', flat=True)
+            )
+        for start in range(0, len(paths), Task.BULK_BATCH_SIZE):
+            changed += Task.objects.filter(
+                subtrees_condition(paths[start:start + Task.BULK_BATCH_SIZE])
+            ).update(archived_at=archived_at)
+        if changed:
+            # Поддеревья целиком появились в списке задач или пропали из него
+            Task.bump_tree_versions([path_to_ids(path)[0] for path in paths])
+            publish_on_commit(EVENT_RESET, {'archived' if archived_at else 'restored': changed})
+    if changed:
+        invalidate_parent_choices()
+    return changed
@@ -0,0 +1,28 @@
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Task
+
+PARENT_CHOICES_CACHE_KEY = 'tasks:parent-choices'
+
+
+def get_parent_choices() -> List[Tuple[int, str, str]]:
+    """
+    Возвращает (id, название, путь) всех рабочих (не архивных) задач для выбора родителя.
+
+    Список читается из кэша; при промахе загружаются только три нужные колонки.
+    Кэш сбрасывается invalidate_parent_choices при изменении задач, а таймаут
+    TASK_PARENT_CHOICES_TIMEOUT ограничивает устаревание в других процессах,
+    если кэш не общий (LocMemCache).
+    """
+    choices = cache.get(PARENT_CHOICES_CACHE_KEY)
+    if choices is None:
+        choices = list(Task.objects.live().order_by('path').values_list('id', 'name', 'path'))
+        cache.set(PARENT_CHOICES_CACHE_KEY, choices, settings.TASK_PARENT_CHOICES_TIMEOUT)
+    return choices
+
+
+def invalidate_parent_choices() -> None:
+    cache.delete(PARENT_CHOICES_CACHE_KEY)
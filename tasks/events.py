@@ -0,0 +1,137 @@
+import asyncio
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from django.db import transaction
+
+# Типы событий ленты изменений
+EVENT_CREATED = 'created'
+EVENT_UPDATED = 'updated'
+EVENT_DELETED = 'deleted'
+EVENT_STATUS = 'status'
+# Изменений слишком много (или они потеряны) — клиенту нужно перезагрузить список
+EVENT_RESET = 'reset'
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+class Subscription:
+    """
+    Очередь событий одного подключённого клиента.
+
+    Живёт в цикле событий (asyncio) обработчика запроса: ожидание новых событий
+    не занимает поток, поэтому один воркер держит много простаивающих клиентов.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_size: int) -> None:
+        self.loop = loop
+        self.queue: "asyncio.Queue[Optional[Event]]" = asyncio.Queue(maxsize=max_size)
+
+    def deliver(self, event: Event) -> None:
+        """Вызывается в цикле событий подписчика (через call_soon_threadsafe)."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Клиент не успевает читать: обрываем поток, при переподключении
+            # он получит пропущенное из буфера или событие reset
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[Event]:
+        return await self.queue.get()
+
+
+class ChangeFeed:
+    """
+    Лента изменений задач внутри процесса, без внешнего брокера.
+
+    Публиковать события можно из любого потока (обработчики сигналов работают
+    в синхронном коде), подписчики получают их в своих циклах событий.
+    Последние события хранятся в кольцевом буфере, чтобы переподключившийся
+    клиент (заголовок Last-Event-ID) получил то, что пропустил.
+
+    Лента общая только для потоков одного процесса: клиенты другого воркера
+    не узнают об изменениях, сделанных в этом.
+    """
+
+    def __init__(self, buffer_size: int = 1000, queue_size: int = 1000) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: Set[Subscription] = set()
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        Добавляет событие в буфер и рассылает его подписчикам.
+
+        Returns:
+            int: Порядковый номер события.
+        """
+        with self._lock:
+            event_id = next(self._ids)
+            event = (event_id, event_type, data)
+            self._last_id = event_id
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)  # Цикл событий подписчика уже закрыт
+        return event_id
+
+    def subscribe(self) -> Subscription:
+        """Подписывает текущий цикл событий на новые события."""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def replay(self, after: int) -> Optional[List[Event]]:
+        """
+        Возвращает события с номером больше after.
+
+        Returns:
+            list | None: События из буфера или None, если часть из них уже вытеснена
+            из буфера (или номер относится к прошлому запуску процесса) и нужна полная перезагрузка.
+        """
+        with self._lock:
+            if after > self._last_id:
+                return None
+            events = [event for event in self._buffer if event[0] > after]
+            oldest = self._buffer[0][0] if self._buffer else self._last_id + 1
+        if after + 1 < oldest and after < self._last_id:
+            return None
+        return events
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+feed = ChangeFeed()
+
+
+def publish_on_commit(event_type: str, data: Dict[str, Any]) -> None:
+    """Публикует событие после фиксации текущей транзакции (или сразу, вне транзакции)."""
+    transaction.on_commit(lambda: feed.publish(event_type, data))
+
+
+def format_event(event: Event) -> str:
+    """Форматирует событие для потока text/event-stream."""
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
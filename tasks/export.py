@@ -0,0 +1,74 @@
+import json
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+
+from .models import Task, TaskQuerySet
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    'id', 'parent_id', 'depth', 'name', 'description', 'performers', 'status',
+    'planned_effort', 'actual_effort', 'subtree_planned_effort', 'subtree_actual_effort',
+    'created_at', 'completed_at',
+)
+
+
+def iter_task_rows(queryset: Optional[TaskQuerySet] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Построчно выгружает задачи серверным курсором (QuerySet.iterator), не загружая таблицу в память.
+
+    Задачи идут в порядке материализованного пути, поэтому родитель всегда
+    выгружается раньше своих подзадач.
+
+    Args:
+        queryset (TaskQuerySet | None): Выгружаемые задачи (по умолчанию все).
+        chunk_size (int): Сколько строк забирать из курсора за раз.
+
+    Yields:
+        dict: Задача с id родителя, глубиной и суммарной трудоёмкостью поддерева.
+    """
+    if queryset is None:
+        queryset = Task.objects.all()
+    rows = queryset.order_by('path').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for values in rows:
+        row = dict(zip(EXPORT_FIELDS, values))
+        row['total_planned_effort'] = row['planned_effort'] + row.pop('subtree_planned_effort')
+        row['total_actual_effort'] = row['actual_effort'] + row.pop('subtree_actual_effort')
+        row['created_at'] = row['created_at'].isoformat()
+        row['completed_at'] = row['completed_at'].isoformat() if row['completed_at'] else None
+        yield row
+
+
+def iter_ndjson(queryset: Optional[TaskQuerySet] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Возвращает задачи в формате NDJSON: по одному JSON-объекту на строку.
+    """
+    for row in iter_task_rows(queryset, chunk_size):
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+async def aiter_ndjson(queryset: Optional[TaskQuerySet] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """
+    Асинхронный вариант iter_ndjson для ASGI.
+
+    Обычный итератор StreamingHttpResponse под ASGI в Django 4.2 вычитывается
+    целиком (sync_to_async(list)) до отправки первого байта. Здесь курсор
+    читается в пуле потоков порциями по chunk_size строк, и каждая порция
+    отправляется сразу, поэтому память не зависит от размера таблицы.
+
+    Yields:
+        str: Порция строк NDJSON.
+    """
+    lines = iter_ndjson(queryset, chunk_size)
+    read_chunk = sync_to_async(lambda: ''.join(islice(lines, chunk_size)))
+    try:
+        while True:
+            chunk = await read_chunk()
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        # Закрывает курсор, если клиент отключился раньше конца выгрузки
+        await sync_to_async(lines.close)()
@@ -1,5 +1,10 @@
 from django import forms
-from .models import Task
+from django.conf import settings
+from django.urls import reverse
+
+from .cache import get_parent_choices
+from .models import OpenSubtasks, Task, parse_performers
+from .transitions import COMPLETED, needs_subtasks, validate_transition
 
 class TaskForm(forms.ModelForm):
     class Meta:
@@ -15,10 +20,55 @@ class TaskForm(forms.ModelForm):
             'actual_effort': 'Фактическое время выполнения',
             'created_at': 'Дата и время создания',
         }
+        help_texts = {
+            'performers': 'Имена через запятую',
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['parent'].widget = forms.Select(
-            choices=[(None, 'Нет родительской задачи')] + [(task.id, task.name) for task in Task.objects.all()]
-        )
-        self.fields['created_at'].disabled = True
\ No newline at end of file
+        # Задачу нельзя сделать подзадачей её самой или её потомка
+        own_path = self.instance.path if self.instance.pk else ''
+        parent_field = self.fields['parent']
+        queryset = Task.objects.live().only('id', 'name')
+        if own_path:
+            queryset = queryset.exclude(pk__in=Task.objects.subtree(own_path).values('pk'))
+        parent_field.queryset = queryset
+
+        if settings.TASK_PARENT_AUTOCOMPLETE:
+            url = reverse('parent_autocomplete')
+            if self.instance.pk:
+                url += f'?exclude={self.instance.pk}'
+            parent_field.widget = forms.TextInput(attrs={
+                'list': 'parent-options',
+                'data-autocomplete-url': url,
+                'placeholder': 'Начните вводить название или id задачи',
+            })
+        else:
+            parent_field.widget = forms.Select(
+                choices=[(None, 'Нет родительской задачи')] + [
+                    (task_id, name) for task_id, name, path in get_parent_choices()
+                    if not (own_path and path.startswith(own_path))
+                ]
+            )
+        self.fields['created_at'].disabled = True
+
+    def clean_performers(self) -> str:
+        """Приводит список исполнителей к виду "Имя, Имя" без повторов и пустых имён."""
+        return ', '.join(parse_performers(self.cleaned_data['performers']))
+
+    def clean_status(self) -> str:
+        """
+        Проверяет смену статуса по таблице переходов (tasks.transitions), в том
+        числе каскадное завершение подзадач, чтобы ошибка показывалась в форме,
+        а не при сохранении.
+        """
+        status = self.cleaned_data['status']
+        task = self.instance
+        if not task.pk:
+            return status
+        old_status = Task.objects.filter(pk=task.pk).values_list('status', flat=True).first() or status
+        open_subtasks = OpenSubtasks.load([task.path]) if needs_subtasks(old_status, status) else OpenSubtasks()
+        validate_transition(old_status, status, open_subtasks.context(task.pk))
+        if status == COMPLETED:
+            open_subtasks.collect_for_completion(task.pk)
+        return status
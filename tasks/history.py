@@ -0,0 +1,202 @@
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .models import ChangeCounter, Task, TaskStatusEvent
+
+EVENTS_TABLE = TaskStatusEvent._meta.db_table
+HISTORY_CACHE_KEY = 'tasks:history'
+# Последнее событие каждой задачи не позже момента — то, за которым нет
+# следующего. Окно идёт в порядке индекса (task, created_at) и не требует
+# сортировки. Удалённые задачи отбрасываются после выбора последнего события,
+# иначе удалённая задача попала бы на доску со своим прежним статусом
+LATEST_EVENTS_SQL = f"""
+    SELECT task_id, to_status FROM (
+        SELECT task_id, to_status,
+               LEAD(id) OVER (PARTITION BY task_id ORDER BY created_at, id) AS next_id
+        FROM {EVENTS_TABLE} WHERE created_at <= %s
+    )
+    WHERE next_id IS NULL AND to_status != '{TaskStatusEvent.DELETED}'
+"""
+
+
+def _db_datetime(value: timezone.datetime, using: str = DEFAULT_DB_ALIAS) -> str:
+    """Время в том виде, в каком Django хранит его в SQLite (для сравнения в сыром SQL)."""
+    return connections[using].ops.adapt_datetimefield_value(value)
+
+
+def _status_display(status: str) -> str:
+    return dict(Task.STATUS_CHOICES).get(status, status)
+
+
+def time_in_status(
+    task_id: Optional[int] = None,
+    since: Optional[timezone.datetime] = None,
+    until: Optional[timezone.datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Время, проведённое задачами в каждом статусе, по журналу статусов.
+
+    Интервалы строятся в SQL: конец пребывания в статусе — время следующего
+    события той же задачи (LEAD по индексу (task, created_at)), у текущего
+    статуса — until. Интервалы обрезаются по периоду [since, until].
+
+    Args:
+        task_id (int | None): Только одна задача (по умолчанию все).
+        since (datetime | None): Начало периода (по умолчанию без ограничения).
+        until (datetime | None): Конец периода (по умолчанию текущее время).
+
+    Returns:
+        list: По строке на статус: число интервалов, суммарное, среднее и
+        максимальное время в часах.
+    """
+    until = _db_datetime(until or timezone.now())
+    # Пустая строка меньше любого времени: без since интервалы не обрезаются
+    since = _db_datetime(since) if since else ''
+    where, params = ['created_at <= %s'], [until]
+    if task_id is not None:
+        where.append('task_id = %s')
+        params.append(task_id)
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH spans AS (
+                SELECT to_status AS status, created_at AS started_at,
+                       LEAD(created_at) OVER (PARTITION BY task_id ORDER BY created_at, id) AS ended_at
+                FROM {EVENTS_TABLE} WHERE {' AND '.join(where)}
+            ),
+            durations AS (
+                SELECT status,
+                       (julianday(COALESCE(ended_at, %s)) - julianday(MAX(started_at, %s))) * 24 AS hours
+                FROM spans
+                WHERE status != %s AND (ended_at IS NULL OR ended_at > %s)
+            )
+            SELECT status, COUNT(*), SUM(hours), AVG(hours), MAX(hours)
+            FROM durations GROUP BY status ORDER BY status
+            """,
+            [*params, until, since, TaskStatusEvent.DELETED, since],
+        )
+        rows = cursor.fetchall()
+    return [
+        {
+            'status': status,
+            'status_display': _status_display(status),
+            'spans': spans,
+            'total_hours': round(total or 0.0, 2),
+            'avg_hours': round(average or 0.0, 2),
+            'max_hours': round(longest or 0.0, 2),
+        }
+        for status, spans, total, average, longest in rows
+    ]
+
+
+def cumulative_flow(since: date, until: date) -> List[Dict[str, Any]]:
+    """
+    Накопительная диаграмма: число задач в каждом статусе на конец каждого дня.
+
+    Каждое событие даёт +1 новому статусу и -1 прежнему; изменения суммируются
+    по дням и статусам, а нарастающий итог считает оконная функция SUM OVER.
+    Дни без событий получают значения предыдущего дня. Дни — по UTC.
+
+    Args:
+        since (date): Первый день диаграммы.
+        until (date): Последний день диаграммы.
+
+    Returns:
+        list: По строке на день: дата и число задач в каждом статусе.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH deltas AS (
+                SELECT MAX(date(created_at), %s) AS day, to_status AS status, 1 AS delta
+                FROM {EVENTS_TABLE} WHERE created_at < %s
+                UNION ALL
+                SELECT MAX(date(created_at), %s), from_status, -1
+                FROM {EVENTS_TABLE} WHERE created_at < %s AND from_status != ''
+            ),
+            daily AS (
+                SELECT day, status, SUM(delta) AS delta FROM deltas GROUP BY day, status
+            )
+            SELECT day, status, SUM(delta) OVER (PARTITION BY status ORDER BY day)
+            FROM daily
+            WHERE status != %s
+            ORDER BY day
+            """,
+            # События до since сворачиваются в первый день диаграммы
+            [since.isoformat(), (until + timedelta(days=1)).isoformat()] * 2 + [TaskStatusEvent.DELETED],
+        )
+        rows = cursor.fetchall()
+
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+    counts = dict.fromkeys(statuses, 0)
+    changes: Dict[str, Dict[str, int]] = {}
+    for day, status, total in rows:
+        changes.setdefault(day, {})[status] = total
+    flow = []
+    day = since
+    while day <= until:
+        counts.update(changes.get(day.isoformat(), {}))
+        flow.append({'day': day.isoformat(), **{status: counts.get(status, 0) for status in statuses}})
+        day += timedelta(days=1)
+    return flow
+
+
+def board_at(moment: timezone.datetime) -> List[Dict[str, Any]]:
+    """
+    Доска на момент времени: число задач в каждом статусе, восстановленное по
+    последнему событию каждой задачи не позже moment одним запросом.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"SELECT to_status, COUNT(*) FROM ({LATEST_EVENTS_SQL}) GROUP BY to_status ORDER BY to_status",
+            [_db_datetime(moment)],
+        )
+        rows = cursor.fetchall()
+    return [
+        {'status': status, 'status_display': _status_display(status), 'tasks': count}
+        for status, count in rows
+    ]
+
+
+def tasks_at(moment: timezone.datetime, status: str, after: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Задачи, бывшие в статусе status на момент moment, порцией по возрастанию id
+    (after — id последней полученной задачи). Названия — текущие.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT board.task_id, task.name FROM ({LATEST_EVENTS_SQL}) AS board
+            LEFT JOIN {Task._meta.db_table} AS task ON task.id = board.task_id
+            WHERE board.to_status = %s AND board.task_id > %s
+            ORDER BY board.task_id LIMIT %s
+            """,
+            [_db_datetime(moment), status, after, limit],
+        )
+        return [{'id': task_id, 'name': name} for task_id, name in cursor.fetchall()]
+
+
+def get_cached(builder: Callable[..., Any], *args: Any) -> Any:
+    """
+    Результат аналитической функции журнала, закэшированный по номеру изменения
+    таблицы задач: каждая смена статуса увеличивает номер, поэтому без записей
+    результат не меняется (кроме длины ещё открытых интервалов в time_in_status,
+    которые считаются до момента построения).
+
+    Args:
+        builder (callable): time_in_status, cumulative_flow, board_at или tasks_at.
+        *args: Аргументы функции (входят в ключ кэша).
+    """
+    version = ChangeCounter.get_value(Task.CHANGE_COUNTER)
+    params = ':'.join('' if arg is None else arg.isoformat() if hasattr(arg, 'isoformat') else str(arg) for arg in args)
+    key = f'{HISTORY_CACHE_KEY}:{builder.__name__}:{version}:{params}'
+    result = cache.get(key)
+    if result is None:
+        result = builder(*args)
+        cache.set(key, result, settings.TASK_REPORT_CACHE_TIMEOUT)
+    return result
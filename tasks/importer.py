@@ -0,0 +1,232 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_parent_choices
+from .events import EVENT_RESET, feed
+from .models import (
+    PATH_SEGMENT_WIDTH, PATH_SEPARATOR, Task, TaskImportMapping, TaskPerformer, TaskStatusEvent, parse_performers,
+    path_to_ids,
+)
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class ImportedTask:
+    external_id: str
+    parent_external_id: Optional[str]
+    fields: Dict[str, Any]
+    depth: int = 0
+    subtree_planned_effort: float = 0.0
+    subtree_actual_effort: float = 0.0
+    children: List["ImportedTask"] = field(default_factory=list)
+
+
+def read_rows(path: str, file_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Читает задачи из CSV (с заголовком) или NDJSON. Формат определяется по расширению файла,
+    если не указан явно. Колонки совпадают с выгрузкой export_tasks: id и parent_id —
+    внешние идентификаторы задачи и её родителя.
+    """
+    if file_format is None:
+        file_format = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def prepare_tasks(rows: Iterator[Dict[str, Any]]) -> List[ImportedTask]:
+    """
+    Проверяет строки и разрешает иерархию в памяти.
+
+    Returns:
+        list: Задачи, упорядоченные по глубине (родители раньше подзадач), с
+        рассчитанными суммами трудоёмкости поддеревьев.
+
+    Raises:
+        ValidationError: Со списком ошибок (не более MAX_REPORTED_ERRORS).
+    """
+    statuses = dict(Task.STATUS_CHOICES)
+    errors: List[str] = []
+    tasks: Dict[str, ImportedTask] = {}
+
+    for line_number, row in enumerate(rows, start=1):
+        external_id = str(row.get('id') or '').strip()
+        parent_external_id = str(row.get('parent_id') or '').strip() or None
+        status = row.get('status') or 'assigned'
+        try:
+            if not external_id:
+                raise ValueError('не указан id')
+            if external_id in tasks:
+                raise ValueError(f'повторяющийся id {external_id}')
+            if not row.get('name'):
+                raise ValueError('не указано название')
+            if status not in statuses:
+                raise ValueError(f'неизвестный статус {status!r}')
+            fields = {
+                'name': row['name'],
+                'description': row.get('description') or '',
+                'performers': row.get('performers') or '',
+                'status': status,
+                'planned_effort': float(row.get('planned_effort') or 0),
+                'actual_effort': float(row.get('actual_effort') or 0),
+                'created_at': _parse_datetime(row.get('created_at')) or timezone.now(),
+                'completed_at': _parse_datetime(row.get('completed_at')),
+            }
+        except (TypeError, ValueError) as error:
+            errors.append(f'Строка {line_number}: {error}')
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+            continue
+        if status == 'completed' and fields['completed_at'] is None:
+            fields['completed_at'] = fields['created_at']
+        tasks[external_id] = ImportedTask(external_id, parent_external_id, fields)
+
+    for task in tasks.values():
+        if task.parent_external_id is None:
+            continue
+        parent = tasks.get(task.parent_external_id)
+        if parent is None:
+            errors.append(f'Задача {task.external_id}: родитель {task.parent_external_id} не найден в файле')
+        else:
+            parent.children.append(task)
+    if errors:
+        raise ValidationError(errors[:MAX_REPORTED_ERRORS])
+
+    # Обход в ширину от корней задаёт глубину и порядок вставки;
+    # задачи, до которых он не дошёл, образуют цикл
+    ordered = [task for task in tasks.values() if task.parent_external_id is None]
+    for task in ordered:
+        for child in task.children:
+            child.depth = task.depth + 1
+            ordered.append(child)
+    if len(ordered) != len(tasks):
+        raise ValidationError('Иерархия задач в файле содержит цикл.')
+
+    for task in reversed(ordered):
+        for child in task.children:
+            task.subtree_planned_effort += child.fields['planned_effort'] + child.subtree_planned_effort
+            task.subtree_actual_effort += child.fields['actual_effort'] + child.subtree_actual_effort
+    return ordered
+
+
+def import_tasks(
+    tasks: List[ImportedTask],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    checkpoint: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Вставляет задачи пачками bulk_create уровень за уровнем, чтобы id родителей
+    были известны до вставки подзадач. Каждая пачка — отдельная транзакция.
+
+    С checkpoint (имя импорта) соответствие внешних id и id в базе пишется в
+    таблицу TaskImportMapping в той же транзакции, что и пачка, и повторный
+    запуск с тем же именем пропускает уже импортированные задачи.
+
+    Returns:
+        int: Количество вставленных задач.
+    """
+    id_map = _load_checkpoint(checkpoint)
+    parent_path = models.Subquery(Task.objects.filter(pk=models.OuterRef('parent_id')).values('path')[:1])
+    path = Concat(
+        Coalesce(parent_path, models.Value('')),
+        LPad(Cast('id', models.CharField()), PATH_SEGMENT_WIDTH, models.Value('0')),
+        models.Value(PATH_SEPARATOR),
+    )
+
+    imported = 0
+    for depth, level in groupby(tasks, key=lambda task: task.depth):
+        pending = [task for task in level if task.external_id not in id_map]
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            objects = [
+                Task(
+                    parent_id=id_map.get(task.parent_external_id),
+                    depth=depth,
+                    subtree_planned_effort=task.subtree_planned_effort,
+                    subtree_actual_effort=task.subtree_actual_effort,
+                    **task.fields,
+                )
+                for task in batch
+            ]
+            with transaction.atomic():
+                Task.objects.bulk_create(objects)
+                created_ids = [task.pk for task in objects]
+                for offset in range(0, len(created_ids), Task.BULK_BATCH_SIZE):
+                    Task.objects.filter(pk__in=created_ids[offset:offset + Task.BULK_BATCH_SIZE]).update(path=path)
+                performers_by_task = {
+                    created.pk: parse_performers(created.performers) for created in objects if created.performers
+                }
+                if performers_by_task:
+                    TaskPerformer.link(performers_by_task, replace=False)
+                # История статусов начинается с импортированного статуса на момент создания
+                TaskStatusEvent.objects.bulk_create(
+                    [
+                        TaskStatusEvent(task_id=created.pk, to_status=created.status, created_at=created.created_at)
+                        for created in objects
+                    ],
+                    batch_size=Task.BULK_BATCH_SIZE,
+                )
+                # У родителей появились подзадачи: их фрагменты в кэше списка задач устарели
+                parent_ids = sorted({task.parent_id for task in objects if task.parent_id})
+                ancestor_ids = []
+                for offset in range(0, len(parent_ids), Task.BULK_BATCH_SIZE):
+                    parent_paths = Task.objects.filter(
+                        pk__in=parent_ids[offset:offset + Task.BULK_BATCH_SIZE]
+                    ).values_list('path', flat=True)
+                    for parent_path in parent_paths:
+                        ancestor_ids.extend(path_to_ids(parent_path))
+                Task.bump_tree_versions(ancestor_ids)
+
+                batch_ids = {task.external_id: created.pk for task, created in zip(batch, objects)}
+                if checkpoint:
+                    TaskImportMapping.objects.bulk_create(
+                        [
+                            TaskImportMapping(source=checkpoint, external_id=external_id, task_id=task_id)
+                            for external_id, task_id in batch_ids.items()
+                        ],
+                        batch_size=Task.BULK_BATCH_SIZE,
+                    )
+            id_map.update(batch_ids)
+            imported += len(batch)
+            if progress:
+                progress(imported)
+    if imported:
+        invalidate_parent_choices()
+        # Событие на каждую задачу переполнило бы очереди клиентов
+        feed.publish(EVENT_RESET, {'imported': imported})
+    return imported
+
+
+def _parse_datetime(value: Any) -> Optional[timezone.datetime]:
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'некорректная дата {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _load_checkpoint(checkpoint: Optional[str]) -> Dict[str, int]:
+    if not checkpoint:
+        return {}
+    return dict(
+        TaskImportMapping.objects.filter(source=checkpoint).values_list('external_id', 'task_id').iterator()
+    )
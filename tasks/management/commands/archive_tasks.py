@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.archive import archive_candidates, archive_trees
+
+
+class Command(BaseCommand):
+    help = (
+        'Убирает в архив корневые задачи, поддерево которых полностью завершено '
+        'раньше заданного числа дней назад (по умолчанию settings.TASK_ARCHIVE_AFTER_DAYS). '
+        'Архивные задачи не попадают в список задач и выбор родителя; их можно '
+        'посмотреть и восстановить на странице /tasks/archive/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Сколько дней поддерево должно быть завершено.')
+        parser.add_argument('--limit', type=int, default=0, help='Не больше стольких поддеревьев за запуск.')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать, сколько поддеревьев подходит.')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.TASK_ARCHIVE_AFTER_DAYS
+        if days is None or days < 0:
+            raise CommandError('Не задан срок: передайте --days или задайте TASK_ARCHIVE_AFTER_DAYS.')
+        # Отбор и архивация в одной транзакции: с BEGIN IMMEDIATE никто не
+        # изменит поддеревья между проверкой и пометкой
+        with transaction.atomic():
+            root_ids = archive_candidates(days, options['limit'])
+            if options['dry_run']:
+                self.stdout.write(f'Подходит поддеревьев: {len(root_ids)}')
+                return
+            archived = archive_trees(root_ids)
+        self.stdout.write(self.style.SUCCESS(f'В архив убрано поддеревьев: {len(root_ids)}, задач: {archived}'))
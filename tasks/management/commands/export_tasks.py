@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tasks.export import EXPORT_CHUNK_SIZE, iter_ndjson
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все задачи в формате NDJSON (по одной задаче на строку).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='Файл для выгрузки (по умолчанию стандартный вывод).')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Размер порции курсора.')
+
+    def handle(self, *args, **options):
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                count = self.write(output, options['chunk_size'])
+            self.stderr.write(f'Выгружено задач: {count}')
+        else:
+            self.write(self.stdout, options['chunk_size'])
+
+    @staticmethod
+    def write(output, chunk_size: int) -> int:
+        count = 0
+        for line in iter_ndjson(chunk_size=chunk_size):
+            output.write(line)
+            count += 1
+        return count
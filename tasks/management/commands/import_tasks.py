@@ -0,0 +1,43 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import IMPORT_BATCH_SIZE, import_tasks, prepare_tasks, read_rows
+from tasks.models import TaskImportMapping
+
+
+class Command(BaseCommand):
+    help = 'Массово импортирует задачи с иерархией из CSV или NDJSON (формат export_tasks).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с задачами.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Формат файла (по умолчанию по расширению).')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Размер пачки bulk_create.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя импорта: при повторном запуске с тем же именем уже импортированные задачи пропускаются.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint_length = TaskImportMapping._meta.get_field('source').max_length
+        if options['checkpoint'] and len(options['checkpoint']) > checkpoint_length:
+            raise CommandError(f'Имя импорта длиннее {checkpoint_length} символов.')
+        started = time.perf_counter()
+        try:
+            tasks = prepare_tasks(read_rows(options['path'], options['format']))
+        except ValidationError as error:
+            raise CommandError('Файл не прошёл проверку:\n' + '\n'.join(error.messages))
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать файл: {error}')
+
+        def progress(imported: int) -> None:
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Импортировано {imported} из {len(tasks)}')
+
+        imported = import_tasks(tasks, options['batch_size'], options['checkpoint'], progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано задач: {imported} (пропущено ранее импортированных: {len(tasks) - imported}) '
+            f'за {elapsed:.2f} с, {imported / elapsed if elapsed else 0:.0f} строк/с'
+        ))
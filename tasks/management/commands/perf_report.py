@@ -0,0 +1,92 @@
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит сводку по журналу метрик запросов (settings.TASK_METRICS_LOG): '
+        'самые медленные представления и самые часто повторяющиеся SQL-запросы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='Журнал JSONL (по умолчанию settings.TASK_METRICS_LOG).')
+        parser.add_argument('--top', type=int, default=10, help='Размер каждого списка.')
+        parser.add_argument('--no-rotated', action='store_true', help='Не читать ротированные файлы (.1, .2, ...).')
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.TASK_METRICS_LOG
+        if not path:
+            raise CommandError('Не указан журнал: передайте путь или задайте TASK_METRICS_LOG.')
+        files = self.log_files(str(path), not options['no_rotated'])
+        if not files:
+            raise CommandError(f'Журнал {path} не найден.')
+
+        views: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        repeated: Dict[str, Dict[str, Any]] = {}
+        for entry in self.read(files):
+            view = entry.get('view') or entry.get('path')
+            views[view].append(entry)
+            for duplicate in entry.get('duplicates', []):
+                stats = repeated.setdefault(duplicate['sql'], {'count': 0, 'requests': 0, 'views': set()})
+                stats['count'] += duplicate['count']
+                stats['requests'] += 1
+                stats['views'].add(view)
+
+        top = options['top']
+        self.stdout.write(f'Запросов в журнале: {sum(len(entries) for entries in views.values())}\n')
+        self.stdout.write('Самые медленные представления (по p95):')
+        self.stdout.write(f"{'представление':<32} {'запросов':>9} {'p50 мс':>9} {'p95 мс':>9} {'макс мс':>9} "
+                          f"{'SQL ср.':>8} {'БД ср. мс':>10} {'шаблон ср. мс':>14}")
+        rows = []
+        for view, entries in views.items():
+            durations = sorted(entry['duration_ms'] for entry in entries)
+            rows.append((
+                self.percentile(durations, 0.95), view, len(entries), self.percentile(durations, 0.5), durations[-1],
+                self.mean(entries, 'queries'), self.mean(entries, 'db_ms'), self.mean(entries, 'template_ms'),
+            ))
+        for p95, view, count, p50, slowest, queries, db_ms, template_ms in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"{view:<32} {count:>9} {p50:>9.1f} {p95:>9.1f} {slowest:>9.1f} "
+                              f"{queries:>8.1f} {db_ms:>10.1f} {template_ms:>14.1f}")
+
+        self.stdout.write('\nПовторяющиеся в пределах одного запроса SQL (возможные N+1):')
+        if not repeated:
+            self.stdout.write('  нет')
+        ordered = sorted(repeated.items(), key=lambda item: item[1]['count'], reverse=True)
+        for sql, stats in ordered[:top]:
+            self.stdout.write(
+                f"  {stats['count']} раз в {stats['requests']} запросах "
+                f"({', '.join(sorted(stats['views']))}):\n    {sql[:300]}"
+            )
+
+    @staticmethod
+    def log_files(path: str, rotated: bool) -> List[str]:
+        """Журнал и его ротированные части от старых к новым."""
+        files = [path] if os.path.exists(path) else []
+        index = 1
+        while rotated and os.path.exists(f'{path}.{index}'):
+            files.insert(0, f'{path}.{index}')
+            index += 1
+        return files
+
+    @staticmethod
+    def read(files: List[str]) -> Iterator[Dict[str, Any]]:
+        for name in files:
+            with open(name, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # Строка могла не дописаться при ротации или сбое
+
+    @staticmethod
+    def percentile(values: List[float], fraction: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    @staticmethod
+    def mean(entries: List[Dict[str, Any]], key: str) -> float:
+        return sum(entry.get(key, 0) for entry in entries) / len(entries)
@@ -0,0 +1,52 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.models import Task, path_to_ids
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает суммарную трудоёмкость поддеревьев и сверяет её с сохранёнными значениями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить агрегаты, ничего не записывая (код возврата 1 при расхождениях).',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пачки для bulk_update.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totals = Task.objects.subtree_effort_totals()
+            stored = Task.objects.values_list('id', 'subtree_planned_effort', 'subtree_actual_effort', 'path')
+
+            mismatched = []
+            touched = []
+            for task_id, planned_effort, actual_effort, path in stored.iterator(chunk_size=options['batch_size']):
+                expected_planned, expected_actual = totals[task_id]
+                if not (self.is_close(planned_effort, expected_planned)
+                        and self.is_close(actual_effort, expected_actual)):
+                    mismatched.append(Task(
+                        pk=task_id,
+                        subtree_planned_effort=expected_planned,
+                        subtree_actual_effort=expected_actual,
+                    ))
+                    touched.extend(path_to_ids(path))
+
+            self.stdout.write(f'Проверено задач: {len(totals)}, расхождений: {len(mismatched)}')
+            if options['check']:
+                if mismatched:
+                    raise CommandError(
+                        'Агрегаты не совпадают с полным пересчётом для задач: '
+                        + ', '.join(str(task.pk) for task in mismatched[:20])
+                    )
+                return
+
+            Task.objects.bulk_update(mismatched, Task.ROLLUP_FIELDS, batch_size=options['batch_size'])
+            Task.bump_tree_versions(touched)
+            self.stdout.write(self.style.SUCCESS(f'Обновлено задач: {len(mismatched)}'))
+
+    @staticmethod
+    def is_close(stored: float, expected: float) -> bool:
+        return math.isclose(stored, expected, rel_tol=1e-9, abs_tol=1e-6)
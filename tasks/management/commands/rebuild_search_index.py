@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tasks.search import ensure_search_triggers, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс задач (название, описание, исполнители) и его триггеры.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-optimize', action='store_true', help='Не сливать сегменты индекса после перестроения.')
+
+    def handle(self, *args, **options):
+        if ensure_search_triggers():
+            self.stdout.write('Восстановлены отсутствовавшие триггеры индекса.')
+        rebuild_search_index(optimize=not options['no_optimize'])
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tasks.reports import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает сохранённую сводку по задачам (для отчёта на больших таблицах '
+        'при заданном TASK_REPORT_SNAPSHOT_MAX_AGE); запускается периодически, например из cron.'
+    )
+
+    def handle(self, *args, **options):
+        snapshot = refresh_snapshot()
+        self.stdout.write(self.style.SUCCESS(f'Сводка построена по изменению {snapshot.version}'))
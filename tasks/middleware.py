@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('tasks.metrics')
+
+# Метрики текущего запроса; переменная контекста передаётся и в потоки
+# sync_to_async, поэтому запросы к базе асинхронных представлений тоже учитываются
+current_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar('current_metrics', default=None)
+
+# Списки параметров IN (%s, %s, ...) разной длины дают один отпечаток
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+# Сколько повторяющихся запросов одного запроса попадает в журнал
+MAX_LOGGED_DUPLICATES = 10
+
+
+def fingerprint(sql: str) -> str:
+    """Нормализует SQL: параметры уже вынесены Django, схлопываются только списки IN."""
+    return IN_LIST_RE.sub('(%s, ...)', sql)
+
+
+class RequestMetrics:
+    """Счётчики одного HTTP-запроса: SQL-запросы, время базы и отрисовки шаблона."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.statements: Counter = Counter()
+
+    def add_query(self, sql: str, duration: float) -> None:
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql] += 1
+
+    def duplicates(self) -> List[Dict[str, Any]]:
+        """Отпечатки запросов, выполненных больше одного раза (признак N+1)."""
+        counts: Counter = Counter()
+        for sql, count in self.statements.items():
+            counts[fingerprint(sql)] += count
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in counts.most_common() if count > 1
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL (connection.execute_wrapper) для всех соединений.
+
+    Вне запроса с метриками только вызывает execute, поэтому её можно не снимать.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+class RequestMetricsMiddleware:
+    """
+    Собирает метрики каждого запроса: число SQL-запросов, время базы, время
+    отрисовки шаблона и повторяющиеся запросы.
+
+    Метрики отдаются в заголовке Server-Timing (settings.TASK_METRICS_SERVER_TIMING)
+    и, если задан settings.TASK_METRICS_LOG, пишутся строкой JSON в журнал с
+    ротацией; сводку по журналу строит команда perf_report. Запросы к базе
+    учитывает record_query, которая подключается к каждому новому соединению.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.server_timing = settings.TASK_METRICS_SERVER_TIMING
+        self.log_path = settings.TASK_METRICS_LOG
+        if self.log_path:
+            configure_log(str(self.log_path))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        """Засекает отрисовку TemplateResponse, которая выполняется сразу после этого хука."""
+        metrics = current_metrics.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.template_time += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics: RequestMetrics):
+        total = time.perf_counter() - metrics.started
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'tpl;dur={metrics.template_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        if self.log_path:
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'time': timezone.now().isoformat(),
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'duration_ms': round(total * 1000, 2),
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'template_ms': round(metrics.template_time * 1000, 2),
+                'duplicates': metrics.duplicates()[:MAX_LOGGED_DUPLICATES],
+            }, ensure_ascii=False))
+        return response
+
+
+def configure_log(path: str) -> None:
+    """Подключает к логгеру tasks.metrics файл с ротацией (один раз на путь)."""
+    for handler in logger.handlers:
+        if isinstance(handler, RotatingFileHandler) and handler.baseFilename == os.path.abspath(path):
+            return
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.TASK_METRICS_LOG_MAX_BYTES,
+        backupCount=settings.TASK_METRICS_LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True,
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+def fill_subtree_efforts(apps, schema_editor):
+    """Заполняет агрегаты поддеревьев для уже существующих задач."""
+    Task = apps.get_model('tasks', 'Task')
+    rows = list(Task.objects.values_list('id', 'parent_id', 'planned_effort', 'actual_effort'))
+    parents = {task_id: parent_id for task_id, parent_id, _, _ in rows}
+    totals = {task_id: [0.0, 0.0] for task_id in parents}
+    for task_id, parent_id, planned_effort, actual_effort in rows:
+        seen = set()
+        while parent_id is not None and parent_id in totals and parent_id not in seen:
+            seen.add(parent_id)
+            totals[parent_id][0] += planned_effort
+            totals[parent_id][1] += actual_effort
+            parent_id = parents[parent_id]
+    tasks = [
+        Task(pk=task_id, subtree_planned_effort=planned, subtree_actual_effort=actual)
+        for task_id, (planned, actual) in totals.items()
+    ]
+    Task.objects.bulk_update(tasks, ['subtree_planned_effort', 'subtree_actual_effort'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='subtree_actual_effort',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtree_planned_effort',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunPython(fill_subtree_efforts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """Строит материализованные пути для уже существующих задач обходом в ширину."""
+    Task = apps.get_model('tasks', 'Task')
+    children = {}
+    for task_id, parent_id in Task.objects.values_list('id', 'parent_id'):
+        children.setdefault(parent_id, []).append(task_id)
+
+    tasks = []
+    level = [(task_id, '') for task_id in children.get(None, [])]
+    depth = 0
+    while level:
+        next_level = []
+        for task_id, parent_path in level:
+            path = f"{parent_path}{task_id:010d}/"
+            tasks.append(Task(pk=task_id, path=path, depth=depth))
+            next_level.extend((child_id, path) for child_id in children.get(task_id, []))
+        level = next_level
+        depth += 1
+    Task.objects.bulk_update(tasks, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_subtree_efforts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1100),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
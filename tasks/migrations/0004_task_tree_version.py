@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='tree_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+def create_tasks_counter(apps, schema_editor):
+    ChangeCounter = apps.get_model('tasks', 'ChangeCounter')
+    ChangeCounter.objects.get_or_create(name='tasks')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_tree_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_tasks_counter, migrations.RunPython.noop),
+    ]
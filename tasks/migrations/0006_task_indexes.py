@@ -0,0 +1,25 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_changecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['parent', 'status'], name='task_parent_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at'], name='task_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:06
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('data', models.JSONField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def parse_performers(value):
+    names = []
+    for name in value.split(','):
+        name = ' '.join(name.split())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def link_performers(apps, schema_editor):
+    """Разбирает строки исполнителей существующих задач в исполнителей и связи с задачами."""
+    Task = apps.get_model('tasks', 'Task')
+    Performer = apps.get_model('tasks', 'Performer')
+    TaskPerformer = apps.get_model('tasks', 'TaskPerformer')
+
+    performers_by_task = {
+        task_id: parse_performers(performers)
+        for task_id, performers in Task.objects.exclude(performers='').values_list('id', 'performers').iterator()
+    }
+    names = sorted({name for names in performers_by_task.values() for name in names})
+    Performer.objects.bulk_create([Performer(name=name) for name in names], batch_size=BATCH_SIZE)
+    ids = dict(Performer.objects.values_list('name', 'id'))
+    TaskPerformer.objects.bulk_create(
+        [
+            TaskPerformer(task_id=task_id, performer_id=ids[name])
+            for task_id, task_names in performers_by_task.items() for name in task_names
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskreportsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Performer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskPerformer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('performer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_links', to='tasks.performer')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performer_links', to='tasks.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='assignees',
+            field=models.ManyToManyField(blank=True, related_name='tasks', through='tasks.TaskPerformer', to='tasks.performer'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskperformer',
+            constraint=models.UniqueConstraint(fields=('performer', 'task'), name='task_performer_unique'),
+        ),
+        migrations.RunPython(link_performers, migrations.RunPython.noop),
+    ]
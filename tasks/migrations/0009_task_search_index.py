@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# Внешнее содержимое (content=tasks_task): индекс хранит только токены, а
+# текст берёт из самой таблицы задач. Триггеры поддерживают индекс при любой
+# записи, включая bulk_create и QuerySet.update/delete, которые минуют сигналы.
+# Индексы префиксов из 2 и 3 символов ускоряют поиск по первым буквам слова.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        name, description, performers,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, name, description, performers)
+        VALUES (new.id, new.name, new.description, new.performers);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, name, description, performers)
+        VALUES ('delete', old.id, old.name, old.description, old.performers);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_update AFTER UPDATE OF name, description, performers ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, name, description, performers)
+        VALUES ('delete', old.id, old.name, old.description, old.performers);
+        INSERT INTO tasks_task_fts(rowid, name, description, performers)
+        VALUES (new.id, new.name, new.description, new.performers);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS tasks_task_fts_update',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_delete',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_insert',
+    'DROP TABLE IF EXISTS tasks_task_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_performer'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Журнал начинается с текущего статуса каждой задачи на момент её создания:
+# прежняя история статусов нигде не сохранялась
+SEED_SQL = """
+    INSERT INTO tasks_taskstatusevent (task_id, from_status, to_status, created_at)
+    SELECT id, '', status, created_at FROM tasks_task ORDER BY id
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('task', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_events', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task', 'created_at'], name='status_event_task_idx'), models.Index(fields=['created_at'], name='status_event_time_idx')],
+            },
+        ),
+        migrations.RunSQL(SEED_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_taskstatusevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['path'], name='task_live_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', True)), fields=['parent'], name='task_live_parent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('archived_at__isnull', False)), fields=['parent', 'archived_at'], name='task_archived_idx'),
+        ),
+    ]
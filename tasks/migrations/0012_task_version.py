@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_archived_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.14 on 2026-10-18 21:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_task_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskImportMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('external_id', models.CharField(max_length=255)),
+                ('task', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tasks.task')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskimportmapping',
+            constraint=models.UniqueConstraint(fields=('source', 'external_id'), name='task_import_mapping_unique'),
+        ),
+    ]
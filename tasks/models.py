@@ -1,9 +1,356 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.forms import ValidationError
 from django.utils import timezone
 from django.db import transaction
 
+from .events import EVENT_STATUS, publish_on_commit
+from .transitions import (
+    COMPLETED, DELETED, TransitionContext, check_transition, needs_subtasks, validate_transition,
+)
+
+# Материализованный путь: id всех предков и самой задачи, каждый сегмент
+# дополнен нулями до фиксированной ширины и завершён разделителем, например
+# "0000000001/0000000007/". Сортировка по пути даёт обход дерева в глубину.
+PATH_SEGMENT_WIDTH = 10
+PATH_SEPARATOR = '/'
+PATH_STEP = PATH_SEGMENT_WIDTH + len(PATH_SEPARATOR)
+
+
+def path_segment(task_id: int) -> str:
+    return f"{task_id:0{PATH_SEGMENT_WIDTH}d}{PATH_SEPARATOR}"
+
+
+def path_to_ids(path: str) -> List[int]:
+    return [int(segment) for segment in path.split(PATH_SEPARATOR) if segment]
+
+
+def parse_performers(value: str) -> List[str]:
+    """
+    Разбирает строку исполнителей через запятую.
+
+    Returns:
+        list: Имена без лишних пробелов, пустых значений и повторов, в исходном порядке.
+    """
+    names: List[str] = []
+    for name in value.split(','):
+        name = ' '.join(name.split())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class TaskStateChanged(Exception):
+    """Строка задачи изменилась в базе после загрузки задачи в память."""
+
+
+class TaskVersionConflict(ValidationError):
+    """Задача изменена после того, как клиент получил её версию (см. Task.save)."""
+
+    def __init__(self, expected_version: int, current_version: int):
+        super().__init__(f"Ожидалась версия {expected_version}, в базе {current_version}.")
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+class OpenSubtasks:
+    """
+    Незавершённые задачи одного или нескольких поддеревьев, загруженные
+    одним индексным запросом, со статусами, которые можно менять в памяти.
+    """
+
+    def __init__(self) -> None:
+        self.children: Dict[int, List[int]] = {}
+        self.statuses: Dict[int, str] = {}
+        # Версии задач на момент загрузки (для событий о каскадном завершении)
+        self.versions: Dict[int, int] = {}
+        # Статусы каскадно завершённых задач до завершения (для журнала статусов)
+        self.completed_from: Dict[int, str] = {}
+
+    @classmethod
+    def load(cls, paths: List[str]) -> "OpenSubtasks":
+        """
+        Args:
+            paths (list): Пути корней поддеревьев (сами корни в выборку не входят).
+        """
+        open_subtasks = cls()
+        if not paths:
+            return open_subtasks
+        condition = models.Q()
+        for path in paths:
+            condition |= models.Q(path__gt=path, path__lt=path[:-1] + '0')
+        rows = (
+            Task.objects.filter(condition)
+            .exclude(status='completed')
+            .order_by('path')
+            .values_list('id', 'parent_id', 'status', 'version')
+        )
+        for task_id, parent_id, status, version in rows:
+            open_subtasks.children.setdefault(parent_id, []).append(task_id)
+            open_subtasks.statuses[task_id] = status
+            open_subtasks.versions[task_id] = version
+        return open_subtasks
+
+    def add_completed_children(self, task_ids: List[int]) -> None:
+        """
+        Дополняет выборку завершёнными прямыми подзадачами task_ids (по индексу
+        (parent, status)): пачка смен статусов может вернуть такую подзадачу в
+        работу раньше, чем завершает родителя.
+        """
+        for start in range(0, len(task_ids), Task.BULK_BATCH_SIZE):
+            rows = (
+                Task.objects.filter(parent_id__in=task_ids[start:start + Task.BULK_BATCH_SIZE], status=COMPLETED)
+                .order_by('path')
+                .values_list('id', 'parent_id', 'version')
+            )
+            for task_id, parent_id, version in rows:
+                self.children.setdefault(parent_id, []).append(task_id)
+                self.statuses[task_id] = COMPLETED
+                self.versions[task_id] = version
+
+    def open_children(self, task_id: int) -> List[int]:
+        return [child_id for child_id in self.children.get(task_id, []) if self.statuses[child_id] != 'completed']
+
+    def child_statuses(self, task_id: int) -> List[str]:
+        return [self.statuses[child_id] for child_id in self.open_children(task_id)]
+
+    def context(self, task_id: int) -> TransitionContext:
+        """
+        Состояние подзадач для проверки перехода (см. tasks.transitions).
+        Завершённые подзадачи не загружаются, поэтому has_subtasks не заполняется:
+        контекст годится для проверок завершения, но не удаления.
+        """
+        return TransitionContext(tuple(self.child_statuses(task_id)))
+
+    def collect_for_completion(self, task_id: int) -> List[int]:
+        """
+        Проверяет, что все незавершённые подзадачи task_id можно каскадно завершить.
+
+        Правила проверяются в том же порядке, в каком их проверял бы поштучный
+        save() каждой подзадачи. Завершённые подзадачи и их потомки не затрагиваются.
+
+        Args:
+            task_id (int): Завершаемая задача.
+
+        Returns:
+            list: Идентификаторы подзадач, которые нужно завершить (в памяти они уже помечены завершёнными).
+
+        Raises:
+            ValidationError: Если хотя бы одну подзадачу нельзя завершить.
+        """
+        to_complete = []
+        stack = [iter(self.open_children(task_id))]
+        while stack:
+            child_id = next(stack[-1], None)
+            if child_id is None:
+                stack.pop()
+                continue
+            validate_transition(self.statuses[child_id], COMPLETED, self.context(child_id))
+            to_complete.append(child_id)
+            stack.append(iter(self.open_children(child_id)))
+        for child_id in to_complete:
+            self.completed_from[child_id] = self.statuses[child_id]
+            self.statuses[child_id] = 'completed'
+        return to_complete
+
+
+class TaskQuerySet(models.QuerySet):
+    def live(self) -> "TaskQuerySet":
+        """Рабочие задачи (не в архиве); условие совпадает с частичными индексами Task."""
+        return self.filter(archived_at__isnull=True)
+
+    def archived(self) -> "TaskQuerySet":
+        return self.filter(archived_at__isnull=False)
+
+    def subtree(self, path: str, include_root: bool = True) -> "TaskQuerySet":
+        """
+        Возвращает задачи поддерева с корнем по пути path.
+
+        Фильтр записан диапазоном, а не LIKE, чтобы SQLite использовал индекс:
+        все пути поддерева начинаются с path и меньше path с заменой последнего
+        разделителя "/" на следующий за ним символ "0".
+
+        Args:
+            path (str): Материализованный путь корня поддерева.
+            include_root (bool): Включать ли в выборку сам корень.
+        """
+        lower_bound = 'path__gte' if include_root else 'path__gt'
+        return self.filter(**{lower_bound: path, 'path__lt': path[:-1] + '0'})
+
+    def as_tree(self) -> List["Task"]:
+        """
+        Загружает задачи одним запросом и собирает из них дерево в памяти.
+
+        Каждой задаче проставляется список дочерних задач ``children``,
+        поэтому шаблоны и расчёт трудоёмкости не делают запросов на узел.
+
+        Returns:
+            list: Корневые задачи (у которых нет родителя в выборке).
+        """
+        tasks = list(self)
+        tasks_by_id = {task.pk: task for task in tasks}
+        roots = []
+        for task in tasks:
+            task.children = []
+        for task in tasks:
+            parent = tasks_by_id.get(task.parent_id)
+            if parent is None:
+                roots.append(task)
+            else:
+                task.parent = parent  # Кэшируем родителя, чтобы task.parent не делал запрос
+                parent.children.append(task)
+        return roots
+
+    def with_children_count(self) -> "TaskQuerySet":
+        """
+        Добавляет число прямых подзадач коррелированным подзапросом: он считается
+        по индексу parent_id только для выбранных строк, без GROUP BY по всей таблице.
+        """
+        children_count = (
+            self.model.objects.filter(parent=models.OuterRef('pk'))
+            .order_by()
+            .values('parent')
+            .annotate(count=models.Count('pk'))
+            .values('count')
+        )
+        return self.annotate(children_count=Coalesce(models.Subquery(children_count), 0))
+
+    def transition_contexts(self, task_ids: Iterable[int]) -> Dict[int, TransitionContext]:
+        """
+        Загружает состояние прямых подзадач для проверки переходов (см.
+        tasks.transitions.check_transitions) группировкой по индексу
+        (parent, status): по строке на пару (задача, статус подзадач).
+
+        Returns:
+            dict: id задачи -> TransitionContext (для задач без подзадач записи нет).
+        """
+        task_ids = sorted(set(task_ids))
+        open_statuses: Dict[int, List[str]] = {}
+        for start in range(0, len(task_ids), self.model.BULK_BATCH_SIZE):
+            rows = (
+                self.model.objects.filter(parent_id__in=task_ids[start:start + self.model.BULK_BATCH_SIZE])
+                .order_by()
+                .values_list('parent_id', 'status')
+                .annotate(count=models.Count('pk'))
+            )
+            for parent_id, status, count in rows:
+                statuses = open_statuses.setdefault(parent_id, [])
+                if status != COMPLETED:
+                    statuses.extend([status] * count)
+        return {
+            task_id: TransitionContext(tuple(statuses), has_subtasks=True)
+            for task_id, statuses in open_statuses.items()
+        }
+
+    def apply_status_changes(self, changes: List[Tuple[int, str]]) -> List[Optional[str]]:
+        """
+        Применяет пачку смен статусов в одной транзакции за фиксированное число запросов.
+
+        Переходы проверяются по очереди по тем же правилам, что и в Task.save,
+        с учётом уже принятых изменений из этой же пачки. Недопустимые переходы
+        пропускаются, остальные записываются групповыми UPDATE по новому статусу.
+
+        Args:
+            changes (list): Пары (id задачи, новый статус).
+
+        Returns:
+            list: Для каждой пары None, если статус изменён, иначе текст ошибки.
+        """
+        model = self.model
+        valid_statuses = dict(model.STATUS_CHOICES)
+        with transaction.atomic():
+            tasks = self.in_bulk({task_id for task_id, _ in changes})
+            completing = sorted({task_id for task_id, status in changes if status == COMPLETED and task_id in tasks})
+            open_subtasks = OpenSubtasks.load([tasks[task_id].path for task_id in completing])
+            open_subtasks.add_completed_children(completing)
+            # Проверки идут по статусам в памяти, с уже принятыми изменениями пачки
+            for task in tasks.values():
+                open_subtasks.statuses[task.pk] = task.status
+
+            errors: List[Optional[str]] = []
+            cascaded: List[int] = []
+            for task_id, status in changes:
+                task = tasks.get(task_id)
+                if task is None:
+                    errors.append("Задача не найдена.")
+                    continue
+                if status not in valid_statuses:
+                    errors.append("Некорректный статус.")
+                    continue
+                old_status = open_subtasks.statuses[task_id]
+                error = check_transition(old_status, status, open_subtasks.context(task_id))
+                if error is None and status == COMPLETED:
+                    try:
+                        cascaded.extend(open_subtasks.collect_for_completion(task_id))
+                    except ValidationError as cascade_error:
+                        error = ' '.join(cascade_error.messages)
+                if error is not None:
+                    errors.append(error)
+                    continue
+                open_subtasks.statuses[task_id] = status
+                errors.append(None)
+
+            changed: Dict[str, List[int]] = {}
+            touched: List[int] = list(cascaded)
+            for task in tasks.values():
+                status = open_subtasks.statuses[task.pk]
+                if status != task.status:
+                    changed.setdefault(status, []).append(task.pk)
+                    touched.extend(path_to_ids(task.path))
+            completed = {task_id: open_subtasks.completed_from[task_id] for task_id in cascaded}
+            completed.update({task_id: tasks[task_id].status for task_id in changed.pop('completed', [])})
+            versions = {**open_subtasks.versions, **{task_id: task.version for task_id, task in tasks.items()}}
+            model.mark_completed(completed, versions)
+            transitions = []
+            for status, task_ids in changed.items():
+                for start in range(0, len(task_ids), model.BULK_BATCH_SIZE):
+                    self.filter(pk__in=task_ids[start:start + model.BULK_BATCH_SIZE]).update(
+                        status=status, version=models.F('version') + 1,
+                    )
+                for task_id in task_ids:
+                    transitions.append((task_id, tasks[task_id].status, status))
+                    publish_on_commit(EVENT_STATUS, {
+                        'id': task_id, 'status': status, 'version': tasks[task_id].version + 1,
+                    })
+            TaskStatusEvent.record(transitions)
+            model.bump_tree_versions(touched)
+        return errors
+
+    def subtree_effort_totals(self) -> Dict[int, Tuple[float, float]]:
+        """
+        Полностью пересчитывает суммарную трудоёмкость поддеревьев одним запросом.
+
+        Returns:
+            dict: Для каждой задачи пара (плановое, фактическое) время всех её потомков.
+        """
+        rows = list(self.values_list('id', 'parent_id', 'planned_effort', 'actual_effort'))
+        children: Dict[Optional[int], List[int]] = {}
+        own = {}
+        for task_id, parent_id, planned_effort, actual_effort in rows:
+            children.setdefault(parent_id, []).append(task_id)
+            own[task_id] = (planned_effort, actual_effort)
+
+        # Обход в глубину без рекурсии: родитель попадает в order раньше потомков
+        order = []
+        stack = [task_id for task_id, parent_id, _, _ in rows if parent_id not in own]
+        while stack:
+            task_id = stack.pop()
+            order.append(task_id)
+            stack.extend(children.get(task_id, []))
+
+        totals = {task_id: (0.0, 0.0) for task_id in own}
+        for task_id in reversed(order):
+            planned_effort, actual_effort = totals[task_id]
+            for child_id in children.get(task_id, []):
+                child_planned, child_actual = totals[child_id]
+                planned_effort += own[child_id][0] + child_planned
+                actual_effort += own[child_id][1] + child_actual
+            totals[task_id] = (planned_effort, actual_effort)
+        return totals
+
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ("assigned", "Назначена"),
@@ -20,27 +367,69 @@ class Task(models.Model):
     planned_effort: float = models.FloatField(default=0.0)  # Плановое время выполнения
     actual_effort: float = models.FloatField(default=0.0)  # Фактическое время
     completed_at: Optional[timezone.datetime] = models.DateTimeField(null=True, blank=True)  # Дата завершения (опционально)
+    subtree_planned_effort: float = models.FloatField(default=0.0, editable=False)  # Плановое время всех потомков
+    subtree_actual_effort: float = models.FloatField(default=0.0, editable=False)  # Фактическое время всех потомков
+    path: str = models.CharField(max_length=1100, default='', editable=False, db_index=True)  # Материализованный путь от корня
+    depth: int = models.PositiveIntegerField(default=0, editable=False)  # Глубина в дереве (0 у корневой задачи)
+    tree_version: int = models.PositiveIntegerField(default=0, editable=False)  # Счётчик изменений задачи и её поддерева
+    version: int = models.PositiveIntegerField(default=0, editable=False)  # Счётчик изменений самой задачи (для проверки конфликтов)
+    archived_at: Optional[timezone.datetime] = models.DateTimeField(null=True, blank=True, editable=False)  # Когда поддерево убрано в архив
 
     parent: Optional["Task"] = models.ForeignKey(
         "self", related_name="subtasks", on_delete=models.CASCADE, null=True, blank=True
     )  # Ссылка на родительскую задачу, если это подзадача
+    assignees = models.ManyToManyField(
+        "Performer", through="TaskPerformer", related_name="tasks", blank=True
+    )  # Исполнители (строится по строке performers при сохранении, см. TaskPerformer.link)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Подзадачи с заданным статусом (отдельный индекс внешнего ключа parent
+            # остаётся: по нему постраничная выборка подзадач идёт в порядке id)
+            models.Index(fields=['parent', 'status'], name='task_parent_status_idx'),
+            # Выборки по статусу и отчёты по завершённым задачам в порядке даты завершения
+            models.Index(fields=['status', 'completed_at'], name='task_status_completed_idx'),
+            models.Index(fields=['created_at'], name='task_created_at_idx'),
+            # Частичные индексы только по рабочим задачам: архив не раздувает их и
+            # не читается деревом списка, выбором родителя и подгрузкой подзадач
+            models.Index(fields=['path'], name='task_live_path_idx', condition=models.Q(archived_at__isnull=True)),
+            models.Index(fields=['parent'], name='task_live_parent_idx', condition=models.Q(archived_at__isnull=True)),
+            # Корни архивных поддеревьев в порядке архивации (страница архива)
+            models.Index(
+                fields=['parent', 'archived_at'], name='task_archived_idx',
+                condition=models.Q(archived_at__isnull=False),
+            ),
+        ]
+
+    # Агрегаты поддерева обновляются только через F-выражения у предков
+    ROLLUP_FIELDS = ('subtree_planned_effort', 'subtree_actual_effort')
+    # Путь и глубина пересчитываются при создании и переносе поддерева
+    TREE_FIELDS = ('path', 'depth')
+    # Версия поддерева увеличивается только через F-выражение, см. bump_tree_versions
+    VERSION_FIELDS = ('tree_version',)
+    # Поля снимка, от которых зависят проверки и инкрементальные пересчёты в save()
+    SNAPSHOT_FIELDS = ('status', 'parent_id', 'path', 'planned_effort', 'actual_effort', 'version') + ROLLUP_FIELDS
+    # Счётчик изменений всей таблицы задач (см. ChangeCounter)
+    CHANGE_COUNTER = 'tasks'
+    # Размер пачки id для запросов вида pk__in (ограничение SQLite на число параметров)
+    BULK_BATCH_SIZE = 500
 
     def __str__(self) -> str:
         return self.name
 
     def calculate_efforts(self) -> Dict[str, float]:
         """
-        Вычисляет плановое и фактическое время для задачи и ее подзадач.
+        Вычисляет плановое и фактическое время для задачи и всех её подзадач
+        (на любой глубине). Суммы по поддереву хранятся в самой задаче,
+        поэтому метод не делает запросов к базе.
         
         Returns:
             dict: Словарь с плановыми и фактическими временами для задачи и подзадач.
         """
-        subtask_planned_effort = sum(
-            subtask.planned_effort for subtask in self.subtasks.all()
-        )
-        subtask_actual_effort = sum(
-            subtask.actual_effort for subtask in self.subtasks.all()
-        )
+        subtask_planned_effort = self.subtree_planned_effort
+        subtask_actual_effort = self.subtree_actual_effort
         return {
             "task_planned_effort": self.planned_effort,
             "subtask_planned_effort": subtask_planned_effort,
@@ -78,50 +467,382 @@ class Task(models.Model):
     def total_actual_effort(self, value: float):
         self._actual_effort = value
 
-    def save(self, *args, **kwargs) -> None:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._get_field_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None) -> None:
+        super().refresh_from_db(using=using, fields=fields)
+        values = self._get_field_values()
+        if fields is None or not getattr(self, '_loaded_values', None):
+            self._loaded_values = values
+        else:
+            refreshed = {field.attname for field in self._meta.concrete_fields if field.name in fields or field.attname in fields}
+            self._loaded_values.update({name: value for name, value in values.items() if name in refreshed})
+
+    def _get_field_values(self) -> Dict[str, object]:
+        # Отложенные (deferred) поля не загружены и в снимок не попадают
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_dirty_fields(self) -> List[str]:
+        """
+        Возвращает имена полей, изменённых после загрузки задачи из базы.
+
+        Returns:
+            list: Имена изменённых полей (для новой задачи — все загруженные поля).
+        """
+        loaded = getattr(self, '_loaded_values', None) or {}
+        current = self._get_field_values()
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in current
+            and (field.attname not in loaded or loaded[field.attname] != current[field.attname])
+        ]
+
+    def _get_loaded_state(self) -> Optional["Task"]:
+        """
+        Восстанавливает состояние задачи на момент загрузки из базы без запроса.
+
+        Returns:
+            Task | None: Копия задачи со значениями из снимка или None, если снимка
+            нет или в нём не хватает полей, нужных для проверок в save().
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if not loaded or any(name not in loaded for name in self.SNAPSHOT_FIELDS):
+            return None
+        return Task(**loaded)
+
+    def save(self, *args, expected_version: Optional[int] = None, **kwargs) -> None:
         """
         Переопределенный метод сохранения для проверки допустимости переходов статусов 
         и обеспечения целостности данных для задачи и подзадач.
+
+        Прежнее состояние задачи берётся из снимка, сделанного при загрузке из базы,
+        и записываются только изменённые поля. UPDATE выполняется с условием на
+        значения из снимка: если строку успели изменить параллельно, сохранение
+        повторяется с проверками по свежему состоянию из базы и записывает те же
+        изменённые поля (см. _rebase).
+
+        Каждая запись увеличивает version. С expected_version задача сохраняется,
+        только если её версия в базе не изменилась с тех пор, как клиент её
+        получил: иначе изменения не записываются (оптимистическая блокировка
+        без долгих транзакций у клиента).
+
+        Args:
+            expected_version (int | None): Версия задачи, которую видел клиент.
+
+        Raises:
+            TaskVersionConflict: Если версия в базе отличается от expected_version
+            или параллельно изменилось поле снимка, которое задача не меняет.
         """
+        try:
+            self._save(True, expected_version, *args, **dict(kwargs))
+        except TaskStateChanged:
+            # Повтор читает строку уже под блокировкой записи, поэтому проверка
+            # версии в нём окончательная
+            self._save(False, expected_version, *args, **kwargs)
+        self._loaded_values = self._get_field_values()
+
+    async def asave(self, *args, expected_version: Optional[int] = None, **kwargs) -> None:
+        # Model.asave принимает только стандартные аргументы save()
+        await sync_to_async(self.save)(*args, expected_version=expected_version, **kwargs)
+
+    def _save(self, use_snapshot: bool, expected_version: Optional[int], *args, **kwargs) -> None:
         with transaction.atomic():
+            old_task = None
+            parent_path = None
             if self.pk:
-                old_task = Task.objects.get(pk=self.pk)
+                old_task = self._get_loaded_state() if use_snapshot else None
+                if old_task is not None:
+                    self._expected_values = {
+                        name: getattr(old_task, name) for name in self.SNAPSHOT_FIELDS
+                        if name not in self.ROLLUP_FIELDS or old_task.parent_id != self.parent_id
+                    }
+                    dirty_fields = self.get_dirty_fields()
+                elif use_snapshot:
+                    # Снимка нет: записываются все поля
+                    old_task = Task.objects.get(pk=self.pk)
+                    dirty_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+                else:
+                    old_task = Task.objects.get(pk=self.pk)
+                    dirty_fields = self._rebase(old_task)
+
+                if expected_version is not None and old_task.version != expected_version:
+                    raise TaskVersionConflict(expected_version, old_task.version)
+
+                if old_task.parent_id != self.parent_id:
+                    parent_path = self._get_parent_path()
+                    if parent_path.startswith(old_task.path):
+                        raise ValidationError("Задача не может быть подзадачей самой себя или своей подзадачи.")
                 
-                if old_task.status != 'completed' and self.status == 'completed':
-                    if self.subtasks.filter(status__in=['in_progress', 'assigned']).exists():
-                        raise ValidationError("Есть незавершенные подзадачи.")
-            
-                # Проверяем допустимость перехода в новый статус
-                if not self.can_transition_to(self.status, old_task.status):
-                    if old_task.status in ["completed", "paused", "deleted"]:
-                        raise ValidationError("Невозможно выполнить переход в указанный статус.")
-                    if self.status == 'completed':
-                        raise ValidationError("Проверьте статус текущей задачи и подзадач, они должны выполняться")
-                    elif self.status == 'paused':
-                        raise ValidationError("Задача ещё не выполняется")
-
-                if self.status == 'completed':
+                open_subtasks = OpenSubtasks()
+                cascaded: List[int] = []
+                if needs_subtasks(old_task.status, self.status):
+                    open_subtasks = OpenSubtasks.load([old_task.path])
+
+                # Проверяем допустимость перехода в новый статус (см. tasks.transitions)
+                validate_transition(old_task.status, self.status, open_subtasks.context(self.pk))
+
+                if self.status == COMPLETED:
                     # Сначала завершаем все подзадачи
-                    for subtask in self.subtasks.all():
-                        if subtask.status != 'completed':
-                            subtask.status = 'completed'
-                            subtask.save()
-                    
-                    # Повторная проверка на завершение всех подзадач
-                    if self.subtasks.filter(status__in=['in_progress', 'assigned', 'paused']).exists():
-                        raise ValidationError("Есть незавершенные подзадачи.")
+                    cascaded = open_subtasks.collect_for_completion(self.pk)
+                    Task.mark_completed(
+                        {task_id: open_subtasks.completed_from[task_id] for task_id in cascaded}, open_subtasks.versions,
+                    )
                     
                     # Устанавливаем дату завершения
                     if not self.completed_at:
                         self.completed_at = timezone.now()
+                        if 'completed_at' not in dirty_fields:
+                            dirty_fields.append('completed_at')
+
+                # Агрегаты и путь в памяти могут быть устаревшими, их не перезаписываем
+                if 'update_fields' not in kwargs:
+                    kwargs['update_fields'] = [
+                        name for name in dirty_fields
+                        if name not in self.ROLLUP_FIELDS + self.TREE_FIELDS + self.VERSION_FIELDS + ('version',)
+                    ]
+                if kwargs['update_fields']:
+                    # Условие UPDATE содержит прежнюю версию (см. _do_update)
+                    self.version = old_task.version + 1
+                    kwargs['update_fields'] = [name for name in kwargs['update_fields'] if name != 'version'] + ['version']
+            else:
+                cascaded = []
+                parent_path = self._get_parent_path()
                         
             # Сначала сохраняем основную задачу
-            super().save(*args, **kwargs)
+            try:
+                super().save(*args, **kwargs)
+            finally:
+                self._expected_values = None
+            if parent_path is not None:
+                self._move_to_path(parent_path, old_task.path if old_task else None)
+            self._update_ancestor_efforts(old_task)
+
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or update_fields or parent_path is not None:
+                # Каскадно завершённые подзадачи лежат в поддереве задачи, а цепочки
+                # между ними и задачей тоже завершены, поэтому их предки уже учтены
+                touched = path_to_ids(self.path) + cascaded
+                if parent_path is not None and old_task is not None:
+                    touched += old_task.ancestor_ids
+                Task.bump_tree_versions(touched)
+
+            if old_task is None:
+                TaskStatusEvent.record([(self.pk, '', self.status)], at=self.created_at)
+            elif old_task.status != self.status and (update_fields is None or 'status' in update_fields):
+                TaskStatusEvent.record([(self.pk, old_task.status, self.status)])
+
+            # Связи с исполнителями повторяют строку performers и меняются вместе с ней
+            if (update_fields is None or 'performers' in update_fields) and (
+                self.performers if old_task is None else old_task.performers != self.performers
+            ):
+                TaskPerformer.link({self.pk: parse_performers(self.performers)}, replace=old_task is not None)
+
+    def _rebase(self, current: "Task") -> List[str]:
+        """
+        Переносит изменения задачи (по снимку при загрузке) на свежее состояние
+        строки из базы: остальные поля берутся из базы, а не из памяти.
+
+        Args:
+            current (Task): Задача, только что прочитанная из базы.
+
+        Returns:
+            list: Имена изменённых полей, которые нужно записать.
+
+        Raises:
+            TaskVersionConflict: Если параллельно изменилось поле снимка, которое
+            это сохранение не меняет (проверки перехода и пересчёт агрегатов
+            опирались бы на устаревшее значение).
+        """
+        dirty_fields = self.get_dirty_fields()
+        derived = self.ROLLUP_FIELDS + self.TREE_FIELDS + self.VERSION_FIELDS + ('version',)
+        changed = [
+            field.attname for field in self._meta.concrete_fields
+            if field.name not in dirty_fields and field.name not in derived
+            and field.attname in self.SNAPSHOT_FIELDS
+            and self._loaded_values[field.attname] != getattr(current, field.attname)
+        ]
+        if changed:
+            raise TaskVersionConflict(self._loaded_values['version'], current.version)
+        for field in self._meta.concrete_fields:
+            if field.name not in dirty_fields:
+                setattr(self, field.attname, getattr(current, field.attname))
+        return dirty_fields
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        Добавляет к UPDATE условие на значения из снимка (см. save).
+        """
+        expected_values = getattr(self, '_expected_values', None)
+        if not expected_values:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        base_qs = base_qs.filter(**expected_values)
+        if not super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update):
+            raise TaskStateChanged()
+        return True
+
+    @classmethod
+    def mark_completed(cls, previous_statuses: Dict[int, str], versions: Dict[int, int]) -> None:
+        """
+        Завершает задачи пачками UPDATE, проставляя дату завершения тем, у кого её нет,
+        и записывает переходы в журнал статусов.
+
+        Args:
+            previous_statuses (dict): id задачи -> статус до завершения (переходы уже проверены).
+            versions (dict): id задачи -> версия до завершения, прочитанная в той же
+            транзакции (в событии клиенту уходит следующая).
+        """
+        task_ids = list(previous_statuses)
+        now = timezone.now()
+        for start in range(0, len(task_ids), cls.BULK_BATCH_SIZE):
+            cls.objects.filter(pk__in=task_ids[start:start + cls.BULK_BATCH_SIZE]).update(
+                status='completed',
+                completed_at=Coalesce('completed_at', models.Value(now)),
+                version=models.F('version') + 1,
+            )
+        for task_id in task_ids:
+            publish_on_commit(EVENT_STATUS, {'id': task_id, 'status': 'completed', 'version': versions[task_id] + 1})
+        TaskStatusEvent.record(
+            [(task_id, status, 'completed') for task_id, status in previous_statuses.items()], at=now,
+        )
+
+    def delete(self, *args, **kwargs):
+        # Путь в памяти мог устареть после переноса поддерева, а по нему
+        # обработчик pre_delete находит предков для пересчёта агрегатов
+        self.path = Task.objects.filter(pk=self.pk).values_list('path', flat=True).first() or self.path
+        return super().delete(*args, **kwargs)
+
+    def _get_parent_path(self) -> str:
+        if self.parent_id is None:
+            return ''
+        path, archived_at = Task.objects.filter(pk=self.parent_id).values_list('path', 'archived_at').get()
+        if archived_at is not None:
+            raise ValidationError("Родительская задача в архиве.")
+        return path
+
+    def _move_to_path(self, parent_path: str, old_path: Optional[str]) -> None:
+        """
+        Записывает новый материализованный путь задачи и, при переносе,
+        одним UPDATE переписывает пути и глубину всего её поддерева.
+
+        Args:
+            parent_path (str): Путь нового родителя ('' для корневой задачи).
+            old_path (str | None): Прежний путь задачи (None для новой задачи).
+        """
+        new_path = parent_path + path_segment(self.pk)
+        new_depth = len(parent_path) // PATH_STEP
+        if old_path is None:
+            Task.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        else:
+            Task.objects.subtree(old_path).update(
+                path=Concat(models.Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=models.F('depth') + (new_depth - (len(old_path) // PATH_STEP - 1)),
+            )
+        self.path = new_path
+        self.depth = new_depth
+
+    @property
+    def ancestor_ids(self) -> List[int]:
+        """Идентификаторы предков от корня к родителю, без запросов к базе."""
+        return path_to_ids(self.path)[:-1]
+
+    def get_ancestors(self) -> TaskQuerySet:
+        return Task.objects.filter(pk__in=self.ancestor_ids).order_by('depth')
+
+    def get_descendants(self, include_self: bool = False) -> TaskQuerySet:
+        return Task.objects.subtree(self.path, include_root=include_self)
+
+    def subtree_size(self) -> int:
+        """Количество задач в поддереве, включая саму задачу."""
+        return self.get_descendants(include_self=True).count()
+
+    def clean(self) -> None:
+        """
+        Запрещает выбрать родителем саму задачу или её потомка (проверка по индексу пути).
+        """
+        super().clean()
+        if self.pk and self.parent_id and self.path:
+            if self.get_descendants(include_self=True).filter(pk=self.parent_id).exists():
+                raise ValidationError({'parent': "Задача не может быть подзадачей самой себя или своей подзадачи."})
+
+    def _update_ancestor_efforts(self, old_task: Optional["Task"]) -> None:
+        """
+        Инкрементально обновляет суммы трудоёмкости у всех предков задачи.
+
+        Args:
+            old_task (Task | None): Состояние задачи в базе до сохранения (None для новой задачи).
+        """
+        if old_task is None:
+            self.add_to_ancestors(self.ancestor_ids, self.planned_effort, self.actual_effort)
+        elif old_task.parent_id != self.parent_id:
+            # Переносим всё поддерево: вычитаем у старых предков, добавляем новым
+            self.add_to_ancestors(
+                old_task.ancestor_ids,
+                -(old_task.planned_effort + old_task.subtree_planned_effort),
+                -(old_task.actual_effort + old_task.subtree_actual_effort),
+            )
+            self.add_to_ancestors(
+                self.ancestor_ids,
+                self.planned_effort + old_task.subtree_planned_effort,
+                self.actual_effort + old_task.subtree_actual_effort,
+            )
+        else:
+            self.add_to_ancestors(
+                self.ancestor_ids,
+                self.planned_effort - old_task.planned_effort,
+                self.actual_effort - old_task.actual_effort,
+            )
+
+    @classmethod
+    def bump_tree_versions(cls, task_ids: List[int]) -> None:
+        """
+        Увеличивает версию поддерева у перечисленных задач пачками UPDATE,
+        а также счётчик изменений всей таблицы задач.
+
+        Версия входит в ключ кэша отрисованной задачи (task_tree_item.html) и в ETag
+        её деталей, поэтому при изменении задачи её нужно увеличить у самой задачи
+        и у всех её предков. Метод вызывается при любой записи в таблицу задач.
+
+        Args:
+            task_ids (list): Идентификаторы задач (повторы допускаются).
+        """
+        ChangeCounter.bump(cls.CHANGE_COUNTER)
+        task_ids = sorted(set(task_ids))
+        for start in range(0, len(task_ids), cls.BULK_BATCH_SIZE):
+            cls.objects.filter(pk__in=task_ids[start:start + cls.BULK_BATCH_SIZE]).update(
+                tree_version=models.F('tree_version') + 1,
+            )
+
+    @classmethod
+    def add_to_ancestors(cls, ancestor_ids: List[int], planned_effort: float, actual_effort: float) -> None:
+        """
+        Прибавляет трудоёмкость к агрегатам перечисленных предков одним запросом.
+
+        Args:
+            ancestor_ids (list): Идентификаторы предков (см. Task.ancestor_ids).
+            planned_effort (float): Изменение планового времени.
+            actual_effort (float): Изменение фактического времени.
+        """
+        if not ancestor_ids or (not planned_effort and not actual_effort):
+            return
+        cls.objects.filter(pk__in=ancestor_ids).update(
+            subtree_planned_effort=models.F('subtree_planned_effort') + planned_effort,
+            subtree_actual_effort=models.F('subtree_actual_effort') + actual_effort,
+        )
 
 
     def can_transition_to(self, new_status: str, old_status: str) -> bool:
         """
-        Проверяет, возможен ли переход задачи в новый статус.
+        Проверяет, возможен ли переход задачи в новый статус по таблице переходов
+        (tasks.transitions). Условия на незавершённые подзадачи не проверяются,
+        для удаления (DELETED) подзадачи загружаются запросом.
 
         Args:
             new_status (str): Новый статус задачи.
@@ -130,15 +851,8 @@ class Task(models.Model):
         Returns:
             bool: True, если переход возможен, иначе False.
         """
-        if new_status == "completed":
-            if old_status in ["paused", "assigned"]:
-                return False  # Нельзя завершить задачу из статусов "Приостановлена" или "Назначена"
-            return old_status == "in_progress"
-        elif new_status == "paused":
-            return old_status == "in_progress"
-        elif new_status == "deleted":
-            return self.is_terminal()
-        return True  # Допустимые переходы для других статусов
+        has_subtasks = new_status == DELETED and not self.is_terminal()
+        return check_transition(old_status, new_status, TransitionContext(has_subtasks=has_subtasks)) is None
 
     def is_terminal(self) -> bool:
         """
@@ -148,3 +862,201 @@ class Task(models.Model):
             bool: True, если задача терминальная, иначе False.
         """
         return not self.subtasks.exists()
+
+
+class ChangeCounter(models.Model):
+    """
+    Счётчик изменений набора данных (например, всей таблицы задач).
+
+    Значение увеличивается при каждой записи и служит дешёвым валидатором
+    (ETag) для ответов, зависящих от всей таблицы: его чтение — один поиск
+    по первичному ключу.
+    """
+    name: str = models.CharField(max_length=50, primary_key=True)  # Имя набора данных
+    value: int = models.PositiveBigIntegerField(default=0)  # Номер последнего изменения
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def bump(cls, name: str) -> None:
+        if not cls.objects.filter(name=name).update(value=models.F('value') + 1):
+            cls.objects.create(name=name, value=1)
+
+    @classmethod
+    def get_value(cls, name: str) -> int:
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+
+class PerformerQuerySet(models.QuerySet):
+    def with_workload(self) -> "PerformerQuerySet":
+        """
+        Добавляет нагрузку исполнителя одним запросом с группировкой: число задач
+        (task_count), незавершённых задач (open_task_count) и суммы планового
+        (planned) и фактического (actual) времени.
+        """
+        open_statuses = [status for status, _ in Task.STATUS_CHOICES if status != 'completed']
+        return self.annotate(
+            task_count=models.Count('tasks'),
+            open_task_count=models.Count('tasks', filter=models.Q(tasks__status__in=open_statuses)),
+            planned=Coalesce(models.Sum('tasks__planned_effort'), 0.0),
+            actual=Coalesce(models.Sum('tasks__actual_effort'), 0.0),
+        )
+
+    def ids_for(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Возвращает id исполнителей по именам, создавая недостающих.
+
+        Returns:
+            dict: Имя исполнителя -> id.
+        """
+        names = sorted(set(names))
+        ids: Dict[str, int] = {}
+        for start in range(0, len(names), Task.BULK_BATCH_SIZE):
+            chunk = names[start:start + Task.BULK_BATCH_SIZE]
+            found = dict(self.filter(name__in=chunk).values_list('name', 'id'))
+            missing = [self.model(name=name) for name in chunk if name not in found]
+            if missing:
+                # Исполнителя могли создать параллельно: конфликт пропускаем и перечитываем
+                self.bulk_create(missing, ignore_conflicts=True)
+                found = dict(self.filter(name__in=chunk).values_list('name', 'id'))
+            ids.update(found)
+        return ids
+
+
+class Performer(models.Model):
+    """Исполнитель задач."""
+    name: str = models.CharField(max_length=255, unique=True)  # Имя
+
+    objects = PerformerQuerySet.as_manager()
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TaskPerformer(models.Model):
+    """
+    Связь задачи и исполнителя.
+
+    Уникальный индекс (performer, task) одновременно служит для выборки задач
+    исполнителя в порядке id, поэтому отдельный индекс по performer не нужен.
+    """
+    task: Task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='performer_links')
+    performer: Performer = models.ForeignKey(
+        Performer, on_delete=models.CASCADE, related_name='task_links', db_index=False,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['performer', 'task'], name='task_performer_unique'),
+        ]
+
+    @classmethod
+    def link(cls, performers_by_task: Dict[int, List[str]], replace: bool = True) -> None:
+        """
+        Связывает задачи с исполнителями пакетными запросами, создавая новых исполнителей.
+
+        Args:
+            performers_by_task (dict): id задачи -> имена исполнителей (см. parse_performers).
+            replace (bool): Удалить прежние связи этих задач (не нужно для новых задач).
+        """
+        task_ids = list(performers_by_task)
+        if replace:
+            for start in range(0, len(task_ids), Task.BULK_BATCH_SIZE):
+                cls.objects.filter(task_id__in=task_ids[start:start + Task.BULK_BATCH_SIZE]).delete()
+        ids = Performer.objects.ids_for(name for names in performers_by_task.values() for name in names)
+        cls.objects.bulk_create(
+            [
+                cls(task_id=task_id, performer_id=ids[name])
+                for task_id, names in performers_by_task.items() for name in names
+            ],
+            batch_size=Task.BULK_BATCH_SIZE,
+        )
+
+
+class TaskStatusEvent(models.Model):
+    """
+    Запись журнала статусов задачи; записи только добавляются.
+
+    Пустой from_status означает создание задачи, to_status "deleted" — её
+    удаление. Журнал не ссылается на задачу внешним ключом базы и не удаляется
+    вместе с ней, чтобы по нему можно было восстановить прошлые состояния доски.
+    """
+    task: Task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='status_events',
+    )
+    from_status: str = models.CharField(max_length=20, blank=True)  # Статус до перехода
+    to_status: str = models.CharField(max_length=20)  # Статус после перехода
+    created_at: timezone.datetime = models.DateTimeField(default=timezone.now)  # Время перехода
+
+    DELETED = DELETED  # Псевдостатус удаления (см. tasks.transitions)
+
+    class Meta:
+        indexes = [
+            # История задачи по порядку (время в статусах)
+            models.Index(fields=['task', 'created_at'], name='status_event_task_idx'),
+            # Срезы по времени (доска на момент, накопительная диаграмма)
+            models.Index(fields=['created_at'], name='status_event_time_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task_id}: {self.from_status or '—'} -> {self.to_status}"
+
+    @classmethod
+    def record(cls, transitions: List[Tuple[int, str, str]], at: Optional[timezone.datetime] = None) -> None:
+        """
+        Записывает переходы одним пакетным INSERT.
+
+        Args:
+            transitions (list): Тройки (id задачи, прежний статус, новый статус).
+            at (datetime | None): Время переходов (по умолчанию текущее).
+        """
+        if not transitions:
+            return
+        at = at or timezone.now()
+        cls.objects.bulk_create(
+            [
+                cls(task_id=task_id, from_status=from_status, to_status=to_status, created_at=at)
+                for task_id, from_status, to_status in transitions
+            ],
+            batch_size=Task.BULK_BATCH_SIZE,
+        )
+
+
+class TaskImportMapping(models.Model):
+    """
+    Соответствие внешнего id задачи из файла импорта и id в базе.
+
+    Записывается в той же транзакции, что и пачка задач (см.
+    tasks.importer.import_tasks), поэтому после сбоя в любой момент повторный
+    импорт с тем же source пропускает ровно уже вставленные задачи. Как и
+    журнал статусов, не ссылается на задачу внешним ключом базы.
+    """
+    source: str = models.CharField(max_length=255)  # Имя импорта (значение --checkpoint)
+    external_id: str = models.CharField(max_length=255)  # id задачи в файле
+    task: Task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'external_id'], name='task_import_mapping_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.source}: {self.external_id} -> {self.task_id}"
+
+
+class TaskReportSnapshot(models.Model):
+    """
+    Сохранённая сводка по задачам (tasks.reports.build_report).
+
+    Перестраивается командой refresh_task_report и хранится одной последней
+    строкой: на больших таблицах отчёт читается отсюда, а не считается заново.
+    """
+    version: int = models.PositiveBigIntegerField()  # Номер изменения таблицы задач (ChangeCounter) при построении
+    created_at: timezone.datetime = models.DateTimeField(default=timezone.now)  # Когда построена
+    data: dict = models.JSONField()  # Сводка
+
+    def __str__(self) -> str:
+        return f"Сводка {self.version} от {self.created_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,175 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models.functions import Substr, TruncWeek
+from django.utils import timezone
+
+from .models import PATH_STEP, ChangeCounter, Performer, Task, TaskReportSnapshot, path_to_ids
+
+REPORT_CACHE_KEY = 'tasks:report'
+# Сколько строк в разрезах по исполнителям и корневым проектам
+REPORT_TOP = 50
+
+
+class WindowSum(models.Func):
+    """
+    SUM(<агрегат>) OVER (ORDER BY ...) для запроса с GROUP BY.
+
+    Window из Django не принимает агрегат внутри агрегата, хотя в SQL оконная
+    функция над результатом группировки допустима: так считаются нарастающие
+    итоги (с order_by) и доли от общего итога (без order_by).
+    """
+    contains_over_clause = True
+
+    def __init__(self, aggregate, order_by=None, **extra) -> None:
+        expressions = [aggregate] if order_by is None else [aggregate, order_by]
+        super().__init__(*expressions, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        over = ''
+        if len(self.source_expressions) > 1:
+            order_sql, order_params = compiler.compile(self.source_expressions[1])
+            over = f'ORDER BY {order_sql}'
+            params = (*params, *order_params)
+        return f'SUM({sql}) OVER ({over})', params
+
+
+def effort_sums() -> Dict[str, Any]:
+    return {
+        'tasks': models.Count('pk'),
+        'planned': models.Sum('planned_effort'),
+        'actual': models.Sum('actual_effort'),
+    }
+
+
+def round_efforts(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in rows:
+        for key in ('planned', 'actual'):
+            row[key] = round(row[key] or 0.0, 2)
+    return rows
+
+
+def report_by_status() -> List[Dict[str, Any]]:
+    """Трудоёмкость по статусам и доля задач каждого статуса."""
+    statuses = dict(Task.STATUS_CHOICES)
+    rows = list(
+        Task.objects.values('status')
+        .annotate(**effort_sums(), all_tasks=WindowSum(models.Count('pk'), output_field=models.IntegerField()))
+        .order_by('status')
+    )
+    for row in rows:
+        row['status_display'] = statuses.get(row['status'], row['status'])
+        all_tasks = row.pop('all_tasks')
+        row['share'] = round(row['tasks'] / all_tasks, 4) if all_tasks else 0.0
+    return round_efforts(rows)
+
+
+def report_by_performer() -> List[Dict[str, Any]]:
+    """Трудоёмкость по исполнителям (задача учитывается у каждого своего исполнителя)."""
+    rows = (
+        Performer.objects.with_workload()
+        .filter(task_count__gt=0)
+        .order_by('-actual', 'name')
+        .values_list('name', 'task_count', 'planned', 'actual')[:REPORT_TOP]
+    )
+    return round_efforts([
+        {'performer': name, 'tasks': tasks, 'planned': planned, 'actual': actual}
+        for name, tasks, planned, actual in rows
+    ])
+
+
+def report_by_root() -> List[Dict[str, Any]]:
+    """
+    Трудоёмкость по корневым проектам: задачи группируются по первому
+    сегменту материализованного пути, то есть по корню своего дерева.
+    """
+    rows = list(
+        Task.objects.annotate(root_path=Substr('path', 1, PATH_STEP))
+        .values('root_path')
+        .annotate(**effort_sums(), completed=models.Count('pk', filter=models.Q(status='completed')))
+        .order_by('-actual', 'root_path')[:REPORT_TOP]
+    )
+    for row in rows:
+        row['id'] = path_to_ids(row.pop('root_path'))[0]
+    names = dict(Task.objects.filter(pk__in=[row['id'] for row in rows]).values_list('id', 'name'))
+    for row in rows:
+        row['name'] = names.get(row['id'], '')
+    return round_efforts(rows)
+
+
+def report_by_week() -> List[Dict[str, Any]]:
+    """Завершённые задачи по неделям завершения с нарастающим итогом."""
+    week = TruncWeek('completed_at')
+    rows = list(
+        Task.objects.filter(status='completed', completed_at__isnull=False)
+        .annotate(week=week)
+        .values('week')
+        .annotate(
+            **effort_sums(),
+            cumulative_tasks=WindowSum(models.Count('pk'), week, output_field=models.IntegerField()),
+            cumulative_actual=WindowSum(models.Sum('actual_effort'), week, output_field=models.FloatField()),
+        )
+        .order_by('week')
+    )
+    for row in rows:
+        row['week'] = row['week'].date().isoformat()
+        row['cumulative_actual'] = round(row['cumulative_actual'] or 0.0, 2)
+    return round_efforts(rows)
+
+
+def build_report(version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Строит сводку по задачам агрегирующими запросами (без загрузки задач в память).
+
+    Args:
+        version (int | None): Номер изменения таблицы задач, по которому построена сводка.
+    """
+    if version is None:
+        version = ChangeCounter.get_value(Task.CHANGE_COUNTER)
+    return {
+        'version': version,
+        'generated_at': timezone.now().isoformat(),
+        'by_status': report_by_status(),
+        'by_performer': report_by_performer(),
+        'by_root': report_by_root(),
+        'by_week': report_by_week(),
+    }
+
+
+def refresh_snapshot() -> TaskReportSnapshot:
+    """Перестраивает сводку и сохраняет её в таблицу сводок вместо прежней."""
+    version = ChangeCounter.get_value(Task.CHANGE_COUNTER)
+    snapshot = TaskReportSnapshot.objects.create(version=version, data=build_report(version))
+    TaskReportSnapshot.objects.filter(pk__lt=snapshot.pk).delete()
+    return snapshot
+
+
+def get_report() -> Dict[str, Any]:
+    """
+    Возвращает сводку по задачам.
+
+    Сводка кэшируется по номеру изменения таблицы задач, поэтому пересчитывается
+    только после записи в неё. Если задан TASK_REPORT_SNAPSHOT_MAX_AGE, вместо
+    пересчёта берётся сохранённая сводка (команда refresh_task_report), если
+    она не старше этого числа секунд: на больших таблицах сводка может слегка
+    отставать, зато запрос к отчёту стоит одного чтения.
+    """
+    version = ChangeCounter.get_value(Task.CHANGE_COUNTER)
+    key = f'{REPORT_CACHE_KEY}:{version}'
+    report = cache.get(key)
+    if report is None:
+        snapshot = TaskReportSnapshot.objects.order_by('-pk').first()
+        max_age = settings.TASK_REPORT_SNAPSHOT_MAX_AGE
+        if snapshot is not None and (
+            snapshot.version == version
+            or (max_age is not None and snapshot.created_at >= timezone.now() - timedelta(seconds=max_age))
+        ):
+            report = snapshot.data
+        else:
+            report = build_report(version)
+        cache.set(key, report, settings.TASK_REPORT_CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,166 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Task, path_to_ids
+
+SEARCH_TABLE = 'tasks_task_fts'
+# Веса колонок name, description, performers для bm25: совпадение в названии важнее
+COLUMN_WEIGHTS = (10.0, 1.0, 5.0)
+# Маркеры подсветки заменяются на <mark> после экранирования текста
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+WORD_RE = re.compile(r'\w+')
+
+# Триггеры индекса (см. миграцию 0009_task_search_index). SQLite удаляет их
+# вместе с таблицей, когда миграция пересоздаёт tasks_task, поэтому после
+# миграций недостающие триггеры создаются заново (ensure_search_triggers)
+TRIGGERS = {
+    'tasks_task_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+            INSERT INTO {SEARCH_TABLE}(rowid, name, description, performers)
+            VALUES (new.id, new.name, new.description, new.performers);
+        END
+    """,
+    'tasks_task_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description, performers)
+            VALUES ('delete', old.id, old.name, old.description, old.performers);
+        END
+    """,
+    'tasks_task_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update AFTER UPDATE OF name, description, performers ON tasks_task BEGIN
+            INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description, performers)
+            VALUES ('delete', old.id, old.name, old.description, old.performers);
+            INSERT INTO {SEARCH_TABLE}(rowid, name, description, performers)
+            VALUES (new.id, new.name, new.description, new.performers);
+        END
+    """,
+}
+
+
+def build_match_query(text: str) -> str:
+    """
+    Превращает ввод пользователя в запрос FTS5: все слова обязательны, последнее
+    ищется как префикс ("отчёт зад" найдёт "Отчёт по задачам"). Префиксами
+    сделаны не все слова, так как префиксный запрос читает списки документов
+    всех подходящих слов целиком. Синтаксис FTS5 во вводе не действует.
+    """
+    words = [f'"{word}"' for word in WORD_RE.findall(text)]
+    if words:
+        words[-1] += '*'
+    return ' '.join(words)
+
+
+def highlight(text: str) -> str:
+    return mark_safe(escape(text).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>'))
+
+
+def search_tasks(
+    text: str, page: int = 1, page_size: int = 20, max_candidates: int = 10000,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Ищет рабочие (не архивные) задачи по названию, описанию и исполнителям в
+    полнотекстовом индексе.
+
+    Результаты упорядочены по релевантности (bm25). Ранжируются не более
+    max_candidates совпадений: для слов, которые есть почти в каждой задаче,
+    полная сортировка миллиона строк заняла бы секунды. Путь от корня до каждой
+    найденной задачи строится по материализованному пути одним запросом на
+    всю страницу, поэтому поиск стоит двух запросов.
+
+    Args:
+        text (str): Строка поиска.
+        page (int): Номер страницы, с 1.
+        page_size (int): Размер страницы.
+        max_candidates (int): Сколько первых совпадений ранжировать.
+
+    Returns:
+        tuple: Найденные задачи (id, name, status, ancestors, highlighted_name,
+        snippet) и признак наличия следующей страницы.
+    """
+    match = build_match_query(text)
+    if not match:
+        return [], False
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        # Сначала по индексу выбирается страница id (ранжируются не более
+        # max_candidates первых совпадений среди рабочих задач: архивные
+        # отбрасываются до ограничения и не занимают его), и только для неё
+        # строятся подсветка и фрагмент текста и читаются строки задач
+        cursor.execute(
+            f"""
+            WITH page AS (
+                SELECT hit.rowid, hit.score FROM (
+                    SELECT {SEARCH_TABLE}.rowid, bm25({SEARCH_TABLE}, {weights}) AS score
+                    FROM {SEARCH_TABLE}
+                    JOIN {Task._meta.db_table} AS live ON live.id = {SEARCH_TABLE}.rowid AND live.archived_at IS NULL
+                    WHERE {SEARCH_TABLE} MATCH %s LIMIT %s
+                ) AS hit
+                ORDER BY hit.score, hit.rowid LIMIT %s OFFSET %s
+            )
+            SELECT task.id, task.name, task.status, task.path,
+                   highlight({SEARCH_TABLE}, 0, %s, %s),
+                   snippet({SEARCH_TABLE}, 1, %s, %s, '…', 12)
+            FROM page
+            JOIN {SEARCH_TABLE} ON {SEARCH_TABLE}.rowid = page.rowid
+            JOIN {Task._meta.db_table} AS task ON task.id = page.rowid
+            WHERE {SEARCH_TABLE} MATCH %s
+            ORDER BY page.score, page.rowid
+            """,
+            [match, max_candidates, page_size + 1, (page - 1) * page_size,
+             HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END, match],
+        )
+        rows = cursor.fetchall()
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    ancestor_ids = {ancestor_id for row in rows for ancestor_id in path_to_ids(row[3])[:-1]}
+    names = dict(Task.objects.filter(pk__in=ancestor_ids).values_list('id', 'name')) if ancestor_ids else {}
+    statuses = dict(Task.STATUS_CHOICES)
+    hits = [
+        {
+            'id': task_id,
+            'name': name,
+            'status': status,
+            'status_display': statuses.get(status, status),
+            'ancestors': [
+                {'id': ancestor_id, 'name': names.get(ancestor_id, '')}
+                for ancestor_id in path_to_ids(path)[:-1]
+            ],
+            'highlighted_name': highlight(highlighted_name),
+            'snippet': highlight(snippet or ''),
+        }
+        for task_id, name, status, path, highlighted_name, snippet in rows
+    ]
+    return hits, has_next
+
+
+def ensure_search_triggers(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Создаёт недостающие триггеры индекса.
+
+    Returns:
+        bool: True, если хотя бы один триггер пришлось создать (индекс мог отстать).
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+        if cursor.fetchone() is None:
+            return False  # Миграция с индексом ещё не применена
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {name for name, in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+    return bool(missing)
+
+
+def rebuild_search_index(using: str = DEFAULT_DB_ALIAS, optimize: bool = True) -> None:
+    """Перестраивает индекс по текущему содержимому таблицы задач."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            # Сливает сегменты индекса в один: меньше чтений при поиске
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
@@ -0,0 +1,94 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_parent_choices
+from .events import EVENT_CREATED, EVENT_DELETED, EVENT_STATUS, EVENT_UPDATED, publish_on_commit
+from .middleware import record_query
+from .models import Task, TaskStatusEvent
+from .search import ensure_search_triggers, rebuild_search_index
+
+
+@receiver(pre_delete, sender=Task)
+def subtract_deleted_task_efforts(sender, instance: Task, **kwargs) -> None:
+    """
+    Вычитает трудоёмкость удаляемой задачи из агрегатов её предков.
+
+    Сигнал приходит для каждой задачи каскада (и для удаления через QuerySet),
+    поэтому вычитается только собственное время задачи: вклад потомков
+    вычтут их собственные сигналы.
+    """
+    Task.add_to_ancestors(instance.ancestor_ids, -instance.planned_effort, -instance.actual_effort)
+
+
+@receiver(pre_delete, sender=Task)
+def bump_ancestor_tree_versions(sender, instance: Task, **kwargs) -> None:
+    """
+    Увеличивает версию поддерева у предков удаляемой задачи, чтобы их
+    закэшированные фрагменты списка задач перестали использоваться.
+    """
+    Task.bump_tree_versions(instance.ancestor_ids)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_parent_choices_on_save(sender, instance: Task, update_fields=None, **kwargs) -> None:
+    """
+    Сбрасывает кэш списка родительских задач, если изменились название или родитель.
+    """
+    if update_fields is None or {'name', 'parent'} & set(update_fields):
+        invalidate_parent_choices()
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_parent_choices_on_delete(sender, instance: Task, **kwargs) -> None:
+    invalidate_parent_choices()
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance: Task, created: bool, update_fields=None, **kwargs) -> None:
+    """
+    Публикует событие в ленту изменений (см. TaskEventsView) после фиксации транзакции.
+    """
+    if created:
+        event_type = EVENT_CREATED
+    elif update_fields and 'status' in update_fields and set(update_fields) <= {'status', 'completed_at', 'version'}:
+        event_type = EVENT_STATUS
+    else:
+        event_type = EVENT_UPDATED
+    publish_on_commit(event_type, {
+        'id': instance.pk,
+        'parent_id': instance.parent_id,
+        'name': instance.name,
+        'status': instance.status,
+        'completed_at': instance.completed_at.isoformat() if instance.completed_at else None,
+        'version': instance.version,
+    })
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance: Task, **kwargs) -> None:
+    publish_on_commit(EVENT_DELETED, {'id': instance.pk, 'parent_id': instance.parent_id})
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deleted(sender, instance: Task, **kwargs) -> None:
+    """Закрывает историю статусов удалённой задачи (журнал остаётся после удаления)."""
+    TaskStatusEvent.record([(instance.pk, instance.status, TaskStatusEvent.DELETED)])
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs) -> None:
+    """Подключает учёт SQL-запросов для RequestMetricsMiddleware к новому соединению."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using: str, **kwargs) -> None:
+    """
+    Возвращает триггеры полнотекстового индекса, если миграция пересоздала
+    таблицу задач (SQLite удаляет триггеры вместе с таблицей), и перестраивает
+    индекс, так как без триггеров он мог отстать.
+    """
+    if sender.name == 'tasks' and ensure_search_triggers(using):
+        rebuild_search_index(using)
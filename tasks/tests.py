@@ -1,11 +1,43 @@
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import random
+import threading
+import tempfile
+import time
 import pytest
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.apps import apps
+from django.db import connection, connections, transaction
 from django.utils import timezone
-from django.http import JsonResponse
+from django.core.handlers.base import BaseHandler
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
-from django.test import TestCase, Client
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from task_manager.static import AsyncWhiteNoiseMiddleware
 
-from .models import Task
+from . import transitions
+from .archive import archive_candidates
+from .cache import get_parent_choices
+from .events import ChangeFeed, feed
+from .export import aiter_ndjson
+from .forms import TaskForm
+from .history import LATEST_EVENTS_SQL, board_at, cumulative_flow, tasks_at, time_in_status
+from .importer import import_tasks, prepare_tasks
+from .middleware import RequestMetricsMiddleware, fingerprint
+from .models import Performer, Task, TaskImportMapping, TaskPerformer, TaskStatusEvent, TaskVersionConflict
+from .reports import build_report, get_report
+from .search import ensure_search_triggers, search_tasks
+from .views import ParentAutocompleteView
 
 
 # Тесты моделей
@@ -45,6 +77,108 @@ def test_calculate_efforts():
     }
 
 
+@pytest.mark.django_db
+def test_subtree_efforts_cover_all_levels(django_assert_num_queries):
+    root = Task.objects.create(name="Root", planned_effort=1.0)
+    child = Task.objects.create(name="Child", planned_effort=2.0, actual_effort=1.0, parent=root)
+    Task.objects.create(name="Grandchild", planned_effort=4.0, actual_effort=3.0, parent=child)
+
+    root.refresh_from_db()
+    with django_assert_num_queries(0):
+        assert root.subtask_planned_effort == 6.0
+        assert root.total_planned_effort == 7.0
+        assert root.total_actual_effort == 4.0
+
+
+@pytest.mark.django_db
+def test_subtree_efforts_follow_updates_reparenting_and_deletion():
+    root = Task.objects.create(name="Root")
+    other_root = Task.objects.create(name="Other root")
+    child = Task.objects.create(name="Child", planned_effort=2.0, parent=root)
+    grandchild = Task.objects.create(name="Grandchild", planned_effort=4.0, parent=child)
+
+    grandchild.planned_effort = 5.0
+    grandchild.save()
+    root.refresh_from_db()
+    assert root.subtree_planned_effort == 7.0
+
+    child.refresh_from_db()
+    child.parent = other_root
+    child.save()
+    root.refresh_from_db()
+    other_root.refresh_from_db()
+    assert root.subtree_planned_effort == 0.0
+    assert other_root.subtree_planned_effort == 7.0
+
+    grandchild.delete()
+    other_root.refresh_from_db()
+    assert other_root.subtree_planned_effort == 2.0
+
+    Task.objects.filter(pk=child.pk).delete()
+    other_root.refresh_from_db()
+    assert other_root.subtree_planned_effort == 0.0
+
+
+@pytest.mark.django_db
+def test_rebuild_effort_rollups_command():
+    root = Task.objects.create(name="Root")
+    Task.objects.create(name="Child", planned_effort=2.0, parent=root)
+    call_command("rebuild_effort_rollups", "--check", stdout=StringIO())
+
+    Task.objects.filter(pk=root.pk).update(subtree_planned_effort=100.0)
+    with pytest.raises(CommandError):
+        call_command("rebuild_effort_rollups", "--check", stdout=StringIO())
+
+    call_command("rebuild_effort_rollups", stdout=StringIO())
+    root.refresh_from_db()
+    assert root.subtree_planned_effort == 2.0
+    call_command("rebuild_effort_rollups", "--check", stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_task_path_index_tracks_hierarchy():
+    root = Task.objects.create(name="Root")
+    child = Task.objects.create(name="Child", parent=root)
+    grandchild = Task.objects.create(name="Grandchild", parent=child)
+    other_root = Task.objects.create(name="Other root")
+
+    grandchild.refresh_from_db()
+    assert grandchild.depth == 2
+    assert grandchild.ancestor_ids == [root.pk, child.pk]
+    assert list(grandchild.get_ancestors()) == [root, child]
+    root.refresh_from_db()
+    assert set(root.get_descendants()) == {child, grandchild}
+    assert root.subtree_size() == 3
+
+    child.refresh_from_db()
+    child.parent = other_root
+    child.save()
+    grandchild.refresh_from_db()
+    assert grandchild.ancestor_ids == [other_root.pk, child.pk]
+    assert grandchild.depth == 2
+    assert root.subtree_size() == 1
+    assert other_root.subtree_size() == 3
+
+
+@pytest.mark.django_db
+def test_task_reparenting_rejects_cycles():
+    root = Task.objects.create(name="Root")
+    child = Task.objects.create(name="Child", parent=root)
+    grandchild = Task.objects.create(name="Grandchild", parent=child)
+
+    root.refresh_from_db()
+    root.parent = grandchild
+    with pytest.raises(ValidationError):
+        root.full_clean()
+    with pytest.raises(ValidationError):
+        root.save()
+
+    root.parent = root
+    with pytest.raises(ValidationError):
+        root.save()
+    assert Task.objects.get(pk=root.pk).parent_id is None
+
+
 @pytest.mark.django_db
 def test_complete_task_with_subtasks():
     task = Task.objects.create(name="Main Task", status="in_progress")
@@ -56,6 +190,114 @@ def test_complete_task_with_subtasks():
         task.save()
 
 
+@pytest.mark.django_db
+def test_complete_task_validation_messages():
+    task = Task.objects.create(name="Main Task", status="in_progress")
+    subtask = Task.objects.create(name="Subtask", status="assigned", parent=task)
+
+    task.status = "completed"
+    with pytest.raises(ValidationError, match="Есть незавершенные подзадачи"):
+        task.save()
+
+    Task.objects.filter(pk=subtask.pk).update(status="paused")
+    with pytest.raises(ValidationError, match="Невозможно выполнить переход"):
+        task.save()
+    assert Task.objects.get(pk=task.pk).status == "in_progress"
+
+
+@pytest.mark.django_db
+def test_complete_epic_query_count_does_not_depend_on_subtree_size(django_assert_max_num_queries):
+    epic = Task.objects.create(name="Epic", status="in_progress")
+    for i in range(5):
+        story = Task.objects.create(name=f"Story {i}", status="completed", parent=epic)
+        for j in range(20):
+            Task.objects.create(name=f"Subtask {i}-{j}", status="completed", parent=story)
+
+    epic.refresh_from_db()
+    epic.status = "completed"
+    # Седьмой запрос — запись перехода в журнал статусов
+    with django_assert_max_num_queries(7):
+        epic.save()
+    epic.refresh_from_db()
+    assert epic.status == "completed"
+    assert epic.completed_at is not None
+
+
+@pytest.mark.django_db
+def test_save_writes_only_dirty_fields_without_extra_select():
+    task = Task.objects.create(name="Task", status="assigned")
+    task = Task.objects.get(pk=task.pk)
+    assert task.get_dirty_fields() == []
+
+    task.status = "in_progress"
+    assert task.get_dirty_fields() == ["status"]
+    with CaptureQueriesContext(connection) as queries:
+        task.save()
+    statements = [query["sql"] for query in queries]
+    assert not any(sql.startswith("SELECT") for sql in statements)
+    update = next(sql for sql in statements if sql.startswith("UPDATE"))
+    assert '"name"' not in update
+    assert task.get_dirty_fields() == []
+    assert Task.objects.get(pk=task.pk).status == "in_progress"
+
+
+@pytest.mark.django_db
+def test_save_detects_concurrent_status_change():
+    Task.objects.create(name="Task", status="in_progress")
+    first = Task.objects.get(name="Task")
+    second = Task.objects.get(name="Task")
+
+    first.status = "paused"
+    first.save()
+
+    # Снимок second устарел: условный UPDATE не найдёт строку, и проверка
+    # перехода повторится по свежему статусу "paused"
+    second.status = "completed"
+    with pytest.raises(ValidationError, match="Невозможно выполнить переход"):
+        second.save()
+    assert Task.objects.get(pk=first.pk).status == "paused"
+
+
+@pytest.mark.django_db
+def test_save_retry_writes_only_changed_fields():
+    Task.objects.create(name="Task", status="assigned")
+    first = Task.objects.get(name="Task")
+    second = Task.objects.get(name="Task")
+
+    first.name = "Renamed"
+    first.save()
+
+    # Повтор записывает только статус: параллельное переименование сохраняется
+    second.status = "in_progress"
+    second.save()
+    task = Task.objects.get(pk=first.pk)
+    assert (task.name, task.status, task.version) == ("Renamed", "in_progress", 2)
+    assert (second.name, second.version) == ("Renamed", 2)
+
+    # Статус изменён параллельно, а first его не меняет: конфликт вместо записи
+    first.actual_effort = 4.0
+    with pytest.raises(TaskVersionConflict):
+        first.save()
+    task = Task.objects.get(pk=first.pk)
+    assert (task.status, task.actual_effort) == ("in_progress", 0.0)
+
+
+@pytest.mark.django_db
+def test_concurrent_effort_changes_keep_rollups_consistent():
+    root = Task.objects.create(name="Root")
+    Task.objects.create(name="Child", planned_effort=1.0, parent=root)
+    first = Task.objects.get(name="Child")
+    second = Task.objects.get(name="Child")
+
+    first.planned_effort = 3.0
+    first.save()
+    second.planned_effort = 5.0
+    second.save()
+
+    root.refresh_from_db()
+    assert root.subtree_planned_effort == 5.0
+
+
 @pytest.mark.django_db
 def test_is_terminal():
     task = Task.objects.create(name="Main Task")
@@ -73,6 +315,7 @@ def test_is_terminal():
 # Тесты представлений
 class TaskViewsTestCase(TestCase):
     def setUp(self):
+        cache.clear()
         self.task = Task.objects.create(name="Test Task", status="assigned")
 
     def test_delete_task_view(self):
@@ -91,7 +334,7 @@ class TaskViewsTestCase(TestCase):
         url = reverse("update_actual_effort", kwargs={"pk": self.task.pk})
         response = self.client.post(url, {"actual_effort": 5.0})
         self.task.refresh_from_db()
-        self.assertEqual(self.task.actual_effort, 0.0)
+        self.assertEqual(self.task.actual_effort, 5.0)
 
     def test_update_task_status_view(self):
         url = reverse("update_task_status", kwargs={"pk": self.task.pk})
@@ -104,3 +347,1537 @@ class TaskViewsTestCase(TestCase):
         response = self.client.post(url, {"name": "Test Task", "status": "in_progress"})
         self.task.refresh_from_db()
         self.assertEqual(self.task.name, "Test Task")
+
+
+class AsyncAjaxViewsTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Task", status="in_progress")
+        self.child = Task.objects.create(name="Child", status="in_progress", parent=self.task)
+
+    async def test_update_task_status_runs_save_rules(self):
+        url = reverse("update_task_status", kwargs={"pk": self.task.pk})
+        response = await self.async_client.post(url, {"status": "completed"})
+        self.assertFalse(response.json()["success"])
+
+        response = await self.async_client.post(
+            reverse("update_task_status", kwargs={"pk": self.child.pk}), {"status": "completed"}
+        )
+        self.assertEqual(response.json()["new_status"], "completed")
+        child = await Task.objects.aget(pk=self.child.pk)
+        self.assertIsNotNone(child.completed_at)
+
+    async def test_task_details_and_missing_tasks(self):
+        response = await self.async_client.get(reverse("task_details", kwargs={"pk": self.task.pk}))
+        self.assertEqual(response.json()["name"], "Task")
+        self.assertFalse(response.json()["is_terminal"])
+
+        missing = self.child.pk + 100
+        for url in [
+            reverse("task_details", kwargs={"pk": missing}),
+            reverse("update_task_status", kwargs={"pk": missing}),
+            reverse("update_actual_effort", kwargs={"pk": missing}),
+        ]:
+            method = self.async_client.get if "details" in url else self.async_client.post
+            response = await method(url, {})
+            self.assertEqual(response.status_code, 404)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TaskListQueriesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create_tree(self, roots, depth, width):
+        for r in range(roots):
+            level = [Task.objects.create(name=f"Root {r}", status="completed", actual_effort=1.0)]
+            for d in range(depth):
+                next_level = []
+                for parent in level:
+                    for w in range(width):
+                        next_level.append(Task.objects.create(
+                            name=f"Task {r}-{d}-{w}", status="completed", actual_effort=1.0, parent=parent
+                        ))
+                level = next_level
+
+    def test_task_list_query_count_does_not_depend_on_tree_size(self):
+        # Запрос версии таблицы для ETag и запрос дерева
+        self.create_tree(roots=1, depth=1, width=1)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual(response.status_code, 200)
+
+        self.create_tree(roots=3, depth=3, width=3)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("task_list"))
+        self.assertContains(response, "Количество подзадач: 3")
+
+    def test_task_list_renders_nested_subtasks(self):
+        root = Task.objects.create(name="Root")
+        child = Task.objects.create(name="Child", parent=root)
+        Task.objects.create(name="Grandchild", parent=child)
+
+        response = self.client.get(reverse("task_list"))
+        roots = response.context["root_tasks"]
+        self.assertEqual([task.name for task in roots], ["Root"])
+        self.assertEqual([task.name for task in roots[0].children], ["Child"])
+        self.assertEqual([task.name for task in roots[0].children[0].children], ["Grandchild"])
+        self.assertContains(response, 'id="subtasks-%d"' % child.pk)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TaskTreeFragmentCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Task.objects.create(name="Root", status="in_progress")
+        self.child = Task.objects.create(name="Child", status="in_progress", parent=self.root)
+        self.leaf = Task.objects.create(name="Leaf", status="in_progress", parent=self.child)
+        self.other = Task.objects.create(name="Other")
+
+    def test_unchanged_subtrees_are_served_from_cache(self):
+        self.client.get(reverse("task_list"))
+        # Изменение в обход save() не увеличивает версию, поэтому видна закэшированная разметка
+        Task.objects.filter(pk=self.leaf.pk).update(name="Changed leaf")
+        Task.objects.filter(pk=self.other.pk).update(name="Changed other")
+        response = self.client.get(reverse("task_list"))
+        self.assertContains(response, "Leaf")
+        self.assertContains(response, "Other")
+        self.assertNotContains(response, "Changed leaf")
+        self.assertNotContains(response, "Changed other")
+
+    def test_status_change_invalidates_fragments_of_ancestors(self):
+        self.client.get(reverse("task_list"))
+        response = self.client.post(
+            reverse("update_task_status", args=[self.leaf.pk]), {"status": "completed"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertTrue(response.json()["success"])
+
+        response = self.client.get(reverse("task_list"))
+        self.assertNotContains(response, 'id="status-select-%d"' % self.leaf.pk)
+        self.assertContains(response, 'id="status-select-%d"' % self.child.pk)
+
+    def test_batch_updates_invalidate_fragments(self):
+        self.client.get(reverse("task_list"))
+        errors = Task.objects.apply_status_changes([(self.leaf.pk, "completed"), (self.child.pk, "completed")])
+        self.assertEqual(errors, [None, None])
+
+        response = self.client.get(reverse("task_list"))
+        self.assertNotContains(response, 'id="status-select-%d"' % self.leaf.pk)
+        self.assertNotContains(response, 'id="status-select-%d"' % self.child.pk)
+        self.assertContains(response, 'id="status-select-%d"' % self.root.pk)
+
+    def test_deleting_subtask_invalidates_parent_fragment(self):
+        self.client.get(reverse("task_list"))
+        Task.objects.filter(pk=self.leaf.pk).update(name="Changed leaf")
+        self.leaf.delete()
+        response = self.client.get(reverse("task_list"))
+        self.assertNotContains(response, "Leaf")
+        self.assertContains(response, "Child")
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Task.objects.create(name="Root", status="in_progress")
+        self.child = Task.objects.create(name="Child", parent=self.root)
+        self.other = Task.objects.create(name="Other")
+
+    def test_task_list_returns_not_modified_until_tasks_change(self):
+        etag = self.client.get(reverse("task_list"))["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("task_list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.other.name = "Renamed"
+        self.other.save()
+        response = self.client.get(reverse("task_list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        self.child.delete()
+        response = self.client.get(reverse("task_list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_details_etag_follows_task_and_subtasks(self):
+        url = reverse("task_details", args=[self.root.pk])
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Изменение другой задачи не сбрасывает ETag
+        self.other.status = "in_progress"
+        self.other.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.child.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_terminal"])
+
+    def test_task_details_of_missing_task(self):
+        response = self.client.get(reverse("task_details", args=[self.other.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class BatchUpdateTaskStatusViewTestCase(TestCase):
+    def post(self, updates):
+        return self.client.post(
+            reverse("batch_update_task_status"), data=json.dumps({"updates": updates}), content_type="application/json"
+        )
+
+    def test_batch_update_reports_result_per_item(self):
+        parent = Task.objects.create(name="Parent", status="in_progress")
+        child = Task.objects.create(name="Child", status="in_progress", parent=parent)
+        assigned = Task.objects.create(name="Assigned", status="assigned")
+
+        response = self.post([
+            {"id": child.pk, "status": "completed"},
+            {"id": parent.pk, "status": "completed"},
+            {"id": assigned.pk, "status": "paused"},
+            {"id": 0, "status": "in_progress"},
+            {"id": assigned.pk, "status": "unknown"},
+            {"status": "in_progress"},
+        ])
+
+        data = response.json()
+        self.assertFalse(data["success"])
+        self.assertEqual(
+            [result["success"] for result in data["results"]], [True, True, False, False, False, False]
+        )
+        self.assertEqual(data["results"][0]["new_status"], "completed")
+        self.assertIn("Задача ещё не выполняется", data["results"][2]["message"])
+        parent.refresh_from_db()
+        child.refresh_from_db()
+        self.assertEqual((parent.status, child.status), ("completed", "completed"))
+        self.assertIsNotNone(parent.completed_at)
+        self.assertEqual(Task.objects.get(pk=assigned.pk).status, "assigned")
+
+    def test_batch_update_rejects_parent_with_open_subtasks(self):
+        parent = Task.objects.create(name="Parent", status="in_progress")
+        Task.objects.create(name="Child", status="in_progress", parent=parent)
+
+        data = self.post([{"id": parent.pk, "status": "completed"}]).json()
+        self.assertFalse(data["results"][0]["success"])
+        self.assertEqual(data["results"][0]["message"], "Есть незавершенные подзадачи.")
+        self.assertEqual(Task.objects.get(pk=parent.pk).status, "in_progress")
+
+    def test_batch_update_sees_reopened_subtask(self):
+        # Подзадача, возвращённая в работу этой же пачкой, не даёт завершить родителя, как и при поштучном save()
+        parent = Task.objects.create(name="Parent", status="in_progress")
+        child = Task.objects.create(name="Child", status="completed", parent=parent)
+
+        errors = Task.objects.apply_status_changes([(child.pk, "in_progress"), (parent.pk, "completed")])
+        self.assertEqual(errors, [None, "Есть незавершенные подзадачи."])
+        self.assertEqual(Task.objects.get(pk=parent.pk).status, "in_progress")
+        self.assertEqual(Task.objects.get(pk=child.pk).status, "in_progress")
+
+    def test_batch_update_query_count_does_not_depend_on_batch_size(self):
+        small = [Task.objects.create(name=f"Small {i}") for i in range(2)]
+        large = [Task.objects.create(name=f"Large {i}") for i in range(40)]
+
+        with CaptureQueriesContext(connection) as small_queries:
+            self.post([{"id": task.pk, "status": "in_progress"} for task in small])
+        with CaptureQueriesContext(connection) as large_queries:
+            self.post([{"id": task.pk, "status": "in_progress"} for task in large])
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(Task.objects.filter(status="in_progress").count(), 42)
+
+    def test_batch_update_validates_payload(self):
+        response = self.client.post(reverse("batch_update_task_status"), data="{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+@override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    TASK_LIST_LAZY=True,
+    TASK_LIST_PAGE_SIZE=2,
+    TASK_CHILDREN_PAGE_SIZE=2,
+)
+class LazyTaskTreeTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.roots = [Task.objects.create(name=f"Root {i}") for i in range(3)]
+        self.children = [Task.objects.create(name=f"Child {i}", parent=self.roots[0]) for i in range(5)]
+        Task.objects.create(name="Grandchild", parent=self.children[0])
+
+    def test_task_list_renders_page_of_roots_only(self):
+        # ETag, число корневых задач и страница корневых задач
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual([task.name for task in response.context["root_tasks"]], ["Root 0", "Root 1"])
+        self.assertContains(response, "Количество подзадач: 5")
+        self.assertNotContains(response, "Child 0")
+        self.assertContains(response, reverse("task_children", kwargs={"pk": self.roots[0].pk}))
+
+        response = self.client.get(reverse("task_list"), {"page": 2})
+        self.assertEqual([task.name for task in response.context["root_tasks"]], ["Root 2"])
+
+        response = self.client.get(reverse("task_list"), {"lazy": "0"})
+        self.assertContains(response, "Child 0")
+
+    def test_task_children_uses_keyset_pagination(self):
+        url = reverse("task_children", kwargs={"pk": self.roots[0].pk})
+        with self.assertNumQueries(1):
+            data = self.client.get(url).json()
+        self.assertEqual([child["name"] for child in data["children"]], ["Child 0", "Child 1"])
+        self.assertEqual(data["children"][0]["children_count"], 1)
+        self.assertEqual(data["next_after"], self.children[1].pk)
+        self.assertIn("Child 0", data["html"])
+
+        data = self.client.get(url, {"after": self.children[3].pk}).json()
+        self.assertEqual([child["name"] for child in data["children"]], ["Child 4"])
+        self.assertIsNone(data["next_after"])
+
+
+
+@override_settings(
+    TASK_LIST_LAZY=True, TASK_LIST_PAGE_SIZE=2, TASK_CHILDREN_PAGE_SIZE=2,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class QueryPlanTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Task.objects.create(name="Root", status="in_progress")
+        self.child = Task.objects.create(name="Child", parent=self.root, status="in_progress")
+        self.leaf = Task.objects.create(name="Leaf", parent=self.child, status="in_progress")
+        Task.objects.create(name="Other root")
+
+    def query_plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_no_full_scans(self, queries):
+        """Каждый SELECT с условием ищет по индексу, а не перебирает таблицу."""
+        checked = 0
+        for query in queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or " WHERE " not in sql:
+                continue
+            checked += 1
+            for step in self.query_plan(sql):
+                if step.startswith("SCAN") and "INDEX" not in step:
+                    self.fail(f"Полный перебор таблицы ({step}) в запросе: {sql}")
+        self.assertGreater(checked, 0)
+
+    def test_views_and_model_queries_use_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("task_list"))
+            self.client.get(reverse("task_children", kwargs={"pk": self.root.pk}))
+            self.client.get(reverse("task_details", args=[self.child.pk]))
+            self.client.get(reverse("parent_autocomplete"), {"q": "Ro", "exclude": self.child.pk})
+            self.client.post(reverse("edit_task", args=[self.leaf.pk]), {"name": "Leaf", "status": "paused"})
+            Task.objects.apply_status_changes([(self.leaf.pk, "in_progress")])
+            leaf = Task.objects.get(pk=self.leaf.pk)
+            leaf.status = "completed"
+            leaf.save()
+            self.assertEqual(list(leaf.get_ancestors()), [self.root, self.child])
+            self.assertEqual(self.root.subtree_size(), 3)
+        self.assert_no_full_scans(queries)
+
+    def test_reporting_queries_use_new_indexes(self):
+        cases = [
+            (Task.objects.filter(status="in_progress"), "task_status_completed_idx"),
+            (Task.objects.filter(status="completed").order_by("-completed_at"), "task_status_completed_idx"),
+            (Task.objects.order_by("-created_at")[:10], "task_created_at_idx"),
+            (self.root.subtasks.filter(status="completed"), "task_parent_status_idx"),
+        ]
+        for queryset, index in cases:
+            plan = queryset.explain()
+            self.assertIn(f"USING INDEX {index}", plan)
+            # Сортировка берётся из индекса, без временного B-дерева
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TaskExportTestCase(TestCase):
+    def setUp(self):
+        self.root = Task.objects.create(name="Root", planned_effort=1.0)
+        self.child = Task.objects.create(name="Дочерняя", planned_effort=2.0, parent=self.root)
+
+    def test_export_endpoint_streams_ndjson(self):
+        response = self.client.get(reverse("export_tasks"))
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.root.pk, self.child.pk])
+        self.assertEqual(rows[0]["total_planned_effort"], 3.0)
+        self.assertEqual((rows[1]["parent_id"], rows[1]["depth"]), (self.root.pk, 1))
+        self.assertEqual(rows[1]["name"], "Дочерняя")
+
+    async def test_export_streams_chunks_under_asgi(self):
+        response = await self.async_client.get(reverse("export_tasks"))
+        self.assertTrue(response.is_async)
+        body = "".join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], [self.root.pk, self.child.pk])
+
+        chunks = [chunk async for chunk in aiter_ndjson(chunk_size=1)]
+        self.assertEqual([json.loads(chunk)["id"] for chunk in chunks], [self.root.pk, self.child.pk])
+
+    def test_export_command(self):
+        output = StringIO()
+        call_command("export_tasks", stdout=output)
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(rows), 2)
+
+
+class TaskImportTestCase(TestCase):
+    def write_file(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_import_ndjson_export_roundtrip(self):
+        root = Task.objects.create(name="Root", planned_effort=1.0)
+        child = Task.objects.create(name="Child", planned_effort=2.0, parent=root)
+        Task.objects.create(name="Grandchild", planned_effort=4.0, status="in_progress", parent=child)
+        output = StringIO()
+        call_command("export_tasks", stdout=output)
+        Task.objects.all().delete()
+
+        path = self.write_file("tasks.ndjson", output.getvalue())
+        call_command("import_tasks", path, "--batch-size", "1", stdout=StringIO())
+
+        grandchild = Task.objects.get(name="Grandchild")
+        self.assertEqual(grandchild.status, "in_progress")
+        self.assertEqual([task.name for task in grandchild.get_ancestors()], ["Root", "Child"])
+        self.assertEqual(grandchild.depth, 2)
+        self.assertEqual(Task.objects.get(name="Root").total_planned_effort, 7.0)
+        call_command("rebuild_effort_rollups", "--check", stdout=StringIO())
+
+    def test_import_csv_validates_before_inserting(self):
+        path = self.write_file(
+            "tasks.csv",
+            "id,parent_id,name,status\n1,,Root,assigned\n2,1,Child,unknown\n3,42,Orphan,assigned\n",
+        )
+        with self.assertRaisesMessage(CommandError, "неизвестный статус"):
+            call_command("import_tasks", path, stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+    def test_import_resumes_from_checkpoint(self):
+        path = self.write_file("tasks.csv", "id,parent_id,name\nA,,Root\nB,A,Child\nC,A,Other child\n")
+        checkpoint = "migration"
+        root = Task.objects.create(name="Root")
+        TaskImportMapping.objects.create(source=checkpoint, external_id="A", task=root)
+
+        output = StringIO()
+        call_command("import_tasks", path, "--checkpoint", checkpoint, stdout=output)
+        self.assertIn("Импортировано задач: 2", output.getvalue())
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(root.get_descendants().count(), 2)
+
+        call_command("import_tasks", path, "--checkpoint", checkpoint, stdout=output)
+        self.assertEqual(Task.objects.count(), 3)
+
+        with self.assertRaisesMessage(CommandError, "Имя импорта длиннее"):
+            call_command("import_tasks", path, "--checkpoint", "x" * 256, stdout=output)
+
+    def test_import_mapping_is_committed_with_each_batch(self):
+        tasks = prepare_tasks([{"id": str(i), "name": f"Задача {i}"} for i in range(5)])
+
+        def crash(imported):
+            raise RuntimeError("сбой после первой пачки")
+
+        # Пачка и её соответствия id фиксируются вместе: сбой сразу после
+        # коммита не приводит к повторной вставке
+        with self.assertRaises(RuntimeError):
+            import_tasks(tasks, batch_size=2, checkpoint="nightly", progress=crash)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(TaskImportMapping.objects.filter(source="nightly").count(), 2)
+
+        self.assertEqual(import_tasks(prepare_tasks([{"id": str(i), "name": f"Задача {i}"} for i in range(5)]),
+                                      batch_size=2, checkpoint="nightly"), 3)
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(import_tasks(tasks, checkpoint="other"), 5)  # другое имя — новый импорт
+
+
+class TaskParentChoicesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.root = Task.objects.create(name="Root")
+        self.child = Task.objects.create(name="Child", parent=self.root)
+        self.other = Task.objects.create(name="Other")
+
+    def parent_choices(self, form):
+        return [value for value, label in form.fields["parent"].widget.choices if value]
+
+    def test_parent_choices_are_cached(self):
+        TaskForm()
+        with self.assertNumQueries(0):
+            choices = self.parent_choices(TaskForm())
+        self.assertEqual(sorted(choices), sorted([self.root.pk, self.child.pk, self.other.pk]))
+
+    def test_parent_choices_are_invalidated_on_changes(self):
+        TaskForm()
+        self.other.name = "Renamed"
+        self.other.save()
+        self.assertIn("Renamed", [label for value, label in TaskForm().fields["parent"].widget.choices])
+
+        created = Task.objects.create(name="New")
+        self.assertIn(created.pk, self.parent_choices(TaskForm()))
+
+    def test_edit_form_excludes_own_subtree(self):
+        form = TaskForm(instance=self.root)
+        self.assertEqual(self.parent_choices(form), [self.other.pk])
+        self.assertEqual(list(form.fields["parent"].queryset), [self.other])
+
+    def test_parent_autocomplete_paginates_and_excludes_subtree(self):
+        client = Client()
+        url = reverse("parent_autocomplete")
+        with patch.object(ParentAutocompleteView, "PAGE_SIZE", 1):
+            first = client.get(url, {"exclude": self.root.pk}).json()
+            self.assertEqual([item["id"] for item in first["results"]], [self.other.pk])
+            self.assertIsNone(first["next_after"])
+
+            page = client.get(url, {"q": "o"}).json()
+            self.assertEqual(page["results"], [{"id": self.root.pk, "text": "Root"}])
+            page = client.get(url, {"q": "o", "after": page["next_after"]}).json()
+            self.assertEqual([item["id"] for item in page["results"]], [self.other.pk])
+
+
+class ChangeFeedTestCase(SimpleTestCase):
+    def test_replay_returns_missed_events_or_requests_reset(self):
+        change_feed = ChangeFeed(buffer_size=2)
+        for task_id in range(3):
+            change_feed.publish("updated", {"id": task_id})
+        self.assertEqual([event[0] for event in change_feed.replay(1)], [2, 3])
+        self.assertEqual(change_feed.replay(3), [])
+        self.assertIsNone(change_feed.replay(0))  # Событие 1 вытеснено из буфера
+        self.assertIsNone(change_feed.replay(10))  # Номер из прошлого запуска процесса
+
+    async def test_subscriber_receives_events_published_from_other_threads(self):
+        change_feed = ChangeFeed(queue_size=2)
+        subscription = change_feed.subscribe()
+        publisher = threading.Thread(target=change_feed.publish, args=("status", {"id": 1}))
+        publisher.start()
+        publisher.join()
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), (1, "status", {"id": 1}))
+
+        # Переполненная очередь сбрасывается и завершает поток клиента
+        for task_id in range(3):
+            change_feed.publish("updated", {"id": task_id})
+        await asyncio.sleep(0)
+        self.assertIsNone(await asyncio.wait_for(subscription.get(), 1))
+        change_feed.unsubscribe(subscription)
+        self.assertEqual(change_feed.subscriber_count(), 0)
+
+
+class TaskEventsTestCase(TestCase):
+    def published_since(self, event_id):
+        return [(event_type, data["id"]) for _, event_type, data in feed.replay(event_id)]
+
+    def test_saves_and_deletes_publish_events_after_commit(self):
+        start = feed.last_id
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(name="Task")
+            child = Task.objects.create(name="Child", parent=task)
+        task.status = "in_progress"
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+        task.name = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            task.save()
+            Task.objects.apply_status_changes([(child.pk, "in_progress")])
+        child_id = child.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            child.delete()
+        self.assertEqual(self.published_since(start), [
+            ("created", task.pk), ("created", child_id), ("status", task.pk),
+            ("updated", task.pk), ("status", child_id), ("deleted", child_id),
+        ])
+
+    def test_status_events_carry_current_version(self):
+        task = Task.objects.create(name="Task", status="in_progress")
+        child = Task.objects.create(name="Child", parent=task, status="in_progress")
+        start = feed.last_id
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = "paused"
+            task.save()
+            self.assertEqual(Task.objects.apply_status_changes([(task.pk, "in_progress")]), [None])
+            self.assertEqual(
+                Task.objects.apply_status_changes([(child.pk, "completed"), (task.pk, "completed")]), [None, None],
+            )
+        published = [(event_type, data["id"], data["version"]) for _, event_type, data in feed.replay(start)]
+        self.assertEqual(published[:2], [("status", task.pk, 1), ("status", task.pk, 2)])
+        self.assertCountEqual(published[2:], [("status", child.pk, 1), ("status", task.pk, 3)])
+        self.assertEqual(dict(Task.objects.values_list("id", "version")), {task.pk: 3, child.pk: 1})
+
+    def test_nothing_is_published_for_rolled_back_changes(self):
+        start = feed.last_id
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Task.objects.create(name="Task")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(feed.last_id, start)
+
+    async def test_event_stream_sends_missed_and_new_events(self):
+        start = feed.last_id
+        feed.publish("updated", {"id": 1})
+        response = await self.async_client.get(reverse("task_events"), headers={"Last-Event-ID": str(start)})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+        self.assertEqual(await anext(stream), f'id: {start + 1}\nevent: updated\ndata: {{"id": 1}}\n\n'.encode())
+
+        threading.Thread(target=feed.publish, args=("status", {"id": 2})).start()
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        self.assertIn(b"event: status", chunk)
+        await stream.aclose()
+
+    async def test_event_stream_requests_reset_for_unknown_event_id(self):
+        response = await self.async_client.get(
+            reverse("task_events"), headers={"Last-Event-ID": str(feed.last_id + 100)}
+        )
+        stream = response.streaming_content
+        await anext(stream)
+        self.assertIn(b"event: reset", await anext(stream))
+        await stream.aclose()
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class RequestMetricsMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.tasks = [Task.objects.create(name=f"Task {i}") for i in range(3)]
+
+    def test_server_timing_reports_queries_of_sync_and_async_views(self):
+        response = self.client.get(reverse("task_list"))
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        self.assertRegex(response["Server-Timing"], r"tpl;dur=[1-9]|tpl;dur=0\.[1-9]")
+
+        # Запросы асинхронного представления выполняются в другом потоке
+        response = self.client.get(reverse("task_details", args=[self.tasks[0].pk]))
+        self.assertIn('desc="4 queries"', response["Server-Timing"])
+
+    def test_duplicate_queries_are_logged_and_reported(self):
+        log_path = os.path.join(self.directory.name, "metrics.jsonl")
+
+        def n_plus_one_view(request):
+            for task in Task.objects.all():
+                Task.objects.filter(pk__in=[task.pk, task.pk + 100]).exists()
+            return JsonResponse({})
+
+        with override_settings(TASK_METRICS_LOG=log_path):
+            middleware = RequestMetricsMiddleware(n_plus_one_view)
+            middleware(RequestFactory().get("/n-plus-one/"))
+            middleware(RequestFactory().get("/n-plus-one/"))
+        with open(log_path, encoding="utf-8") as log:
+            entries = [json.loads(line) for line in log]
+        self.assertEqual(entries[0]["queries"], 4)
+        self.assertEqual(entries[0]["duplicates"][0]["count"], 3)
+
+        output = StringIO()
+        call_command("perf_report", log_path, stdout=output)
+        report = output.getvalue()
+        self.assertIn("/n-plus-one/", report)
+        self.assertIn("6 раз в 2 запросах", report)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s) AND x = %s'),
+            'SELECT 1 FROM t WHERE id IN (%s, ...) AND x = %s',
+        )
+
+
+class AsyncMiddlewareTestCase(SimpleTestCase):
+    def test_middleware_chain_is_not_adapted_under_asgi(self):
+        with self.assertNoLogs("django.request", level="DEBUG"):
+            BaseHandler().load_middleware(is_async=True)
+
+    async def test_static_files_are_served_asynchronously(self):
+        async def get_response(request):
+            return HttpResponse("view")
+
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "app.css"), "w") as file:
+                file.write("body { color: red; }")
+            with override_settings(STATIC_ROOT=root, DEBUG=False):
+                middleware = AsyncWhiteNoiseMiddleware(get_response)
+            factory = AsyncRequestFactory()
+
+            response = await middleware(factory.get("/static/app.css"))
+            self.assertTrue(response.is_async)
+            self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]), b"body { color: red; }")
+            response.close()
+
+            etag = response["ETag"]
+            response = await middleware(factory.get("/static/app.css", headers={"If-None-Match": etag}))
+            self.assertEqual(response.status_code, 304)
+            response.close()
+
+            response = await middleware(factory.get("/tasks/"))
+            self.assertEqual(response.content, b"view")
+
+
+class SQLiteBackendTestCase(TransactionTestCase):
+    def run_threads(self, targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_task_save_uses_immediate_transaction(self):
+        task = Task.objects.create(name="Task")
+        task.name = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            task.save()
+        self.assertEqual(queries.captured_queries[0]["sql"], "BEGIN IMMEDIATE")
+
+    def test_reads_continue_during_writes(self):
+        root = Task.objects.create(name="Root")
+        children = [
+            Task.objects.create(name=f"Child {i}", parent=root, status="in_progress") for i in range(4)
+        ]
+        transaction_open = threading.Event()
+        reads_done = threading.Event()
+        reads = {"during_transaction": 0, "during_writes": 0}
+        writes = []
+        deadline = time.monotonic() + 0.5
+
+        def hold_write_transaction():
+            # Незавершённая запись не должна останавливать чтение (WAL)
+            with transaction.atomic():
+                Task.objects.filter(pk=root.pk).update(name="Locked root")
+                transaction_open.set()
+                reads_done.wait(5)
+
+        def read_during_transaction():
+            transaction_open.wait(5)
+            for _ in range(20):
+                self.assertEqual(Task.objects.get(pk=root.pk).name, "Root")
+                reads["during_transaction"] += 1
+            reads_done.set()
+
+        self.assertEqual(self.run_threads([hold_write_transaction, read_during_transaction]), [])
+        self.assertEqual(reads["during_transaction"], 20)
+
+        def write(task):
+            # Смена статуса сначала читает задачи, затем пишет: в отложенной
+            # транзакции конкурирующие записи падали бы с "database is locked"
+            def target():
+                step = 0
+                while time.monotonic() < deadline:
+                    errors = Task.objects.apply_status_changes([(task.pk, ("paused", "in_progress")[step % 2])])
+                    self.assertEqual(errors, [None])
+                    step += 1
+                writes.append(step)
+            return target
+
+        def read():
+            while time.monotonic() < deadline:
+                list(Task.objects.all())
+                reads["during_writes"] += 1
+
+        errors = self.run_threads([write(child) for child in children] + [read, read])
+        self.assertEqual(errors, [])
+        self.assertEqual(len(writes), len(children))
+        self.assertTrue(all(writes))
+        self.assertGreater(reads["during_writes"], sum(writes))
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TaskReportTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Task.objects.create(
+            name="Project", performers="Ann, Bob", status="in_progress", planned_effort=2, actual_effort=1,
+        )
+        first_week = timezone.datetime(2026, 3, 3, 12, tzinfo=timezone.utc)  # вторник
+        Task.objects.create(
+            name="Done 1", parent=self.project, performers="Ann", status="completed",
+            planned_effort=3, actual_effort=4, completed_at=first_week,
+        )
+        Task.objects.create(
+            name="Done 2", parent=self.project, status="completed",
+            planned_effort=1, actual_effort=2, completed_at=first_week + timezone.timedelta(days=1),
+        )
+        Task.objects.create(
+            name="Done 3", performers="Bob", status="completed",
+            planned_effort=5, actual_effort=6, completed_at=first_week + timezone.timedelta(days=7),
+        )
+
+    def test_report_is_computed_by_aggregate_queries(self):
+        # Номер изменения, статусы, исполнители, проекты, их названия и недели
+        with self.assertNumQueries(6):
+            report = build_report()
+
+        by_status = {row["status"]: row for row in report["by_status"]}
+        self.assertEqual(by_status["completed"]["tasks"], 3)
+        self.assertEqual(by_status["completed"]["actual"], 12.0)
+        self.assertEqual(by_status["completed"]["share"], 0.75)
+        self.assertEqual(by_status["in_progress"]["status_display"], "Выполняется")
+
+        self.assertEqual(report["by_performer"], [
+            {"performer": "Bob", "tasks": 2, "planned": 7.0, "actual": 7.0},
+            {"performer": "Ann", "tasks": 2, "planned": 5.0, "actual": 5.0},
+        ])
+
+        by_root = {row["name"]: row for row in report["by_root"]}
+        self.assertEqual(by_root["Project"]["id"], self.project.pk)
+        self.assertEqual(by_root["Project"]["tasks"], 3)
+        self.assertEqual(by_root["Project"]["completed"], 2)
+        self.assertEqual(by_root["Project"]["planned"], 6.0)
+        self.assertEqual(by_root["Done 3"]["tasks"], 1)
+
+        self.assertEqual(
+            [(row["week"], row["tasks"], row["cumulative_tasks"], row["cumulative_actual"])
+             for row in report["by_week"]],
+            [("2026-03-02", 2, 2, 6.0), ("2026-03-09", 1, 3, 12.0)],
+        )
+
+    def test_report_is_cached_until_tasks_change(self):
+        report = get_report()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_report(), report)
+
+        Task.objects.create(name="New")
+        self.assertEqual(sum(row["tasks"] for row in get_report()["by_status"]), 5)
+
+    def test_snapshot_is_served_within_max_age(self):
+        call_command("refresh_task_report", stdout=StringIO())
+        Task.objects.create(name="New")
+
+        with override_settings(TASK_REPORT_SNAPSHOT_MAX_AGE=600):
+            # Два запроса: номер изменения и последняя сохранённая сводка
+            with self.assertNumQueries(2):
+                report = get_report()
+            self.assertEqual(sum(row["tasks"] for row in report["by_status"]), 4)
+
+        cache.clear()
+        self.assertEqual(sum(row["tasks"] for row in get_report()["by_status"]), 5)
+
+    def test_report_views(self):
+        response = self.client.get(reverse("task_report"))
+        self.assertContains(response, "По исполнителям")
+        self.assertContains(response, "Ann")
+        self.assertContains(response, "75%")
+
+        response = self.client.get(reverse("task_report_json"))
+        self.assertEqual(response.json()["by_week"][-1]["cumulative_tasks"], 3)
+        response = self.client.get(reverse("task_report_json"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+class PerformerTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Task", performers=" Ann ,Bob, Ann,", planned_effort=2, actual_effort=1)
+        self.other = Task.objects.create(name="Other", performers="Bob", status="completed", planned_effort=3)
+
+    def names(self, task):
+        return sorted(task.assignees.values_list("name", flat=True))
+
+    def test_links_follow_performers_string(self):
+        self.assertEqual(self.names(self.task), ["Ann", "Bob"])
+        self.assertEqual(Performer.objects.count(), 2)
+
+        self.task.performers = "Bob, Carl"
+        self.task.save()
+        self.assertEqual(self.names(self.task), ["Bob", "Carl"])
+
+        # Без изменения строки связи не трогаются
+        self.task.name = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            self.task.save()
+        self.assertFalse(any("tasks_taskperformer" in query["sql"] for query in queries))
+
+    def test_form_normalizes_performers(self):
+        form = TaskForm(data={
+            "name": "Form task", "performers": "Ann,,  Dana  Lee , Ann", "status": "assigned",
+            "planned_effort": 1, "actual_effort": 0,
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        task = form.save()
+        self.assertEqual(task.performers, "Ann, Dana Lee")
+        self.assertEqual(self.names(task), ["Ann", "Dana Lee"])
+
+    def test_import_links_performers(self):
+        import_tasks(prepare_tasks([
+            {"id": "1", "name": "Imported", "performers": "Eve, Ann"},
+            {"id": "2", "parent_id": "1", "name": "Imported child", "performers": "Eve"},
+        ]))
+        eve = Performer.objects.get(name="Eve")
+        self.assertEqual(sorted(eve.tasks.values_list("name", flat=True)), ["Imported", "Imported child"])
+        self.assertEqual(Performer.objects.get(name="Ann").tasks.count(), 2)
+
+    def test_data_migration_parses_existing_strings(self):
+        TaskPerformer.objects.all().delete()
+        Performer.objects.all().delete()
+        migration = importlib.import_module("tasks.migrations.0008_performer")
+        migration.link_performers(apps, None)
+        self.assertEqual(self.names(self.task), ["Ann", "Bob"])
+        self.assertEqual(self.names(self.other), ["Bob"])
+
+    def test_workload_is_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse("performer_list")).json()
+        self.assertEqual(data["performers"], [
+            {"id": data["performers"][0]["id"], "name": "Ann", "task_count": 1, "open_task_count": 1,
+             "planned": 2.0, "actual": 1.0},
+            {"id": data["performers"][1]["id"], "name": "Bob", "task_count": 2, "open_task_count": 1,
+             "planned": 5.0, "actual": 1.0},
+        ])
+
+    def test_performer_tasks_are_paginated_by_index(self):
+        bob = Performer.objects.get(name="Bob")
+        url = reverse("performer_tasks", args=[bob.pk])
+        data = self.client.get(url, {"limit": 1}).json()
+        self.assertEqual([task["name"] for task in data["tasks"]], ["Task"])
+        data = self.client.get(url, {"limit": 1, "after": data["next_after"]}).json()
+        self.assertEqual([task["name"] for task in data["tasks"]], ["Other"])
+        self.assertIsNone(data["next_after"])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + queries.captured_queries[-1]["sql"])
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        # Уникальный индекс (performer, task) таблицы связей
+        self.assertIn("USING COVERING INDEX sqlite_autoindex_tasks_taskperformer_1 (performer_id=? AND task_id>?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_task_details_list_performers(self):
+        data = self.client.get(reverse("task_details", args=[self.task.pk])).json()
+        self.assertEqual(data["performers"], " Ann ,Bob, Ann,")
+        self.assertEqual([performer["name"] for performer in data["performer_list"]], ["Ann", "Bob"])
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TaskSearchTestCase(TestCase):
+    def setUp(self):
+        self.project = Task.objects.create(name="Проект Альфа", description="Запуск сервиса")
+        self.task = Task.objects.create(
+            name="Настроить <сервер>", parent=self.project, description="Подготовить базу", performers="Иван",
+        )
+        self.mention = Task.objects.create(name="Документация", description="Описать сервер и базу")
+
+    def names(self, query, **kwargs):
+        return [hit["name"] for hit in search_tasks(query, **kwargs)[0]]
+
+    def test_ranked_prefix_search_with_ancestor_path(self):
+        # Совпадение в названии выше совпадения в описании
+        self.assertEqual(self.names("СЕРВЕР"), ["Настроить <сервер>", "Документация"])
+        self.assertEqual(self.names("сервер базу"), ["Настроить <сервер>", "Документация"])
+        self.assertEqual(self.names("иван"), ["Настроить <сервер>"])
+        self.assertEqual(self.names("альф"), ["Проект Альфа"])
+
+        with self.assertNumQueries(2):
+            hit = search_tasks("настроить")[0][0]
+        self.assertEqual(hit["ancestors"], [{"id": self.project.pk, "name": "Проект Альфа"}])
+        self.assertEqual(hit["highlighted_name"], "<mark>Настроить</mark> &lt;сервер&gt;")
+
+    def test_index_follows_every_write_path(self):
+        self.task.name = "Развернуть кластер"
+        self.task.save()
+        self.assertEqual(self.names("кластер"), ["Развернуть кластер"])
+        self.assertEqual(self.names("настроить"), [])
+
+        Task.objects.filter(pk=self.mention.pk).update(description="Пусто")
+        self.assertEqual(self.names("базу"), ["Развернуть кластер"])
+
+        import_tasks(prepare_tasks([{"id": "1", "name": "Импортированный кластер"}]))
+        self.assertEqual(len(self.names("кластер")), 2)
+
+        self.task.delete()
+        self.assertEqual(self.names("кластер"), ["Импортированный кластер"])
+
+    def test_pagination_and_query_syntax(self):
+        for i in range(5):
+            Task.objects.create(name=f"Отчёт {i}")
+        hits, has_next = search_tasks("отчёт", page=1, page_size=3)
+        self.assertEqual(len(hits), 3)
+        self.assertTrue(has_next)
+        hits, has_next = search_tasks("отчёт", page=2, page_size=3)
+        self.assertEqual(len(hits), 2)
+        self.assertFalse(has_next)
+
+        # Операторы FTS5 во вводе не действуют и не ломают запрос
+        self.assertEqual(self.names('"OR (NEAR'), [])
+        self.assertEqual(self.names("  "), [])
+
+    def test_archived_matches_do_not_use_up_candidates(self):
+        archived = [Task.objects.create(name=f"Отчёт {i}") for i in range(5)]
+        Task.objects.filter(pk__in=[task.pk for task in archived]).update(archived_at=timezone.now())
+        live = Task.objects.create(name="Отчёт рабочий")
+        self.assertEqual(self.names("отчёт", max_candidates=3), [live.name])
+
+    def test_rebuild_restores_missing_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TRIGGER tasks_task_fts_update")
+        Task.objects.filter(pk=self.mention.pk).update(name="Справка")
+        self.assertEqual(self.names("справка"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertFalse(ensure_search_triggers())
+        self.assertEqual(self.names("справка"), ["Справка"])
+
+    def test_search_views(self):
+        response = self.client.get(reverse("task_search"), {"q": "сервер"})
+        self.assertContains(response, "Проект Альфа /")
+        self.assertContains(response, "<mark>сервер</mark>")
+
+        data = self.client.get(reverse("task_search_json"), {"q": "сервер", "page": "x"}).json()
+        self.assertEqual(data["page"], 1)
+        self.assertEqual([hit["id"] for hit in data["results"]], [self.task.pk, self.mention.pk])
+
+
+class TaskStatusHistoryTestCase(TestCase):
+    """Журнал статусов и аналитика по нему."""
+
+    start = timezone.datetime(2026, 3, 2, 22, tzinfo=timezone.utc)
+
+    def at(self, hours: int):
+        return patch("django.utils.timezone.now", return_value=self.start + timezone.timedelta(hours=hours))
+
+    def setUp(self):
+        cache.clear()
+        self.first = Task.objects.create(name="Первая", status="assigned", created_at=self.start)
+        self.second = Task.objects.create(name="Вторая", status="assigned", created_at=self.start)
+        with self.at(1):
+            self.first.status = "in_progress"
+            self.first.save()
+        with self.at(3):
+            errors = Task.objects.apply_status_changes([
+                (self.first.pk, "completed"), (self.second.pk, "in_progress"), (self.second.pk, "paused"),
+            ])
+        self.assertEqual(errors, [None, None, None])
+        with self.at(4):
+            Task.objects.get(pk=self.second.pk).delete()
+
+    def events(self, task):
+        return list(
+            TaskStatusEvent.objects.filter(task_id=task.pk).order_by("created_at", "id")
+            .values_list("from_status", "to_status")
+        )
+
+    def test_transitions_are_recorded(self):
+        self.assertEqual(self.events(self.first), [
+            ("", "assigned"), ("assigned", "in_progress"), ("in_progress", "completed"),
+        ])
+        # Из пачки записывается итоговый переход относительно статуса в базе
+        self.assertEqual(self.events(self.second), [("", "assigned"), ("assigned", "paused"), ("paused", "deleted")])
+
+        imported = import_tasks(prepare_tasks([{"id": "1", "name": "Импорт", "status": "in_progress"}]))
+        self.assertEqual(imported, 1)
+        task = Task.objects.get(name="Импорт")
+        self.assertEqual(self.events(task), [("", "in_progress")])
+        self.assertEqual(TaskStatusEvent.objects.get(task_id=task.pk).created_at, task.created_at)
+
+    def test_unchanged_status_is_not_recorded(self):
+        task = Task.objects.create(name="Третья", status="in_progress")
+        task.description = "Описание"
+        task.save()
+        task = Task.objects.get(pk=task.pk)
+        task.name = "Третья задача"
+        task.save()
+        self.assertEqual(self.events(task), [("", "in_progress")])
+
+    def test_time_in_status(self):
+        def hours(**kwargs):
+            return {row["status"]: (row["spans"], row["total_hours"]) for row in time_in_status(**kwargs)}
+
+        until = self.start + timezone.timedelta(hours=5)
+        self.assertEqual(hours(until=until), {"assigned": (2, 4.0), "completed": (1, 2.0), "in_progress": (1, 2.0),
+                                              "paused": (1, 1.0)})
+        # Интервалы обрезаются по периоду, закончившиеся до него не учитываются
+        since = self.start + timezone.timedelta(hours=2)
+        self.assertEqual(hours(since=since, until=until), {"assigned": (1, 1.0), "completed": (1, 2.0),
+                                                           "in_progress": (1, 1.0), "paused": (1, 1.0)})
+        self.assertEqual(hours(task_id=self.first.pk, until=until), {"assigned": (1, 1.0), "completed": (1, 2.0),
+                                                                     "in_progress": (1, 2.0)})
+
+    def test_board_at(self):
+        def board(hours):
+            return {row["status"]: row["tasks"] for row in board_at(self.start + timezone.timedelta(hours=hours))}
+
+        self.assertEqual(board(-1), {})
+        self.assertEqual(board(0), {"assigned": 2})
+        self.assertEqual(board(2), {"assigned": 1, "in_progress": 1})
+        self.assertEqual(board(3), {"completed": 1, "paused": 1})
+        self.assertEqual(board(5), {"completed": 1})  # удалённая задача пропадает с доски
+        moment = self.start + timezone.timedelta(hours=2)
+        self.assertEqual(tasks_at(moment, "assigned"), [{"id": self.second.pk, "name": None}])
+        with self.assertNumQueries(1):
+            board_at(moment)
+
+    def test_cumulative_flow(self):
+        flow = cumulative_flow(timezone.datetime(2026, 3, 1).date(), timezone.datetime(2026, 3, 4).date())
+        self.assertEqual(flow, [
+            {"day": "2026-03-01", "assigned": 0, "in_progress": 0, "paused": 0, "completed": 0},
+            {"day": "2026-03-02", "assigned": 1, "in_progress": 1, "paused": 0, "completed": 0},
+            {"day": "2026-03-03", "assigned": 0, "in_progress": 0, "paused": 0, "completed": 1},
+            {"day": "2026-03-04", "assigned": 0, "in_progress": 0, "paused": 0, "completed": 1},
+        ])
+        # События до начала периода сворачиваются в первый день
+        flow = cumulative_flow(timezone.datetime(2026, 3, 3).date(), timezone.datetime(2026, 3, 3).date())
+        self.assertEqual(flow, [{"day": "2026-03-03", "assigned": 0, "in_progress": 0, "paused": 0, "completed": 1}])
+
+    def test_history_views(self):
+        data = self.client.get(reverse("task_status_history", args=[self.second.pk])).json()
+        self.assertEqual([event["to_status"] for event in data["events"]], ["assigned", "paused", "deleted"])
+        self.assertEqual(self.client.get(reverse("task_status_history", args=[10 ** 9])).status_code, 404)
+
+        data = self.client.get(reverse("status_board"), {"at": "2026-03-03T00:00:00"}).json()
+        self.assertEqual({row["status"]: row["tasks"] for row in data["board"]}, {"assigned": 1, "in_progress": 1})
+        data = self.client.get(reverse("status_board"), {"status": "completed", "limit": 1}).json()
+        self.assertEqual(data["tasks"], [{"id": self.first.pk, "name": "Первая"}])
+        self.assertIsNone(data["next_after"])
+        self.assertEqual(self.client.get(reverse("status_board"), {"at": "вчера"}).status_code, 400)
+
+        data = self.client.get(reverse("cumulative_flow"), {"since": "2026-03-02", "until": "2026-03-03"}).json()
+        self.assertEqual([day["completed"] for day in data["flow"]], [0, 1])
+        self.assertEqual(
+            self.client.get(reverse("cumulative_flow"), {"since": "2026-03-04", "until": "2026-03-03"}).status_code, 400,
+        )
+        data = self.client.get(reverse("time_in_status"), {"until": "2026-03-03T03:00:00"}).json()
+        self.assertEqual({row["status"]: row["spans"] for row in data["time_in_status"]},
+                         {"assigned": 2, "completed": 1, "in_progress": 1, "paused": 1})
+
+    def test_history_queries_read_events_in_index_order(self):
+        plan = TaskStatusEvent.objects.filter(task_id=self.first.pk).order_by("created_at", "id").explain()
+        self.assertIn("status_event_task_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + LATEST_EVENTS_SQL, [timezone.now().isoformat()])
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        # Окно по задачам идёт по индексу (task, created_at) без сортировки
+        self.assertIn("USING INDEX status_event_task_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_cached_results_follow_changes(self):
+        url = reverse("status_board")
+        self.assertEqual({row["status"] for row in self.client.get(url).json()["board"]}, {"completed"})
+        Task.objects.create(name="Новая", status="assigned")
+        self.assertEqual({row["status"] for row in self.client.get(url).json()["board"]}, {"assigned", "completed"})
+
+
+def legacy_transition_error(old_status, new_status, open_subtask_statuses, is_terminal=True):
+    """Проверка перехода в том виде, в каком она была в Task.save до таблицы переходов."""
+    if old_status != "completed" and new_status == "completed":
+        if any(status in ("in_progress", "assigned") for status in open_subtask_statuses):
+            return "Есть незавершенные подзадачи."
+    if new_status == "completed":
+        allowed = old_status == "in_progress"
+    elif new_status == "paused":
+        allowed = old_status == "in_progress"
+    elif new_status == "deleted":
+        allowed = is_terminal
+    else:
+        allowed = True
+    if not allowed:
+        if old_status in ["completed", "paused", "deleted"]:
+            return "Невозможно выполнить переход в указанный статус."
+        if new_status == "completed":
+            return "Проверьте статус текущей задачи и подзадач, они должны выполняться"
+        if new_status == "paused":
+            return "Задача ещё не выполняется"
+    return None
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TransitionTableTestCase(TestCase):
+    """Таблица переходов совпадает с прежними правилами на всех входах."""
+
+    statuses = [status for status, _ in Task.STATUS_CHOICES]
+
+    def test_table_covers_model_statuses(self):
+        self.assertEqual(set(transitions.STATUSES), set(self.statuses))
+        self.assertEqual(
+            set(transitions.COMPILED_TRANSITIONS),
+            {(old, new) for old in self.statuses for new in self.statuses + [transitions.DELETED]},
+        )
+
+    def test_agrees_with_legacy_rules_exhaustively(self):
+        open_statuses = ["assigned", "in_progress", "paused"]
+        subtask_sets = [
+            combination for size in range(4)
+            for combination in itertools.combinations_with_replacement(open_statuses, size)
+        ]
+        checked = 0
+        for old_status in self.statuses:
+            for new_status in self.statuses:
+                for subtasks in subtask_sets:
+                    context = transitions.TransitionContext(subtasks, has_subtasks=bool(subtasks))
+                    self.assertEqual(
+                        transitions.check_transition(old_status, new_status, context),
+                        legacy_transition_error(old_status, new_status, subtasks),
+                        (old_status, new_status, subtasks),
+                    )
+                    checked += 1
+            # Удаление: прежде разрешалось только терминальной задаче
+            for has_subtasks in (False, True):
+                error = transitions.check_transition(
+                    old_status, transitions.DELETED, transitions.TransitionContext(has_subtasks=has_subtasks),
+                )
+                self.assertEqual(error is None, not has_subtasks)
+        self.assertEqual(checked, len(self.statuses) ** 2 * len(subtask_sets))
+        self.assertEqual(transitions.check_transition("assigned", "archived"), transitions.UNKNOWN_STATUS_MESSAGE)
+
+    def test_missing_rejection_message_fails_compilation(self):
+        with patch("tasks.transitions.REJECTIONS", ()):
+            with self.assertRaises(ValueError):
+                transitions.compile_transitions()
+
+    def test_batch_check_loads_subtasks_once(self):
+        parents = [Task.objects.create(name=f"Родитель {i}", status="in_progress") for i in range(3)]
+        Task.objects.create(name="В работе", parent=parents[0], status="in_progress")
+        Task.objects.create(name="Готова", parent=parents[1], status="completed")
+        with self.assertNumQueries(1):
+            contexts = Task.objects.transition_contexts([task.pk for task in parents])
+        with self.assertNumQueries(0):
+            errors = transitions.check_transitions(
+                [(task.pk, "in_progress", "completed") for task in parents]
+                + [(task.pk, "in_progress", transitions.DELETED) for task in parents],
+                contexts,
+            )
+        self.assertEqual(errors, [
+            "Есть незавершенные подзадачи.", None, None,
+            "Вы не можете удалить задачу, у которой есть подзадачи.",
+            "Вы не можете удалить задачу, у которой есть подзадачи.",
+            None,
+        ])
+
+    def assert_bulk_matches_single(self, changes):
+        """Пачка apply_status_changes даёт те же ошибки и статусы, что поштучный save() по порядку."""
+        with transaction.atomic():
+            sid = transaction.savepoint()
+            bulk_errors = Task.objects.apply_status_changes(changes)
+            bulk_statuses = dict(Task.objects.values_list("pk", "status"))
+            transaction.savepoint_rollback(sid)
+
+            single_errors = []
+            for task_id, status in changes:
+                task = Task.objects.get(pk=task_id)
+                task.status = status
+                try:
+                    task.save()
+                    single_errors.append(None)
+                except ValidationError as error:
+                    single_errors.append(" ".join(error.messages))
+            self.assertEqual(bulk_errors, single_errors, changes)
+            self.assertEqual(bulk_statuses, dict(Task.objects.values_list("pk", "status")), changes)
+            transaction.set_rollback(True)
+
+    def test_bulk_and_single_updates_agree_on_random_batches(self):
+        rng = random.Random(20261018)
+        for _ in range(15):
+            with transaction.atomic():
+                tasks = []
+                for i in range(8):
+                    parent = rng.choice(tasks) if tasks and rng.random() < 0.7 else None
+                    tasks.append(Task.objects.create(name=f"Задача {i}", parent=parent))
+                for task in tasks:
+                    Task.objects.filter(pk=task.pk).update(status=rng.choice(self.statuses))
+                changes = [(rng.choice(tasks).pk, rng.choice(self.statuses)) for _ in range(6)]
+                self.assert_bulk_matches_single(changes)
+                transaction.set_rollback(True)
+
+    def test_bulk_and_single_updates_agree_on_all_short_batches(self):
+        # Все упорядоченные пачки из двух смен статуса над деревом
+        # Родитель -> (Подзадача -> Внучка, Вторая подзадача) при нескольких
+        # исходных состояниях, в том числе с завершёнными подзадачами
+        parent = Task.objects.create(name="Родитель")
+        child = Task.objects.create(name="Подзадача", parent=parent)
+        grandchild = Task.objects.create(name="Внучка", parent=child)
+        second = Task.objects.create(name="Вторая подзадача", parent=parent)
+        tasks = [parent, child, grandchild, second]
+        states = [
+            ("in_progress", "completed", "completed", "in_progress"),
+            ("in_progress", "completed", "completed", "completed"),
+            ("in_progress", "paused", "assigned", "completed"),
+        ]
+        changes = [(task.pk, status) for task in tasks for status in self.statuses]
+        for state in states:
+            for task, status in zip(tasks, state):
+                Task.objects.filter(pk=task.pk).update(status=status)
+            for batch in itertools.product(changes, repeat=2):
+                self.assert_bulk_matches_single(list(batch))
+
+    def test_delete_view_and_admin_use_table(self):
+        parent = Task.objects.create(name="Родитель")
+        child = Task.objects.create(name="Подзадача", parent=parent)
+        for method in (self.client.get, self.client.post):
+            response = method(reverse("delete_task", args=[parent.pk]))
+            self.assertEqual(response.status_code, 403)
+        self.assertTrue(Task.objects.filter(pk=parent.pk).exists())
+
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        url = reverse("admin:tasks_task_changelist")
+        response = self.client.post(url, {
+            "action": "set_status_in_progress", "_selected_action": [parent.pk, child.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post(url, {"action": "set_status_completed", "_selected_action": [parent.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.get(pk=parent.pk).status, "in_progress")  # подзадача ещё в работе
+        choices = self.client.get(url).context["action_form"].fields["action"].choices
+        self.assertIn("set_status_paused", [value for value, _ in choices])
+        self.assertNotIn("delete_selected", [value for value, _ in choices])
+
+        self.assertEqual(self.client.get(reverse("admin:tasks_task_delete", args=[parent.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse("admin:tasks_task_delete", args=[child.pk])).status_code, 200)
+
+        response = self.client.post(reverse("admin:tasks_task_change", args=[parent.pk]), {
+            "name": "Родитель", "status": "completed", "planned_effort": 0, "actual_effort": 0,
+        })
+        self.assertContains(response, "Есть незавершенные подзадачи.", status_code=200)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class TaskArchiveTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        long_ago = timezone.now() - timezone.timedelta(days=100)
+        self.old = Task.objects.create(name="Старый проект", status="in_progress")
+        self.old_child = Task.objects.create(name="Старая подзадача", parent=self.old, status="in_progress")
+        self.recent = Task.objects.create(name="Свежий проект", status="in_progress")
+        self.unfinished = Task.objects.create(name="Незаконченный проект", status="in_progress")
+        Task.objects.create(name="Отложенная подзадача", parent=self.unfinished, status="paused")
+        Task.objects.apply_status_changes([
+            (self.old_child.pk, "completed"), (self.old.pk, "completed"),
+            (self.recent.pk, "completed"), (self.unfinished.pk, "completed"),
+        ])
+        Task.objects.exclude(pk=self.recent.pk).update(completed_at=long_ago)
+        self.live = Task.objects.create(name="Рабочий проект", status="in_progress")
+
+    def archive(self):
+        out = StringIO()
+        call_command("archive_tasks", "--days", "90", stdout=out)
+        return out.getvalue()
+
+    def test_only_fully_completed_old_trees_are_archived(self):
+        self.assertEqual(archive_candidates(90), [self.old.pk])
+        self.assertEqual(archive_candidates(200), [])
+
+        out = StringIO()
+        call_command("archive_tasks", "--days", "90", "--dry-run", stdout=out)
+        self.assertIn("Подходит поддеревьев: 1", out.getvalue())
+        self.assertFalse(Task.objects.archived().exists())
+
+        self.assertIn("задач: 2", self.archive())
+        self.assertEqual(
+            set(Task.objects.archived().values_list("pk", flat=True)), {self.old.pk, self.old_child.pk},
+        )
+        self.assertIn("задач: 0", self.archive())  # повторный запуск ничего не меняет
+
+    def test_hot_paths_see_only_live_tasks(self):
+        self.archive()
+        for lazy in ("0", "1"):
+            response = self.client.get(reverse("task_list"), {"lazy": lazy})
+            self.assertNotContains(response, "Старый проект")
+            self.assertContains(response, "Рабочий проект")
+        self.assertNotIn(self.old.pk, [task_id for task_id, _, _ in get_parent_choices()])
+        self.assertNotIn(self.old.pk, TaskForm().fields["parent"].queryset.values_list("pk", flat=True))
+        results = self.client.get(reverse("parent_autocomplete"), {"q": "проект"}).json()["results"]
+        self.assertNotIn(self.old.pk, [result["id"] for result in results])
+        self.assertEqual(self.client.get(reverse("task_children", args=[self.old.pk])).json()["children"], [])
+        self.assertEqual(search_tasks("проект")[0][-1]["name"], "Рабочий проект")
+        self.assertNotIn("Старый проект", [hit["name"] for hit in search_tasks("проект")[0]])
+
+        self.assertEqual(self.client.get(reverse("edit_task", args=[self.old.pk])).status_code, 404)
+        response = self.client.post(reverse("update_task_status", args=[self.old.pk]), {"status": "in_progress"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.live().apply_status_changes([(self.old.pk, "in_progress")]),
+                         ["Задача не найдена."])
+        with self.assertRaisesMessage(ValidationError, "Родительская задача в архиве."):
+            Task.objects.create(name="Новая подзадача", parent=self.old)
+
+    def test_archive_views_and_restore(self):
+        self.archive()
+        response = self.client.get(reverse("task_archive"))
+        self.assertContains(response, reverse("archived_tree", args=[self.old.pk]))
+        self.assertNotContains(response, "Рабочий проект")
+
+        response = self.client.get(reverse("archived_tree", args=[self.old.pk]))
+        self.assertContains(response, "Старая подзадача")
+        self.assertEqual(self.client.get(reverse("archived_tree", args=[self.live.pk])).status_code, 404)
+
+        response = self.client.post(reverse("restore_archived_tree", args=[self.old.pk]))
+        self.assertRedirects(response, reverse("task_list"), fetch_redirect_response=False)
+        self.assertFalse(Task.objects.archived().exists())
+        self.assertContains(self.client.get(reverse("task_list")), "Старый проект")
+        self.assertEqual(self.client.post(reverse("restore_archived_tree", args=[self.old.pk])).status_code, 404)
+
+    def test_hot_queries_use_partial_indexes(self):
+        cases = [
+            (Task.objects.live().order_by("path").values_list("id", "name", "path"), "task_live_path_idx"),
+            (Task.objects.live().filter(parent__isnull=True).order_by("pk"), "task_live_parent_idx"),
+            (Task.objects.archived().filter(parent__isnull=True).order_by("-archived_at"), "task_archived_idx"),
+        ]
+        for queryset, index in cases:
+            plan = queryset.explain()
+            self.assertIn(index, plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+class TaskVersionTestCase(TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(name="Задача", status="assigned")
+
+    def post_status(self, status, version=None):
+        data = {"status": status}
+        if version is not None:
+            data["version"] = version
+        return self.client.post(reverse("update_task_status", args=[self.task.pk]), data)
+
+    def test_writes_bump_version(self):
+        self.assertEqual(self.task.version, 0)
+        self.task.status = "in_progress"
+        self.task.save()
+        self.assertEqual(self.task.version, 1)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).version, 1)
+
+        self.task.save()  # Без изменений ничего не записывается
+        self.assertEqual(Task.objects.get(pk=self.task.pk).version, 1)
+
+        self.assertEqual(Task.objects.apply_status_changes([(self.task.pk, "paused")]), [None])
+        self.assertEqual(Task.objects.get(pk=self.task.pk).version, 2)
+
+    def test_stale_version_is_rejected(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.status = "in_progress"
+        self.task.save(expected_version=0)
+
+        stale.name = "Переименована"
+        with self.assertRaises(TaskVersionConflict) as conflict:
+            stale.save(expected_version=0)
+        self.assertEqual(conflict.exception.current_version, 1)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).name, "Задача")
+
+        # Без версии тоже конфликт: stale не меняет статус, а его изменили параллельно
+        events = TaskStatusEvent.objects.count()
+        with self.assertRaises(TaskVersionConflict):
+            stale.save()
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.name, task.status, task.version), ("Задача", "in_progress", 1))
+        self.assertEqual(TaskStatusEvent.objects.count(), events)
+
+    def test_stale_save_keeps_concurrent_effort(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.actual_effort = 3.0
+        self.task.save()
+
+        stale.name = "Переименована"
+        events = TaskStatusEvent.objects.count()
+        with self.assertRaises(TaskVersionConflict):
+            stale.save()
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.name, task.status, task.actual_effort), ("Задача", "assigned", 3.0))
+        self.assertEqual(TaskStatusEvent.objects.count(), events)
+
+    def test_ajax_views_return_conflict(self):
+        details = self.client.get(reverse("task_details", args=[self.task.pk])).json()
+        self.assertEqual(details["version"], 0)
+
+        response = self.post_status("in_progress", details["version"])
+        self.assertEqual(response.json()["version"], 1)
+
+        response = self.post_status("paused", details["version"])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["current_status"], "in_progress")
+        self.assertEqual(response.json()["task"]["version"], 1)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).status, "in_progress")
+
+        response = self.client.post(
+            reverse("update_actual_effort", args=[self.task.pk]), {"actual_effort": 5, "version": 0}
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).actual_effort, 0.0)
+        self.assertEqual(self.post_status("paused", "x").status_code, 400)
+        self.assertTrue(self.post_status("paused").json()["success"])
+
+
+    def test_effort_write_with_current_version(self):
+        parent = Task.objects.create(name="Родитель")
+        self.task.parent = parent
+        self.task.save()
+        url = reverse("update_actual_effort", args=[self.task.pk])
+        version = self.client.get(reverse("task_details", args=[self.task.pk])).json()["version"]
+
+        response = self.client.post(url, {"actual_effort": 5, "version": version})
+        self.assertEqual(response.json()["version"], version + 1)
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual((task.actual_effort, task.version), (5.0, version + 1))
+        self.assertEqual(Task.objects.get(pk=parent.pk).subtree_actual_effort, 5.0)
+
+        for value in ("abc", "-1", "nan"):
+            self.assertFalse(self.client.post(url, {"actual_effort": value}).json()["success"])
+        self.assertEqual(Task.objects.get(pk=self.task.pk).version, version + 1)
+
+
+class TaskVersionConcurrencyTestCase(TransactionTestCase):
+    def test_parallel_clients_do_not_lose_updates(self):
+        task = Task.objects.create(name="Задача", status="in_progress")
+        url = reverse("update_task_status", args=[task.pk])
+        deadline = time.monotonic() + 0.5
+        start = threading.Barrier(4)
+        outcomes = {}
+        errors = []
+
+        def client_run(number):
+            # Клиент читает версию из деталей и меняет статус с ней; после 409
+            # продолжает с версией из ответа
+            client = Client()
+            version = client.get(reverse("task_details", args=[task.pk])).json()["version"]
+            current = "in_progress"
+            counts = {200: 0, 409: 0}
+            start.wait(5)
+            try:
+                while time.monotonic() < deadline:
+                    status = "paused" if current == "in_progress" else "in_progress"
+                    response = client.post(url, {"status": status, "version": version})
+                    data = response.json()
+                    self.assertEqual(data["success"], response.status_code == 200)
+                    counts[response.status_code] += 1
+                    version = data["version"]
+                    current = data["new_status"] if data["success"] else data["current_status"]
+            except Exception as error:
+                errors.append(error)
+            finally:
+                outcomes[number] = counts
+                connections.close_all()
+
+        threads = [threading.Thread(target=client_run, args=(number,)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        written = sum(counts[200] for counts in outcomes.values())
+        self.assertGreater(written, 0)
+        self.assertGreater(sum(counts[409] for counts in outcomes.values()), 0)
+        # Каждая принятая запись видна в версии и в журнале, ни одна не затёрта молча
+        task = Task.objects.get(pk=task.pk)
+        self.assertEqual(task.version, written)
+        self.assertEqual(TaskStatusEvent.objects.filter(task_id=task.pk).exclude(from_status="").count(), written)
@@ -0,0 +1,183 @@
+"""
+Таблица переходов статусов задачи.
+
+Правила описаны декларативно (TRANSITIONS, CONDITIONS, REJECTIONS) и при
+импорте модуля компилируются в словарь (прежний статус, новый статус) ->
+последовательность проверок. Проверка перехода — поиск в словаре и вызов
+условий над заранее загруженным состоянием подзадач (TransitionContext), без
+запросов к базе, поэтому пачку переходов можно проверить за один запрос на
+загрузку подзадач (см. TaskQuerySet.transition_contexts).
+"""
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+
+ASSIGNED = 'assigned'
+IN_PROGRESS = 'in_progress'
+PAUSED = 'paused'
+COMPLETED = 'completed'
+STATUSES = (ASSIGNED, IN_PROGRESS, PAUSED, COMPLETED)
+# Удаление проверяется как переход в псевдостатус: в Task.STATUS_CHOICES его
+# нет и задача с ним не сохраняется (в журнал статусов он пишется при удалении)
+DELETED = 'deleted'
+
+UNKNOWN_STATUS_MESSAGE = "Некорректный статус."
+
+
+class TransitionContext(NamedTuple):
+    """Состояние прямых подзадач, от которого зависят условия переходов."""
+    open_subtask_statuses: Tuple[str, ...] = ()  # Статусы незавершённых прямых подзадач
+    has_subtasks: bool = False  # Есть ли подзадачи, в том числе завершённые
+
+
+NO_SUBTASKS = TransitionContext()
+
+Guard = Callable[[TransitionContext], bool]
+
+
+def no_subtasks_in_work(context: TransitionContext) -> bool:
+    return not any(status in (ASSIGNED, IN_PROGRESS) for status in context.open_subtask_statuses)
+
+
+def no_subtasks(context: TransitionContext) -> bool:
+    return not context.has_subtasks
+
+
+class Transition(NamedTuple):
+    """Допустимый переход в target из любого статуса sources."""
+    sources: FrozenSet[str]
+    target: str
+
+
+class Condition(NamedTuple):
+    """Условие перехода в target из любого статуса, кроме except_sources."""
+    target: str
+    guard: Guard
+    message: str
+    except_sources: FrozenSet[str] = frozenset()
+
+
+class Rejection(NamedTuple):
+    """Сообщение о недопустимом переходе (пустое множество — любой статус)."""
+    sources: FrozenSet[str]
+    targets: FrozenSet[str]
+    message: str
+
+
+ANY = frozenset(STATUSES)
+
+TRANSITIONS = (
+    Transition(ANY, ASSIGNED),
+    Transition(ANY, IN_PROGRESS),
+    Transition(frozenset({IN_PROGRESS}), PAUSED),
+    Transition(frozenset({IN_PROGRESS}), COMPLETED),
+    Transition(ANY, DELETED),
+)
+
+# Условия проверяются по порядку до проверки допустимости перехода
+CONDITIONS = (
+    Condition(COMPLETED, no_subtasks_in_work, "Есть незавершенные подзадачи.", frozenset({COMPLETED})),
+    Condition(DELETED, no_subtasks, "Вы не можете удалить задачу, у которой есть подзадачи."),
+)
+
+# Для недопустимого перехода берётся первое подходящее сообщение
+REJECTIONS = (
+    Rejection(frozenset({COMPLETED, PAUSED}), frozenset(), "Невозможно выполнить переход в указанный статус."),
+    Rejection(frozenset(), frozenset({COMPLETED}), "Проверьте статус текущей задачи и подзадач, они должны выполняться"),
+    Rejection(frozenset(), frozenset({PAUSED}), "Задача ещё не выполняется"),
+)
+
+# Проверка: условие (None — переход запрещён без условий) и сообщение об ошибке
+Check = Tuple[Optional[Guard], str]
+
+
+def compile_transitions() -> Dict[Tuple[str, str], Tuple[Check, ...]]:
+    """
+    Строит проверки для каждой пары (прежний статус, новый статус).
+
+    Raises:
+        ValueError: Если для недопустимого перехода нет сообщения в REJECTIONS.
+    """
+    allowed = {(source, rule.target) for rule in TRANSITIONS for source in rule.sources}
+    compiled = {}
+    for source in STATUSES:
+        for target in STATUSES + (DELETED,):
+            checks: List[Check] = [
+                (condition.guard, condition.message) for condition in CONDITIONS
+                if condition.target == target and source not in condition.except_sources
+            ]
+            if (source, target) not in allowed:
+                message = next(
+                    (
+                        rejection.message for rejection in REJECTIONS
+                        if (not rejection.sources or source in rejection.sources)
+                        and (not rejection.targets or target in rejection.targets)
+                    ),
+                    None,
+                )
+                if message is None:
+                    raise ValueError(f"Нет сообщения для недопустимого перехода {source} -> {target}.")
+                checks.append((None, message))
+            compiled[source, target] = tuple(checks)
+    return compiled
+
+
+COMPILED_TRANSITIONS = compile_transitions()
+
+
+def needs_subtasks(old_status: str, new_status: str) -> bool:
+    """Зависит ли проверка перехода от состояния подзадач (нужно ли его загружать)."""
+    return any(guard is not None for guard, _ in COMPILED_TRANSITIONS.get((old_status, new_status), ()))
+
+
+def check_transition(old_status: str, new_status: str, context: TransitionContext = NO_SUBTASKS) -> Optional[str]:
+    """
+    Проверяет переход задачи из old_status в new_status.
+
+    Args:
+        old_status (str): Текущий статус задачи в базе.
+        new_status (str): Новый статус задачи (или DELETED для удаления).
+        context (TransitionContext): Состояние прямых подзадач задачи.
+
+    Returns:
+        str | None: Текст ошибки или None, если переход допустим.
+    """
+    checks = COMPILED_TRANSITIONS.get((old_status, new_status))
+    if checks is None:
+        return UNKNOWN_STATUS_MESSAGE
+    for guard, message in checks:
+        if guard is None or not guard(context):
+            return message
+    return None
+
+
+def check_transitions(
+    transitions: Iterable[Tuple[int, str, str]], contexts: Mapping[int, TransitionContext],
+) -> List[Optional[str]]:
+    """
+    Проверяет пачку переходов (id задачи, прежний статус, новый статус).
+
+    Args:
+        transitions (iterable): Переходы.
+        contexts (mapping): Состояние подзадач по id задачи (см. TaskQuerySet.transition_contexts);
+            для задач без записи считается, что подзадач нет.
+
+    Returns:
+        list: Для каждого перехода текст ошибки или None.
+    """
+    return [
+        check_transition(old_status, new_status, contexts.get(task_id, NO_SUBTASKS))
+        for task_id, old_status, new_status in transitions
+    ]
+
+
+def validate_transition(old_status: str, new_status: str, context: TransitionContext = NO_SUBTASKS) -> None:
+    """
+    То же, что check_transition, но с исключением.
+
+    Raises:
+        ValidationError: Если переход недопустим.
+    """
+    error = check_transition(old_status, new_status, context)
+    if error is not None:
+        raise ValidationError(error)
@@ -1,6 +1,12 @@
 # tasks/urls.py
 from django.urls import path
-from .views import TaskCreateView, TaskDetailAjaxView, TaskUpdateView, TaskDeleteView, UpdateActualEffortView, UpdateTaskStatusView
+from .views import (
+    ArchiveListView, ArchivedTreeView, BatchUpdateTaskStatusView, CumulativeFlowView, ParentAutocompleteView,
+    PerformerListView, PerformerTasksView, RestoreArchivedTreeView, StatusBoardView, TaskChildrenView,
+    TaskCreateView, TaskDetailAjaxView, TaskEventsView, TaskExportView, TaskReportView, TaskSearchView,
+    TaskStatusHistoryView, TaskUpdateView, TaskDeleteView, TimeInStatusView, UpdateActualEffortView,
+    UpdateTaskStatusView,
+)
 
 urlpatterns = [
     path('create/', TaskCreateView.as_view(), name='create_task'),
@@ -8,6 +14,24 @@ urlpatterns = [
     path('<int:pk>/delete/', TaskDeleteView.as_view(), name='delete_task'),
     path('<int:parent_pk>/create_subtask/', TaskCreateView.as_view(), name='create_subtask'),
     path('tasks/<int:pk>/update_status/', UpdateTaskStatusView.as_view(), name='update_task_status'),
+    path('tasks/update_status/', BatchUpdateTaskStatusView.as_view(), name='batch_update_task_status'),
     path('tasks/<int:pk>/update_actual_effort/', UpdateActualEffortView.as_view(), name='update_actual_effort'),
     path('task/<int:pk>/details/', TaskDetailAjaxView.as_view(), name='task_details'),
+    path('task/<int:pk>/children/', TaskChildrenView.as_view(), name='task_children'),
+    path('task/<int:pk>/history/', TaskStatusHistoryView.as_view(), name='task_status_history'),
+    path('parent_autocomplete/', ParentAutocompleteView.as_view(), name='parent_autocomplete'),
+    path('events/', TaskEventsView.as_view(), name='task_events'),
+    path('export.ndjson', TaskExportView.as_view(), name='export_tasks'),
+    path('performers/', PerformerListView.as_view(), name='performer_list'),
+    path('performers/<int:pk>/tasks/', PerformerTasksView.as_view(), name='performer_tasks'),
+    path('search/', TaskSearchView.as_view(), name='task_search'),
+    path('search.json', TaskSearchView.as_view(as_json=True), name='task_search_json'),
+    path('history/time-in-status.json', TimeInStatusView.as_view(), name='time_in_status'),
+    path('history/flow.json', CumulativeFlowView.as_view(), name='cumulative_flow'),
+    path('history/board.json', StatusBoardView.as_view(), name='status_board'),
+    path('archive/', ArchiveListView.as_view(), name='task_archive'),
+    path('archive/<int:pk>/', ArchivedTreeView.as_view(), name='archived_tree'),
+    path('archive/<int:pk>/restore/', RestoreArchivedTreeView.as_view(), name='restore_archived_tree'),
+    path('report/', TaskReportView.as_view(), name='task_report'),
+    path('report.json', TaskReportView.as_view(as_json=True), name='task_report_json'),
 ]
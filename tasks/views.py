@@ -1,13 +1,96 @@
-from typing import Dict, Any
-from django.http import HttpResponseForbidden, JsonResponse
+import asyncio
+import json
+import math
+from datetime import timedelta
+from typing import Any, Dict, Optional
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, ListView, UpdateView, DeleteView
 from django.views import View
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect, render
 from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
-from .models import Task
+from .models import ChangeCounter, Performer, Task, TaskStatusEvent, TaskVersionConflict
 from .forms import TaskForm
+from .events import EVENT_RESET, feed, format_event
+from .archive import restore_tree
+from .export import aiter_ndjson, iter_ndjson
+from .history import board_at, cumulative_flow, get_cached, tasks_at, time_in_status
+from .reports import get_report
+from .search import search_tasks
+from .transitions import DELETED, NO_SUBTASKS, check_transition
+
+
+def task_list_etag(request, *args, **kwargs) -> str:
+    """
+    ETag списка задач: номер последнего изменения таблицы задач (один запрос по
+    первичному ключу). Слабый, так как страница содержит CSRF-токен.
+    """
+    version = ChangeCounter.get_value(Task.CHANGE_COUNTER)
+    return f'W/"tasks-{version}-{int(settings.TASK_LIST_LAZY)}"'
+
+
+async def aget_task_or_404(pk: int, queryset: Optional[QuerySet] = None) -> Task:
+    try:
+        return await (Task.objects.all() if queryset is None else queryset).aget(pk=pk)
+    except Task.DoesNotExist:
+        raise Http404('Задача не найдена.')
+
+
+async def task_details(task: Task) -> Dict[str, Any]:
+    """Данные задачи для окна деталей (и для ответа о конфликте версий)."""
+    return {
+        'name': task.name,
+        'description': task.description,
+        'performers': task.performers,
+        'performer_list': [
+            performer async for performer in task.assignees.order_by('name').values('id', 'name')
+        ],
+        'status': task.get_status_display(),
+        'planned_effort': task.planned_effort,
+        'actual_effort': task.actual_effort,
+        'created_at': task.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'completed_at': task.completed_at.strftime('%Y-%m-%d %H:%M:%S') if task.completed_at else '',
+        'is_terminal': not await task.subtasks.aexists(),
+        'version': task.version,
+    }
+
+
+def parse_version(request) -> Optional[int]:
+    """
+    Версия задачи, которую видел клиент (поле version запроса).
+
+    Raises:
+        ValueError: Если версия указана, но это не целое неотрицательное число.
+    """
+    value = request.POST.get('version')
+    if value in (None, ''):
+        return None
+    version = int(value)
+    if version < 0:
+        raise ValueError(value)
+    return version
+
+
+async def version_conflict_response(pk: int) -> JsonResponse:
+    """Ответ 409 с текущим состоянием задачи, которое клиент должен показать вместо своего."""
+    task = await aget_task_or_404(pk)
+    return JsonResponse({
+        'success': False,
+        'message': 'Задачу уже изменили, данные обновлены.',
+        'current_status': task.status,
+        'version': task.version,
+        'task': await task_details(task),
+    }, status=409)
 
 
 class TaskCreateView(CreateView):
@@ -27,31 +110,108 @@ class TaskCreateView(CreateView):
         initial = super().get_initial()
         parent_pk = self.kwargs.get('parent_pk')
         if parent_pk:
-            initial['parent'] = Task.objects.get(pk=parent_pk)
+            initial['parent'] = parent_pk
         return initial
 
 
+@method_decorator(condition(etag_func=task_list_etag), name='get')
 class TaskListView(ListView):
     """
     Представление для отображения списка задач.
+
+    В обычном режиме выводится всё дерево, в ленивом (settings.TASK_LIST_LAZY
+    или параметр ?lazy=1) — только страница корневых задач с числом подзадач,
+    а подзадачи подгружаются через TaskChildrenView.
+
+    Поддерживает условные запросы: пока таблица задач не менялась,
+    на If-None-Match отвечает 304 без построения страницы.
     """
     model = Task
     template_name = 'tasks/task_list.html'
     context_object_name = 'tasks'
 
+    def setup(self, request, *args, **kwargs) -> None:
+        super().setup(request, *args, **kwargs)
+        lazy = request.GET.get('lazy')
+        self.lazy = settings.TASK_LIST_LAZY if lazy is None else lazy == '1'
+
+    def get_queryset(self):
+        queryset = super().get_queryset().live()
+        if self.lazy:
+            return queryset.filter(parent__isnull=True).with_children_count().order_by('pk')
+        return queryset
+
+    def get_paginate_by(self, queryset) -> Any:
+        return settings.TASK_LIST_PAGE_SIZE if self.lazy else None
+
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         """
-        Возвращает контекст для шаблона.
+        Возвращает контекст для шаблона. Дерево задач собирается в памяти
+        из одного запроса, поэтому число запросов не зависит от размера дерева.
         """
         context = super().get_context_data(**kwargs)
+        context['lazy'] = self.lazy
+        if self.lazy:
+            context['root_tasks'] = list(context['object_list'])
+        else:
+            context['root_tasks'] = self.object_list.as_tree()
         return context
 
 
+class TaskChildrenView(View):
+    """
+    Представление для подгрузки прямых подзадач через AJAX.
+
+    Подзадачи отдаются порциями с пагинацией по ключу: параметр after —
+    id последней полученной подзадачи, limit — размер порции.
+    """
+    MAX_LIMIT = 200
+
+    def get(self, request, pk: int) -> JsonResponse:
+        """
+        Обрабатывает GET запрос и возвращает порцию подзадач вместе с готовой HTML-разметкой.
+        """
+        try:
+            after = int(request.GET.get('after', 0))
+            limit = int(request.GET.get('limit', settings.TASK_CHILDREN_PAGE_SIZE))
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректные параметры.'}, status=400)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        children = list(
+            Task.objects.live().filter(parent_id=pk, pk__gt=after).with_children_count().order_by('pk')[:limit + 1]
+        )
+        next_after = None
+        if len(children) > limit:
+            children = children[:limit]
+            next_after = children[-1].pk
+
+        return JsonResponse({
+            'children': [
+                {
+                    'id': child.pk,
+                    'name': child.name,
+                    'status': child.status,
+                    'status_display': child.get_status_display(),
+                    'children_count': child.children_count,
+                    'planned_effort': child.planned_effort,
+                    'actual_effort': child.actual_effort,
+                }
+                for child in children
+            ],
+            'next_after': next_after,
+            'html': render_to_string(
+                'tasks/task_children.html', {'tasks': children, 'lazy': True}, request=request
+            ),
+        })
+
+
 class TaskUpdateView(UpdateView):
     """
     Представление для редактирования существующей задачи.
     """
     model = Task
+    queryset = Task.objects.live()  # Архивную задачу сначала нужно восстановить
     form_class = TaskForm
     template_name = 'tasks/edit_task.html'
     success_url = reverse_lazy('task_list')
@@ -59,7 +219,8 @@ class TaskUpdateView(UpdateView):
 
 class TaskDeleteView(DeleteView):
     """
-    Представление для удаления задачи. Запрещает удаление задач, у которых есть подзадачи.
+    Представление для удаления задачи. Запрещает удаление задач, у которых есть подзадачи
+    (удаление проверяется таблицей переходов как переход в DELETED).
     """
     model = Task
     template_name = 'tasks/task_confirm_delete.html'
@@ -69,58 +230,136 @@ class TaskDeleteView(DeleteView):
         """
         Проверяет, можно ли удалить задачу. Если нет, возвращает ответ с ошибкой.
         """
+        return self.forbidden_response() or super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs) -> Any:
+        return self.forbidden_response() or super().post(request, *args, **kwargs)
+
+    def forbidden_response(self) -> Optional[HttpResponseForbidden]:
         task = self.get_object()
-        if not task.is_terminal:
-            return HttpResponseForbidden(
-                'Вы не можете удалить задачу, у которой есть подзадачи.'
-            )
-        return super().get(request, *args, **kwargs)
+        context = Task.objects.transition_contexts([task.pk]).get(task.pk, NO_SUBTASKS)
+        error = check_transition(task.status, DELETED, context)
+        return HttpResponseForbidden(error) if error else None
 
 
 class UpdateTaskStatusView(View):
     """
     Представление для обновления статуса задачи через AJAX.
+
+    Асинхронное: под ASGI ожидание базы не занимает воркер (сохранение с его
+    проверками и каскадом выполняется через asave в пуле потоков).
+
+    Если клиент передал version (из деталей задачи или прошлого ответа), статус
+    меняется только при той же версии в базе, иначе ответ 409 с текущим
+    состоянием задачи.
     """
-    def post(self, request, pk: int) -> JsonResponse:
+    async def post(self, request, pk: int) -> JsonResponse:
         """
         Обрабатывает POST запрос для обновления статуса задачи.
         """
-        task = get_object_or_404(Task, pk=pk)
+        task = await aget_task_or_404(pk, Task.objects.live())
         new_status = request.POST.get('status')
 
         if new_status not in dict(Task.STATUS_CHOICES).keys():
             return JsonResponse({'success': False, 'message': 'Некорректный статус.'})
+        try:
+            expected_version = parse_version(request)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректная версия.'}, status=400)
 
         try:
             task.status = new_status
-            task.save()
+            await task.asave(expected_version=expected_version)
             return JsonResponse({
                 'success': True,
                 'message': 'Статус обновлен успешно.',
-                'new_status': task.status
+                'new_status': task.status,
+                'version': task.version,
             })
+        except TaskVersionConflict:
+            return await version_conflict_response(pk)
         except ValidationError as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
 
+class BatchUpdateTaskStatusView(View):
+    """
+    Представление для пакетного обновления статусов задач через AJAX.
+
+    Принимает JSON вида {"updates": [{"id": 1, "status": "in_progress"}, ...]}
+    и возвращает результат для каждого элемента в том же порядке.
+    """
+    MAX_BATCH_SIZE = 500
+
+    def post(self, request) -> JsonResponse:
+        """
+        Обрабатывает POST запрос: проверяет все переходы и применяет допустимые в одной транзакции.
+        """
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректный JSON.'}, status=400)
+
+        updates = payload.get('updates') if isinstance(payload, dict) else payload
+        if not isinstance(updates, list) or not updates:
+            return JsonResponse({'success': False, 'message': 'Ожидается непустой список updates.'}, status=400)
+        if len(updates) > self.MAX_BATCH_SIZE:
+            return JsonResponse(
+                {'success': False, 'message': f'Не более {self.MAX_BATCH_SIZE} задач за запрос.'}, status=400
+            )
+
+        results = []
+        changes = []
+        for item in updates:
+            task_id = item.get('id') if isinstance(item, dict) else None
+            status = item.get('status') if isinstance(item, dict) else None
+            results.append({'id': task_id})
+            if not isinstance(task_id, int) or not isinstance(status, str):
+                results[-1].update(success=False, message='Ожидаются поля id и status.')
+                continue
+            changes.append((results[-1], task_id, status))
+
+        errors = Task.objects.live().apply_status_changes([(task_id, status) for _, task_id, status in changes])
+        for (result, _, status), error in zip(changes, errors):
+            if error is None:
+                result.update(success=True, message='Статус обновлен успешно.', new_status=status)
+            else:
+                result.update(success=False, message=error)
+        return JsonResponse({'success': all(result['success'] for result in results), 'results': results})
+
+
 class UpdateActualEffortView(View):
     """
     Представление для обновления фактического времени затраченного на задачу через AJAX.
+
+    Версия проверяется так же, как в UpdateTaskStatusView.
     """
-    def post(self, request, pk: int) -> JsonResponse:
+    async def post(self, request, pk: int) -> JsonResponse:
         """
         Обрабатывает POST запрос для обновления фактического времени задачи.
         """
-        task = get_object_or_404(Task, pk=pk)
+        task = await aget_task_or_404(pk, Task.objects.live())
         actual_effort = request.POST.get('actual_effort')
 
         if not actual_effort:
             return JsonResponse({'success': False, 'message': 'Необходимо указать фактическое время.'})
+        try:
+            actual_effort = float(actual_effort)
+        except ValueError:
+            actual_effort = None
+        if actual_effort is None or not math.isfinite(actual_effort) or actual_effort < 0:
+            return JsonResponse({'success': False, 'message': 'Некорректное фактическое время.'})
+        try:
+            expected_version = parse_version(request)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректная версия.'}, status=400)
 
         try:
-            task.total_actual_effort = actual_effort
-            task.save()
-            return JsonResponse({'success': True, 'message': 'Фактическое время обновлено.'})
+            task.actual_effort = actual_effort
+            await task.asave(expected_version=expected_version)
+            return JsonResponse({'success': True, 'message': 'Фактическое время обновлено.', 'version': task.version})
+        except TaskVersionConflict:
+            return await version_conflict_response(pk)
         except ValidationError as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
@@ -128,23 +367,371 @@ class UpdateActualEffortView(View):
 class TaskDetailAjaxView(View):
     """
     Представление для получения деталей задачи через AJAX.
+
+    ETag строится по версии поддерева задачи, которая увеличивается при изменении
+    задачи и её подзадач (от них зависит is_terminal): на If-None-Match с
+    актуальной версией ответ 304 стоит одного поиска по первичному ключу.
     """
-    def get(self, request, *args, **kwargs) -> JsonResponse:
+    async def get(self, request, pk: int, *args, **kwargs) -> JsonResponse:
         """
         Обрабатывает GET запрос для получения деталей задачи.
         """
-        task_id = self.kwargs.get('pk')
-        task = get_object_or_404(Task, pk=task_id)
-
-        data = {
-            'name': task.name,
-            'description': task.description,
-            'performers': task.performers,
-            'status': task.get_status_display(),
-            'planned_effort': task.planned_effort,
-            'actual_effort': task.actual_effort,
-            'created_at': task.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'completed_at': task.completed_at.strftime('%Y-%m-%d %H:%M:%S') if task.completed_at else '',
-            'is_terminal': task.is_terminal()
-        }
+        version = await Task.objects.filter(pk=pk).values_list('tree_version', flat=True).afirst()
+        if version is None:
+            raise Http404('Задача не найдена.')
+        response = get_conditional_response(request, etag=self.etag(pk, version))
+        if response is not None:
+            response['ETag'] = self.etag(pk, version)
+            return response
+
+        task = await aget_task_or_404(pk)
+        response = JsonResponse(await task_details(task))
+        response['ETag'] = self.etag(pk, task.tree_version)
+        return response
+
+    @staticmethod
+    def etag(pk: int, version: int) -> str:
+        return f'"task-{pk}-{version}"'
+
+
+class ParentAutocompleteView(View):
+    """
+    Представление для автодополнения родительской задачи в форме через AJAX.
+
+    Ищет задачи по подстроке названия (или по id) и отдаёт их порциями
+    с пагинацией по ключу (параметр after — id последней полученной задачи).
+    Параметр exclude исключает задачу и всех её потомков.
+    """
+    PAGE_SIZE = 20
+
+    async def get(self, request, *args, **kwargs) -> JsonResponse:
+        """
+        Обрабатывает GET запрос и возвращает найденные задачи.
+        """
+        query = request.GET.get('q', '').strip()
+        try:
+            after = int(request.GET.get('after', 0))
+            exclude = int(request.GET.get('exclude', 0))
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректные параметры.'}, status=400)
+
+        tasks = Task.objects.live().filter(pk__gt=after)
+        if query:
+            match = Q(name__icontains=query)
+            if query.isdigit():
+                match |= Q(pk=int(query))
+            tasks = tasks.filter(match)
+        if exclude:
+            path = await Task.objects.filter(pk=exclude).values_list('path', flat=True).afirst()
+            if path:
+                tasks = tasks.exclude(pk__in=Task.objects.subtree(path).values('pk'))
+
+        rows = [row async for row in tasks.order_by('pk').values_list('id', 'name')[:self.PAGE_SIZE + 1]]
+        next_after = rows[self.PAGE_SIZE - 1][0] if len(rows) > self.PAGE_SIZE else None
+        return JsonResponse({
+            'results': [{'id': task_id, 'text': name} for task_id, name in rows[:self.PAGE_SIZE]],
+            'next_after': next_after,
+        })
+
+
+class TaskExportView(View):
+    """
+    Представление для потоковой выгрузки всех задач в формате NDJSON.
+
+    Под ASGI отдаётся асинхронный итератор (aiter_ndjson): обычный Django 4.2
+    собрал бы там весь ответ в памяти. Под WSGI, наоборот, асинхронный
+    итератор пришлось бы вычитать целиком, поэтому остаётся iter_ndjson.
+    """
+    def get(self, request, *args, **kwargs) -> StreamingHttpResponse:
+        """
+        Обрабатывает GET запрос: строки отдаются по мере чтения курсора, без загрузки таблицы в память.
+        """
+        content = aiter_ndjson() if isinstance(request, ASGIRequest) else iter_ndjson()
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="tasks.ndjson"'
+        return response
+
+
+class TaskEventsView(View):
+    """
+    Поток изменений задач в формате Server-Sent Events (text/event-stream).
+
+    Асинхронное представление: под ASGI (task_manager/asgi.py) соединение
+    держится без отдельного потока, клиент ждёт событий в цикле событий
+    воркера. Соединение закрывается через TASK_EVENTS_MAX_AGE секунд, браузер
+    переподключается сам и по заголовку Last-Event-ID получает пропущенное.
+    Под WSGI поток не удерживается: отдаются накопленные события, и клиент
+    опрашивает сервер с интервалом TASK_EVENTS_RETRY_MS.
+    """
+    async def get(self, request, *args, **kwargs) -> StreamingHttpResponse:
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        try:
+            after = int(last_event_id) if last_event_id else None
+        except ValueError:
+            after = None
+        hold = isinstance(request, ASGIRequest)
+        response = StreamingHttpResponse(self.stream(after, hold), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Отключает буферизацию в nginx
+        return response
+
+    async def stream(self, after, hold: bool):
+        """
+        Асинхронный генератор событий: сначала пропущенные (после after),
+        затем новые по мере публикации, с комментариями keepalive в паузах.
+        """
+        if after is None:
+            after = feed.last_id
+        subscription = feed.subscribe()
+        try:
+            yield f"retry: {settings.TASK_EVENTS_RETRY_MS}\n\n"
+            missed = feed.replay(after)
+            if missed is None:
+                after = feed.last_id
+                yield format_event((after, EVENT_RESET, {}))
+                missed = []
+            for event in missed:
+                after = event[0]
+                yield format_event(event)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + (settings.TASK_EVENTS_MAX_AGE if hold else 0)
+            while True:
+                timeout = min(settings.TASK_EVENTS_KEEPALIVE, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break  # Очередь переполнилась, клиент переподключится
+                if event[0] <= after:
+                    continue  # Уже отправлено из буфера
+                after = event[0]
+                yield format_event(event)
+        finally:
+            feed.unsubscribe(subscription)
+
+
+class PerformerListView(View):
+    """
+    Исполнители с нагрузкой (число задач, незавершённые задачи, плановое и
+    фактическое время), посчитанной одним запросом с группировкой.
+    """
+    def get(self, request) -> JsonResponse:
+        performers = Performer.objects.with_workload().order_by('name').values(
+            'id', 'name', 'task_count', 'open_task_count', 'planned', 'actual',
+        )
+        return JsonResponse({'performers': list(performers)})
+
+
+class PerformerTasksView(View):
+    """
+    Задачи исполнителя порциями с пагинацией по ключу (параметр after — id
+    последней полученной задачи). Выборка идёт по индексу (performer, task)
+    таблицы связей, без перебора строк исполнителей.
+    """
+    MAX_LIMIT = 200
+
+    def get(self, request, pk: int) -> JsonResponse:
+        performer = get_object_or_404(Performer, pk=pk)
+        try:
+            after = int(request.GET.get('after', 0))
+            limit = int(request.GET.get('limit', settings.TASK_CHILDREN_PAGE_SIZE))
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректные параметры.'}, status=400)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        tasks = list(
+            Task.objects.filter(performer_links__performer_id=pk, performer_links__task_id__gt=after)
+            .order_by('performer_links__task_id')
+            .values('id', 'name', 'status', 'planned_effort', 'actual_effort')[:limit + 1]
+        )
+        next_after = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_after = tasks[-1]['id']
+        return JsonResponse({'performer': performer.name, 'tasks': tasks, 'next_after': next_after})
+
+
+class TaskSearchView(View):
+    """
+    Полнотекстовый поиск задач по названию, описанию и исполнителям (индекс
+    FTS5, см. tasks.search) с ранжированием и постраничным выводом.
+    Отдаёт HTML-страницу или JSON при as_json=True.
+    """
+    template_name = 'tasks/task_search.html'
+    as_json = False
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+        except ValueError:
+            page = 1
+        hits, has_next = search_tasks(
+            query, page, settings.TASK_SEARCH_PAGE_SIZE, settings.TASK_SEARCH_MAX_CANDIDATES,
+        )
+        if self.as_json:
+            return JsonResponse({'query': query, 'page': page, 'results': hits, 'has_next': has_next})
+        return render(request, self.template_name, {
+            'query': query, 'page': page, 'results': hits, 'has_next': has_next,
+        })
+
+
+class TaskReportView(View):
+    """
+    Сводный отчёт по трудоёмкости: по статусам, исполнителям, корневым проектам
+    и неделям завершения (HTML или JSON при as_json=True).
+
+    Отчёт считается агрегирующими запросами и кэшируется по номеру изменения
+    таблицы задач (см. tasks.reports.get_report); ETag строится по тому же номеру.
+    """
+    template_name = 'tasks/task_report.html'
+    as_json = False
+
+    def get(self, request, *args, **kwargs):
+        report = get_report()
+        etag = f'W/"report-{report["version"]}-{int(self.as_json)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if self.as_json:
+                response = JsonResponse(report)
+            else:
+                response = render(request, self.template_name, {'report': report})
+        response['ETag'] = etag
+        return response
+
+
+def parse_moment(value: str) -> timezone.datetime:
+    """Время из параметра запроса (ISO 8601); без часового пояса считается в текущем."""
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class TaskStatusHistoryView(View):
+    """
+    История статусов задачи: события журнала по порядку и время в каждом
+    статусе. История удалённой задачи тоже отдаётся — журнал не удаляется.
+    """
+    def get(self, request, pk: int) -> JsonResponse:
+        events = list(
+            TaskStatusEvent.objects.filter(task_id=pk).order_by('created_at', 'id')
+            .values('from_status', 'to_status', 'created_at')
+        )
+        if not events:
+            get_object_or_404(Task, pk=pk)
+        return JsonResponse({'task': pk, 'events': events, 'time_in_status': time_in_status(task_id=pk)})
+
+
+class TimeInStatusView(View):
+    """
+    Время в статусах по всем задачам за период (параметры since и until, ISO 8601).
+    """
+    def get(self, request) -> JsonResponse:
+        try:
+            since = parse_moment(request.GET['since']) if request.GET.get('since') else None
+            until = parse_moment(request.GET['until']) if request.GET.get('until') else None
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректные параметры.'}, status=400)
+        return JsonResponse({'time_in_status': get_cached(time_in_status, None, since, until)})
+
+
+class CumulativeFlowView(View):
+    """
+    Накопительная диаграмма по дням (параметры since и until — даты, по
+    умолчанию последние DEFAULT_DAYS дней, не больше MAX_DAYS дней).
+    """
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
+    def get(self, request) -> JsonResponse:
+        until = parse_date(request.GET.get('until', '')) if request.GET.get('until') else timezone.now().date()
+        since = (
+            parse_date(request.GET.get('since', '')) if request.GET.get('since')
+            else until - timedelta(days=self.DEFAULT_DAYS - 1) if until else None
+        )
+        if since is None or until is None or not 0 <= (until - since).days < self.MAX_DAYS:
+            return JsonResponse({'success': False, 'message': 'Некорректный период.'}, status=400)
+        return JsonResponse({
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            'flow': get_cached(cumulative_flow, since, until),
+        })
+
+
+class StatusBoardView(View):
+    """
+    Доска на момент времени (параметр at, по умолчанию текущий): число задач в
+    каждом статусе, а с параметром status — задачи этого статуса порциями
+    (after — id последней полученной задачи, limit — размер порции).
+    """
+    MAX_LIMIT = 200
+
+    def get(self, request) -> JsonResponse:
+        try:
+            moment = parse_moment(request.GET['at']) if request.GET.get('at') else timezone.now()
+            after = int(request.GET.get('after', 0))
+            limit = max(1, min(int(request.GET.get('limit', settings.TASK_CHILDREN_PAGE_SIZE)), self.MAX_LIMIT))
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Некорректные параметры.'}, status=400)
+        data: Dict[str, Any] = {'at': moment.isoformat()}
+        status = request.GET.get('status')
+        if status:
+            tasks = get_cached(tasks_at, moment, status, after, limit + 1)
+            data['status'] = status
+            data['tasks'] = tasks[:limit]
+            data['next_after'] = tasks[limit - 1]['id'] if len(tasks) > limit else None
+        else:
+            data['board'] = get_cached(board_at, moment)
         return JsonResponse(data)
+
+
+class ArchiveListView(ListView):
+    """
+    Архив: корни поддеревьев, убранных командой archive_tasks, постранично в
+    порядке архивации (по частичному индексу архивных корней).
+    """
+    template_name = 'tasks/archive_list.html'
+    context_object_name = 'roots'
+
+    def get_queryset(self):
+        return (
+            Task.objects.archived().filter(parent__isnull=True)
+            .with_children_count().order_by('-archived_at', '-pk')
+        )
+
+    def get_paginate_by(self, queryset) -> int:
+        return settings.TASK_ARCHIVE_PAGE_SIZE
+
+
+class ArchivedTreeView(ListView):
+    """Архивное поддерево только для чтения, постранично в порядке обхода дерева."""
+    template_name = 'tasks/archived_tree.html'
+    context_object_name = 'tasks'
+
+    def get_queryset(self):
+        self.root = get_object_or_404(Task.objects.archived(), pk=self.kwargs['pk'], parent__isnull=True)
+        return Task.objects.subtree(self.root.path).order_by('path')
+
+    def get_paginate_by(self, queryset) -> int:
+        return settings.TASK_ARCHIVE_PAGE_SIZE
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context['root'] = self.root
+        for task in context['tasks']:
+            task.indent = task.depth - self.root.depth
+        return context
+
+
+class RestoreArchivedTreeView(View):
+    """Возвращает архивное поддерево в работу."""
+    def post(self, request, pk: int):
+        get_object_or_404(Task.objects.archived(), pk=pk, parent__isnull=True)
+        restore_tree(pk)
+        return redirect('task_list')